@@ -0,0 +1,44 @@
+-- Upload queue processor: retry attempts, leases, archive and per-channel counts.
+-- Databases the processor already ran against have these objects (it used to
+-- create them at startup), so every statement is idempotent. upload_queue and
+-- "UploadStatus" come from V6, which has no migration in this directory, so
+-- the queue changes are skipped on databases without them.
+
+DO $$
+BEGIN
+    IF to_regclass('"upload_queue"') IS NOT NULL THEN
+        -- AlterTable
+        ALTER TABLE "upload_queue" ADD COLUMN IF NOT EXISTS "attempts" INTEGER NOT NULL DEFAULT 0;
+        ALTER TABLE "upload_queue" ADD COLUMN IF NOT EXISTS "lease_holder" TEXT;
+        ALTER TABLE "upload_queue" ADD COLUMN IF NOT EXISTS "lease_expires_at" TIMESTAMP(3);
+
+        -- CreateIndex (raw SQL: Prisma can't express a partial index, so it is
+        -- not in schema.prisma; keep it out of generated migrations)
+        CREATE INDEX IF NOT EXISTS "upload_queue_claimable_idx" ON "upload_queue"("created_at", "id")
+            WHERE "status" IN ('PENDING', 'FAILED');
+
+        -- CreateTable
+        CREATE TABLE IF NOT EXISTS "upload_queue_archive" (
+            "id" TEXT NOT NULL,
+            "status" "UploadStatus" NOT NULL,
+            "youtube_url" TEXT,
+            "uploader_id" TEXT NOT NULL,
+            "created_at" TIMESTAMP(3) NOT NULL,
+            "processed_at" TIMESTAMP(3),
+            "archived_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            "data" JSONB NOT NULL,
+
+            CONSTRAINT "upload_queue_archive_pkey" PRIMARY KEY ("id")
+        );
+    END IF;
+END $$;
+
+-- CreateTable
+CREATE TABLE IF NOT EXISTS "channel_upload_counts" (
+    "channel" TEXT NOT NULL,
+    "date" DATE NOT NULL,
+    "count" INTEGER NOT NULL DEFAULT 0,
+    "updated_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "channel_upload_counts_pkey" PRIMARY KEY ("channel", "date")
+);
@@ -0,0 +1,8 @@
+-- YouTube processing result of each upload, recorded by the queue processor's
+-- status poller. Idempotent: the processor used to add these at startup.
+
+-- AlterTable
+ALTER TABLE "videos" ADD COLUMN IF NOT EXISTS "processing_status" TEXT;
+ALTER TABLE "videos" ADD COLUMN IF NOT EXISTS "duration_seconds" INTEGER;
+ALTER TABLE "videos" ADD COLUMN IF NOT EXISTS "thumbnail_url" TEXT;
+ALTER TABLE "videos" ADD COLUMN IF NOT EXISTS "status_checked_at" TIMESTAMP(3);
@@ -0,0 +1,6 @@
+-- Self-hosted poster frame and hover-preview sprite sheet of each video.
+-- Idempotent: the queue processor used to add these at startup.
+
+-- AlterTable
+ALTER TABLE "videos" ADD COLUMN IF NOT EXISTS "poster_url" TEXT;
+ALTER TABLE "videos" ADD COLUMN IF NOT EXISTS "preview_sprite" JSONB;
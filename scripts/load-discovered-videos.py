@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Bulk loader for discovered_videos
+
+Loads a discovery harvest (thousands of candidate videos) in one pass:
+1. Reads candidates from JSON Lines, JSON or CSV files (or stdin)
+2. Streams them into a temp table with COPY
+3. Merges them with a single INSERT ... ON CONFLICT (youtube_id)
+
+New videos are added as PENDING. Videos already discovered get fresh raw
+YouTube metadata (title, description, channel, thumbnail, publish date),
+but everything a reviewer may have touched is left alone: status,
+review_notes, the inferred_* fields and prod_video_id. Videos already in
+the archive (videos.youtube_id) are skipped, as in the discovery tool.
+
+Input fields use the discovered_videos column names; the discovery tool's
+camelCase names (videoId, title, channelName, ...) and yt-dlp's JSON
+fields (id, title, channel, upload_date, ...) are accepted too.
+
+Usage:
+    python scripts/load-discovered-videos.py harvest.jsonl
+    yt-dlp --flat-playlist -j "ytsearch500:FSU Flying High Circus" | \\
+        python scripts/load-discovered-videos.py -
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Shared database and metadata helpers from the YouTube tools
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools' / 'youtube'))
+from circus_tools.db import get_db_connection  # noqa: E402
+from circus_tools.metadata import youtube_url  # noqa: E402
+
+# Staged columns, in COPY order, and the input names each is read from
+FIELD_ALIASES = {
+    'youtube_id': ['youtube_id', 'youtubeId', 'videoId', 'id'],
+    'raw_title': ['raw_title', 'rawTitle', 'title'],
+    'raw_description': ['raw_description', 'rawDescription', 'description'],
+    'channel_name': ['channel_name', 'channelName', 'channel', 'uploader'],
+    'thumbnail_url': ['thumbnail_url', 'thumbnailUrl', 'thumbnail'],
+    'published_at': ['published_at', 'publishedAt', 'timestamp', 'upload_date'],
+    'inferred_year': ['inferred_year', 'inferredYear', 'year'],
+    'inferred_show_type': ['inferred_show_type', 'inferredShowType', 'show_type'],
+    'inferred_act_names': ['inferred_act_names', 'inferredActNames', 'acts'],
+    'inferred_performers': ['inferred_performers', 'inferredPerformers', 'performers'],
+}
+ARRAY_FIELDS = {'inferred_act_names', 'inferred_performers'}
+SHOW_TYPES = {'HOME', 'CALLAWAY'}
+
+STAGING_TABLE = """
+    CREATE TEMP TABLE discovered_staging (
+        id TEXT NOT NULL,
+        youtube_id TEXT NOT NULL,
+        youtube_url TEXT NOT NULL,
+        raw_title TEXT NOT NULL,
+        raw_description TEXT,
+        channel_name TEXT,
+        thumbnail_url TEXT,
+        published_at TIMESTAMP(3),
+        inferred_year INTEGER,
+        inferred_show_type TEXT,
+        inferred_act_names TEXT[],
+        inferred_performers TEXT[],
+        line INTEGER NOT NULL
+    ) ON COMMIT DROP
+"""
+INPUT_COLUMNS = list(FIELD_ALIASES)[1:]
+STAGED_COLUMNS = ['id', 'youtube_id', 'youtube_url', *INPUT_COLUMNS, 'line']
+
+# Raw YouTube fields refreshed on conflict; review fields are never touched
+REFRESHED_COLUMNS = ['raw_title', 'raw_description', 'channel_name', 'thumbnail_url', 'published_at']
+
+MERGE_SQL = f"""
+    INSERT INTO discovered_videos (
+        id, youtube_id, youtube_url, {', '.join(INPUT_COLUMNS)},
+        status, created_at, updated_at
+    )
+    SELECT DISTINCT ON (s.youtube_id)
+        s.id, s.youtube_id, s.youtube_url, {', '.join(f's.{column}' for column in INPUT_COLUMNS)},
+        'PENDING', NOW(), NOW()
+    FROM discovered_staging s
+    WHERE NOT EXISTS (SELECT 1 FROM videos v WHERE v.youtube_id = s.youtube_id)
+    ORDER BY s.youtube_id, s.line DESC
+    ON CONFLICT (youtube_id) DO UPDATE SET
+        {', '.join(f'{column} = COALESCE(EXCLUDED.{column}, discovered_videos.{column})'
+                   for column in REFRESHED_COLUMNS)},
+        updated_at = NOW()
+    WHERE ({', '.join(f'discovered_videos.{column}' for column in REFRESHED_COLUMNS)})
+        IS DISTINCT FROM
+        ({', '.join(f'COALESCE(EXCLUDED.{column}, discovered_videos.{column})'
+                    for column in REFRESHED_COLUMNS)})
+    RETURNING (xmax = 0) AS inserted
+"""
+
+
+def read_candidates(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield raw candidate dicts from a .jsonl/.ndjson, .json or .csv file, or '-' for stdin (JSON Lines)."""
+    if path == '-':
+        for line in sys.stdin:
+            if line.strip():
+                yield json.loads(line)
+        return
+
+    suffix = Path(path).suffix.lower()
+    with open(path, newline='' if suffix == '.csv' else None) as f:
+        if suffix == '.csv':
+            yield from csv.DictReader(f)
+        elif suffix == '.json':
+            data = json.load(f)
+            yield from (data.get('videos', []) if isinstance(data, dict) else data)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _pick(raw: Dict[str, Any], names: List[str]) -> Any:
+    for name in names:
+        value = raw.get(name)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _timestamp(value: Any) -> Optional[str]:
+    """Normalise ISO strings, yt-dlp upload_date (YYYYMMDD) and epoch seconds."""
+    if value is None:
+        return None
+    text = str(value)
+    if text.isdigit() and len(text) == 8:
+        return f"{text[:4]}-{text[4:6]}-{text[6:]}"
+    if isinstance(value, (int, float)) or text.isdigit():
+        return datetime.fromtimestamp(int(value), tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    return text
+
+
+def normalize(raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map an input record onto the staged columns (None if it has no ID or title)."""
+    row = {column: _pick(raw, names) for column, names in FIELD_ALIASES.items()}
+    if not row['youtube_id'] or not row['raw_title']:
+        return None
+
+    row['published_at'] = _timestamp(row['published_at'])
+    year = str(row['inferred_year'] or '')
+    row['inferred_year'] = int(year) if year.isdigit() else None
+    show = str(row['inferred_show_type'] or '').upper()
+    row['inferred_show_type'] = show if show in SHOW_TYPES else None
+    for column in ARRAY_FIELDS:
+        value = row[column] or []
+        row[column] = [v.strip() for v in value.split(';')] if isinstance(value, str) else list(value)
+    return row
+
+
+def pg_array(values: List[str]) -> str:
+    """Render a text[] literal for COPY."""
+    quoted = (str(v).replace('\\', '\\\\').replace('"', '\\"') for v in values)
+    return '{' + ','.join(f'"{v}"' for v in quoted) + '}'
+
+
+def build_copy_buffer(candidates: Iterator[Dict[str, Any]], stats: Dict[str, int]) -> io.StringIO:
+    """Render valid candidates as CSV for COPY, counting read and skipped records."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for line, raw in enumerate(candidates, 1):
+        stats['read'] += 1
+        row = normalize(raw)
+        if row is None:
+            stats['invalid'] += 1
+            continue
+
+        values = [str(uuid.uuid4()), row['youtube_id'], youtube_url(row['youtube_id'])]
+        for column in INPUT_COLUMNS:
+            value = row[column]
+            if column in ARRAY_FIELDS:
+                value = pg_array(value)
+            values.append('' if value is None else value)
+        values.append(line)
+        writer.writerow(values)
+        stats['staged'] += 1
+
+    buffer.seek(0)
+    return buffer
+
+
+def load(paths: List[str], dry_run: bool = False) -> Dict[str, int]:
+    """Stage every candidate with COPY and merge them into discovered_videos.
+
+    Args:
+        paths: Input files ('-' for stdin)
+        dry_run: Roll back instead of committing
+
+    Returns:
+        Counts: read, invalid, staged, inserted, updated, unchanged
+    """
+    stats = {'read': 0, 'invalid': 0, 'staged': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0}
+    candidates = (raw for path in paths for raw in read_candidates(path))
+    buffer = build_copy_buffer(candidates, stats)
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(STAGING_TABLE)
+            cur.copy_expert(
+                f"COPY discovered_staging ({', '.join(STAGED_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+            cur.execute("SELECT COUNT(DISTINCT youtube_id) FROM discovered_staging")
+            distinct = cur.fetchone()[0]
+
+            cur.execute(MERGE_SQL)
+            for (inserted,) in cur.fetchall():
+                stats['inserted' if inserted else 'updated'] += 1
+            stats['unchanged'] = distinct - stats['inserted'] - stats['updated']
+
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    finally:
+        conn.close()
+
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='Bulk-load discovery candidates into discovered_videos',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python scripts/load-discovered-videos.py harvest.jsonl
+  python scripts/load-discovered-videos.py harvest-*.csv --dry-run
+  yt-dlp --flat-playlist -j "ytsearch500:FSU Flying High Circus" | \\
+      python scripts/load-discovered-videos.py -
+
+CSV array columns (inferred_act_names, inferred_performers) are separated by ";".
+        '''
+    )
+    parser.add_argument('inputs', nargs='+', help='JSON Lines, JSON or CSV files ("-" reads JSON Lines from stdin)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Stage and merge, then roll back (reports what would change)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Discovered Videos Bulk Load")
+    print("=" * 60)
+
+    started = time.monotonic()
+    try:
+        stats = load(args.inputs, args.dry_run)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    print(f"Read: {stats['read']} ({stats['invalid']} without an ID or title)")
+    print(f"Staged: {stats['staged']}")
+    print(f"Inserted: {stats['inserted']}")
+    print(f"Updated: {stats['updated']}")
+    print(f"Unchanged or already archived: {stats['unchanged']}")
+    print(f"{'Dry run, rolled back' if args.dry_run else 'Committed'} in {time.monotonic() - started:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -3,52 +3,125 @@
 GitHub Actions Upload Queue Processor
 
 Processes pending video uploads from the queue:
-1. Checks daily YouTube upload limit
+1. Checks the daily upload budget of each YouTube channel and authenticates
+   the channels with budget left, before claiming anything
 2. Gets pending items from the queue
 3. Downloads video from Vercel Blob
-4. Uploads to YouTube
-5. Creates video entries in the database
-6. Updates queue status
+4. Optionally remuxes/transcodes it for a faster upload (OPTIMIZE_UPLOADS)
+5. Uploads to YouTube, through the channel with the most budget left
+6. Creates video entries in the database
+7. Updates queue status
+8. Publishes a poster frame and hover-preview sprite (GENERATE_PREVIEWS)
+9. Polls recent uploads for YouTube's processing result (--poll-status, which
+   the workflow runs once after all queue runners)
+
+Pending rows (and failed rows with attempts left) are claimed oldest first
+through a partial index, so polls stay cheap however much history the table
+holds. Run with --archive to move old finished rows into upload_queue_archive.
+
+Several processors can run at once (overlapping cron and dispatch runs, or a
+matrix of runners). Each claims one row at a time under a lease, which a
+heartbeat thread keeps extending while the row is being worked on. A row
+whose runner died is reclaimed by another runner once its lease lapses. A
+runner that finds its row reclaimed abandons the upload, or deletes the
+video if YouTube already has it, so the row isn't uploaded twice.
+
+For bulk imports from local disk, --ingest DIR --metadata FILE queues every
+listed file in one batch and uploads it in place, skipping the Vercel Blob
+upload and download. Local rows (file:// blob URLs) are only claimed by an
+--ingest run for their directory, never by the scheduled processor.
 """
 
-import http.client
-import httplib2
+import argparse
+import csv
+import itertools
 import json
 import os
-import random
+import socket
 import sys
 import tempfile
+import threading
 import time
 import uuid
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any, List
-from urllib.request import urlopen, Request
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+from urllib.parse import urlparse
+from urllib.request import urlopen, url2pathname, Request
 from urllib.error import URLError
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_batch
 
+from google.auth.exceptions import RefreshError
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request as GoogleAuthRequest
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
 from googleapiclient.errors import HttpError
 
+# Shared metadata, YouTube API and ffmpeg tooling from the YouTube tools
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools' / 'youtube'))
+from circus_tools import profiling  # noqa: E402
+from circus_tools.channels import ChannelPool, NoChannelCapacity, upload_with_pool  # noqa: E402
+from circus_tools.db import fetch_act_ids, show_type  # noqa: E402
+from circus_tools.metadata import build_tags, build_title, generate_description, youtube_url  # noqa: E402
+from circus_tools.optimize import optimizer_from_env  # noqa: E402
+from circus_tools.previews import generate_previews  # noqa: E402
+from circus_tools.profiling import add_profile_argument, profiled  # noqa: E402
+from circus_tools.youtube_api import (  # noqa: E402
+    MANAGE_SCOPES, MAX_RETRIES, READ_SCOPES, SCOPES, VIDEOS_LIST_BATCH, UploadCancelled, build_service,
+    list_videos, parse_duration, upload_video
+)
+
 
 # Configuration
+# DAILY_UPLOAD_LIMIT applies per channel. YOUTUBE_CHANNELS holds a JSON list
+# of channels ({"name", "refresh_token", optional "client_id",
+# "client_secret", "daily_limit"}); without it the single channel from
+# YOUTUBE_REFRESH_TOKEN is used.
 DAILY_UPLOAD_LIMIT = int(os.environ.get('DAILY_UPLOAD_LIMIT', '10'))
-
-# Retry settings for resumable uploads
-MAX_RETRIES = 10
-RETRIABLE_STATUS_CODES = [500, 502, 503, 504]
-RETRIABLE_EXCEPTIONS = (
-    httplib2.HttpLib2Error, IOError, http.client.NotConnected,
-    http.client.IncompleteRead, http.client.ImproperConnectionState,
-    http.client.CannotSendRequest, http.client.CannotSendHeader,
-    http.client.ResponseNotReady, http.client.BadStatusLine
+OPTIMIZE_UPLOADS = os.environ.get('OPTIMIZE_UPLOADS', '').lower() in ('1', 'true', 'yes')
+
+# Poster and preview sprite images, generated from the downloaded file and
+# stored in Vercel Blob under previews/<video id>/
+GENERATE_PREVIEWS = os.environ.get('GENERATE_PREVIEWS', '').lower() in ('1', 'true', 'yes')
+PREVIEW_BLOB_PREFIX = 'previews'
+
+# How many processing attempts a row gets before a failure is final
+# (1 = failures are never retried). FAILED rows count as at least one
+# attempt, including rows failed before attempts were tracked or marked
+# failed from the web app. A reclaimed lease also counts as an attempt, and
+# is checked at claim time like any other: a PENDING row whose runners keep
+# dying stops being claimed and is marked FAILED.
+QUEUE_MAX_ATTEMPTS = int(os.environ.get('QUEUE_MAX_ATTEMPTS', '1'))
+
+# Leases: how long a claim lasts without a heartbeat, and how often the
+# heartbeat extends it
+LEASE_SECONDS = int(os.environ.get('QUEUE_LEASE_SECONDS', '600'))
+LEASE_HEARTBEAT_SECONDS = max(LEASE_SECONDS // 4, 1)
+
+# Processing-status polling: videos uploaded within this many days whose
+# processing hasn't finished are checked on every run
+STATUS_POLL_DAYS = int(os.environ.get('STATUS_POLL_DAYS', '7'))
+STATUS_POLL_PARTS = 'status,processingDetails,contentDetails,snippet'
+STATUS_POLL_FIELDS = (
+    'items(id,status(uploadStatus,failureReason,rejectionReason),'
+    'processingDetails(processingStatus,processingFailureReason),'
+    'contentDetails/duration,snippet/thumbnails)'
 )
+THUMBNAIL_PREFERENCE = ['maxres', 'standard', 'high', 'medium', 'default']
 
+# Local ingest: queue rows whose blob_url starts with this point at files on
+# the ingesting machine. upload_queue.file_size is a 32-bit column (web
+# uploads are capped at 2 GB), so larger local files are recorded at its cap.
+LOCAL_FILE_PREFIX = 'file://'
+MAX_QUEUE_FILE_SIZE = 2**31 - 1
 
+# Archival of finished rows
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '30'))
+ARCHIVE_BATCH_SIZE = 500
+
+
+@profiled('db')
 def get_db_connection():
     """Get a database connection using the DATABASE_PUBLIC_URL environment variable."""
     database_url = os.environ.get('DATABASE_PUBLIC_URL')
@@ -57,16 +130,42 @@ def get_db_connection():
     return psycopg2.connect(database_url)
 
 
-def get_youtube_credentials() -> Credentials:
-    """Build YouTube credentials from environment variables."""
-    client_id = os.environ.get('YOUTUBE_CLIENT_ID')
-    client_secret = os.environ.get('YOUTUBE_CLIENT_SECRET')
-    refresh_token = os.environ.get('YOUTUBE_REFRESH_TOKEN')
+def load_channels() -> List[Dict[str, Any]]:
+    """Read the channel pool from YOUTUBE_CHANNELS, or the single-channel variables.
+
+    Channels without their own client ID/secret use YOUTUBE_CLIENT_ID and
+    YOUTUBE_CLIENT_SECRET; channels without a daily_limit use
+    DAILY_UPLOAD_LIMIT.
+    """
+    configured = os.environ.get('YOUTUBE_CHANNELS')
+    if configured:
+        channels = json.loads(configured)
+    else:
+        channels = [{'name': 'default', 'refresh_token': os.environ.get('YOUTUBE_REFRESH_TOKEN')}]
+
+    for channel in channels:
+        channel.setdefault('client_id', os.environ.get('YOUTUBE_CLIENT_ID'))
+        channel.setdefault('client_secret', os.environ.get('YOUTUBE_CLIENT_SECRET'))
+        channel.setdefault('daily_limit', DAILY_UPLOAD_LIMIT)
+    return channels
+
+
+def get_youtube_credentials(channel: Dict[str, Any], scopes: List[str] = SCOPES) -> Credentials:
+    """Build YouTube credentials for a channel.
+
+    Raises:
+        RefreshError: The refresh token was refused, e.g. invalid_scope when
+            it was never granted the requested scopes
+    """
+    client_id = channel.get('client_id')
+    client_secret = channel.get('client_secret')
+    refresh_token = channel.get('refresh_token')
 
     if not all([client_id, client_secret, refresh_token]):
         raise ValueError(
-            "Missing YouTube credentials. Required: "
-            "YOUTUBE_CLIENT_ID, YOUTUBE_CLIENT_SECRET, YOUTUBE_REFRESH_TOKEN"
+            f"Missing YouTube credentials for channel {channel['name']}. Required: "
+            "YOUTUBE_CLIENT_ID, YOUTUBE_CLIENT_SECRET, YOUTUBE_REFRESH_TOKEN "
+            "(or client_id, client_secret, refresh_token in YOUTUBE_CHANNELS)"
         )
 
     creds = Credentials(
@@ -75,7 +174,7 @@ def get_youtube_credentials() -> Credentials:
         token_uri='https://oauth2.googleapis.com/token',
         client_id=client_id,
         client_secret=client_secret,
-        scopes=['https://www.googleapis.com/auth/youtube.upload']
+        scopes=scopes
     )
 
     # Refresh to get a valid access token
@@ -83,10 +182,12 @@ def get_youtube_credentials() -> Credentials:
     return creds
 
 
-def get_authenticated_service():
-    """Authenticate and return a YouTube API service object."""
-    creds = get_youtube_credentials()
-    return build('youtube', 'v3', credentials=creds)
+@profiled('oauth')
+def get_authenticated_service(channel: Dict[str, Any], scopes: List[str] = SCOPES):
+    """Authenticate and return a YouTube API service object for a channel."""
+    creds = get_youtube_credentials(channel, scopes)
+    print(f"YouTube authentication successful ({channel['name']})")
+    return build_service(creds)
 
 
 def get_today_date() -> datetime:
@@ -95,6 +196,7 @@ def get_today_date() -> datetime:
     return datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
 
 
+@profiled('db')
 def get_daily_upload_count(conn) -> int:
     """Get today's upload count from the database."""
     today = get_today_date()
@@ -108,6 +210,7 @@ def get_daily_upload_count(conn) -> int:
         return row['count'] if row else 0
 
 
+@profiled('db')
 def increment_daily_upload_count(conn) -> None:
     """Increment today's upload count."""
     today = get_today_date()
@@ -123,11 +226,139 @@ def increment_daily_upload_count(conn) -> None:
     conn.commit()
 
 
-def get_pending_items(conn, limit: int) -> List[Dict]:
-    """Get pending upload queue items."""
+class DatabaseUploadCounter:
+    """Per-channel daily upload counts in channel_upload_counts.
+
+    Reservations are single conditional upserts, so runners sharing a
+    channel can't take it past its limit between them.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    @profiled('db')
+    def count(self, name: str) -> int:
+        with self.conn.cursor() as cur:
+            cur.execute(
+                "SELECT count FROM channel_upload_counts WHERE channel = %s AND date = %s",
+                (name, get_today_date().date())
+            )
+            row = cur.fetchone()
+        self.conn.commit()
+        return row[0] if row else 0
+
+    @profiled('db')
+    def reserve(self, name: str, limit: int) -> bool:
+        if limit <= 0:
+            return False
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO channel_upload_counts (channel, date, count)
+                VALUES (%s, %s, 1)
+                ON CONFLICT (channel, date) DO UPDATE SET
+                    count = channel_upload_counts.count + 1,
+                    updated_at = NOW()
+                WHERE channel_upload_counts.count < %s
+                RETURNING count
+            """, (name, get_today_date().date(), limit))
+            reserved = cur.fetchone() is not None
+        self.conn.commit()
+        return reserved
+
+    @profiled('db')
+    def release(self, name: str) -> None:
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                UPDATE channel_upload_counts
+                SET count = GREATEST(count - 1, 0), updated_at = NOW()
+                WHERE channel = %s AND date = %s
+            """, (name, get_today_date().date()))
+        self.conn.commit()
+
+    @profiled('db')
+    def exhaust(self, name: str, limit: int) -> None:
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO channel_upload_counts (channel, date, count)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (channel, date) DO UPDATE SET
+                    count = GREATEST(channel_upload_counts.count, EXCLUDED.count),
+                    updated_at = NOW()
+            """, (name, get_today_date().date(), limit))
+        self.conn.commit()
+
+
+def make_lease_holder() -> str:
+    """Build a lease holder ID that is unique to this process.
+
+    On GitHub Actions the run ID, attempt and job are included so a lease
+    can be traced back to the run that took it.
+    """
+    run_id = os.environ.get('GITHUB_RUN_ID')
+    if run_id:
+        prefix = (f"gh-{run_id}.{os.environ.get('GITHUB_RUN_ATTEMPT', '1')}"
+                  f"-{os.environ.get('GITHUB_JOB', 'job')}")
+    else:
+        prefix = socket.gethostname()
+    return f"{prefix}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class LeaseLost(Exception):
+    """Raised when another runner has taken over a row this runner was working on."""
+
+
+@profiled('db')
+def claim_next_item(
+    conn,
+    holder: str,
+    after: Optional[Tuple[datetime, str]] = None,
+    local_root: Optional[Path] = None
+) -> Optional[Dict]:
+    """Claim the oldest claimable upload queue item under a lease.
+
+    Claimable means PENDING or FAILED with attempts left, and not leased
+    (or leased with the lease expired). The status filter matches the
+    upload_queue_claimable_idx predicate, so the scan never touches
+    finished rows, and SKIP LOCKED lets concurrent runners claim different
+    rows without waiting on each other.
+
+    Args:
+        conn: Database connection
+        holder: This runner's lease holder ID
+        after: (created_at, id) of the last row claimed in this run
+        local_root: Claim only files ingested from this directory (default:
+            only rows uploaded through the web app)
+
+    Returns:
+        The claimed row, with previous_holder set when an expired lease was
+        taken over, or None when nothing is claimable
+    """
+    keyset = "AND (created_at, id) > (%s, %s)" if after else ""
+    if local_root:
+        source, source_prefix = "starts_with(blob_url, %s)", local_url_prefix(local_root)
+    else:
+        source, source_prefix = "NOT starts_with(blob_url, %s)", LOCAL_FILE_PREFIX
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute("""
-            SELECT
+        cur.execute(f"""
+            WITH candidate AS (
+                SELECT id, lease_holder AS previous_holder
+                FROM upload_queue
+                WHERE status IN ('PENDING', 'FAILED')
+                    AND CASE WHEN status = 'FAILED' THEN GREATEST(attempts, 1) ELSE attempts END < %s
+                    AND (lease_expires_at IS NULL OR lease_expires_at < NOW())
+                    AND {source}
+                    {keyset}
+                ORDER BY created_at, id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE upload_queue uq SET
+                lease_holder = %s,
+                lease_expires_at = NOW() + make_interval(secs => %s),
+                attempts = uq.attempts + CASE WHEN c.previous_holder IS NULL THEN 0 ELSE 1 END
+            FROM candidate c, users u
+            WHERE uq.id = c.id AND u.id = uq.uploader_id
+            RETURNING
                 uq.id,
                 uq.file_name,
                 uq.blob_url,
@@ -138,17 +369,202 @@ def get_pending_items(conn, limit: int) -> List[Dict]:
                 uq.act_ids,
                 uq.performer_ids,
                 uq.uploader_id,
+                uq.attempts,
+                uq.created_at,
+                c.previous_holder,
                 u.first_name,
                 u.last_name
-            FROM upload_queue uq
-            JOIN users u ON u.id = uq.uploader_id
-            WHERE uq.status = 'PENDING'
-            ORDER BY uq.created_at ASC
-            LIMIT %s
-        """, (limit,))
-        return cur.fetchall()
+        """, (QUEUE_MAX_ATTEMPTS, source_prefix, *(after or ()), holder, LEASE_SECONDS))
+        item = cur.fetchone()
+    conn.commit()
+    return item
+
+
+def iter_claimed_items(
+    conn,
+    holder: str,
+    pool: ChannelPool,
+    act_name_map: Dict[str, str],
+    local_root: Optional[Path] = None
+) -> Iterator[Dict]:
+    """Claim and yield items one at a time while any channel has budget left.
+
+    Each row is claimed only when the previous one is done, so parallel
+    runners share the backlog evenly. The upload slot itself is reserved
+    when the upload starts, so runners sharing a channel never take it past
+    its limit. Act names for each item are added to act_name_map before it
+    is yielded. Items handled earlier in the run are behind the keyset
+    cursor, so a row that fails is not retried again in the same run.
+    """
+    after = None
+    while pool.has_capacity():
+        item = claim_next_item(conn, holder, after, local_root)
+        if item is None:
+            return
+
+        if item['previous_holder']:
+            print(f"\n[RECLAIM] Lease held by {item['previous_holder']} expired, "
+                  f"taking over {item['id']} (attempt {item['attempts']})")
+
+        missing = set(item['act_ids']) - act_name_map.keys()
+        act_name_map.update(get_act_names(conn, list(missing)))
+
+        yield item
+        after = (item['created_at'], item['id'])
+
+
+@profiled('db')
+def fail_abandoned_items(conn) -> int:
+    """Mark PENDING rows that used up their attempts on lapsed leases as FAILED.
+
+    Such a row keeps taking its runner down with it (a file that exhausts
+    memory, say). It is no longer claimable, so this gives it a final
+    status and a reason the uploader can see.
+
+    Returns:
+        Number of rows marked FAILED
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE upload_queue SET
+                status = 'FAILED',
+                error_message = 'Processing error: the runner stopped responding on every attempt',
+                lease_holder = NULL,
+                lease_expires_at = NULL,
+                updated_at = NOW()
+            WHERE status = 'PENDING'
+                AND attempts >= %s
+                AND (lease_expires_at IS NULL OR lease_expires_at < NOW())
+        """, (QUEUE_MAX_ATTEMPTS,))
+        failed = cur.rowcount
+    conn.commit()
+    return failed
+
+
+@profiled('db')
+def extend_leases(conn, holder: str) -> int:
+    """Push back the expiry of every lease this runner holds.
+
+    Returns:
+        Number of leases extended
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE upload_queue
+            SET lease_expires_at = NOW() + make_interval(secs => %s)
+            WHERE lease_holder = %s
+        """, (LEASE_SECONDS, holder))
+        extended = cur.rowcount
+    conn.commit()
+    return extended
+
+
+@profiled('db')
+def holds_lease(conn, queue_id: str, holder: str) -> bool:
+    """Check that this runner still holds the lease on a row."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT 1 FROM upload_queue WHERE id = %s AND lease_holder = %s",
+            (queue_id, holder)
+        )
+        held = cur.fetchone() is not None
+    conn.commit()
+    return held
+
+
+@profiled('db')
+def release_leases(conn, holder: str) -> None:
+    """Drop any leases this runner still holds so other runners can claim the rows."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE upload_queue
+            SET lease_holder = NULL, lease_expires_at = NULL
+            WHERE lease_holder = %s
+        """, (holder,))
+    conn.commit()
+
+
+class LeaseHeartbeat:
+    """Background thread extending this runner's leases while it works.
+
+    The heartbeat has its own database connection, so it never runs a
+    statement inside the main connection's transactions. If the database
+    can't be reached it retries on the next beat; the lease only lapses if
+    that goes on for longer than LEASE_SECONDS.
+
+    Each beat also checks the lease on the watched row. If another runner
+    has taken it over, lost is set so the upload can be cancelled.
+    """
+
+    def __init__(self, holder: str, interval: int = LEASE_HEARTBEAT_SECONDS):
+        self.holder = holder
+        self.interval = interval
+        self.lost = threading.Event()
+        self._queue_id: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='lease-heartbeat', daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def watch(self, queue_id: str) -> None:
+        """Watch the lease on the row now being worked on, clearing lost."""
+        with self._lock:
+            self._queue_id = queue_id
+            self.lost.clear()
+
+    def _check(self, conn) -> None:
+        queue_id = self._queue_id
+        extended = extend_leases(conn, self.holder)
+        if queue_id is None or (extended and holds_lease(conn, queue_id, self.holder)):
+            return
+        with self._lock:
+            # The row may have been finished and the next one watched meanwhile
+            if self._queue_id == queue_id:
+                self.lost.set()
+
+    def _run(self) -> None:
+        conn = None
+        while not self._stop.wait(self.interval):
+            try:
+                if conn is None:
+                    conn = get_db_connection()
+                self._check(conn)
+            except psycopg2.Error as e:
+                print(f"\n[WARN] Lease heartbeat failed: {e}")
+                if conn is not None:
+                    conn.close()
+                    conn = None
+        if conn is not None:
+            conn.close()
+
+
+def delete_reclaimed_upload(channel: Dict[str, Any], video_id: str) -> None:
+    """Delete a video uploaded for a row another runner has since claimed.
+
+    The other runner uploads the row again, so this copy would be a
+    duplicate. Deleting needs youtube.force-ssl, which the upload
+    credentials don't ask for; without that grant the video is left to be
+    deleted by hand.
+    """
+    url = youtube_url(video_id)
+    try:
+        youtube = get_authenticated_service(channel, MANAGE_SCOPES)
+        youtube.videos().delete(id=video_id).execute(num_retries=MAX_RETRIES)
+    except (RefreshError, HttpError) as e:
+        print(f"[ERROR] Uploaded as {url}, but the lease was reclaimed by another runner and "
+              f"the duplicate could not be deleted ({e}); delete it by hand")
+        return
+    print(f"[WARN] Uploaded as {url}, but the lease was reclaimed by another runner; "
+          "deleted the duplicate")
 
 
+@profiled('db')
 def get_act_names(conn, act_ids: List[str]) -> Dict[str, str]:
     """Get act names by IDs."""
     if not act_ids:
@@ -162,6 +578,7 @@ def get_act_names(conn, act_ids: List[str]) -> Dict[str, str]:
         return {row['id']: row['name'] for row in cur.fetchall()}
 
 
+@profiled('download')
 def download_from_blob(blob_url: str, file_name: str) -> str:
     """Download a video from Vercel Blob to a temp file."""
     print(f"Downloading from: {blob_url}")
@@ -221,185 +638,208 @@ def delete_blob(blob_url: str) -> bool:
         return False
 
 
-def generate_description(
-    act: str,
-    year: Optional[int],
-    show: Optional[str] = None,
-    performers: Optional[List[str]] = None,
-    notes: Optional[str] = None
-) -> str:
-    """Generate a standardized video description with embedded metadata."""
-    lines = ["FSU Flying High Circus"]
-
-    if act and year:
-        lines[0] = f"FSU Flying High Circus - {act} {year}"
-    elif act:
-        lines[0] = f"FSU Flying High Circus - {act}"
-
-    lines.append("")
-
-    if show:
-        lines.append(f"Show: {show}")
-    if performers:
-        lines.append(f"Performers: {', '.join(performers)}")
-    if notes:
-        lines.append("")
-        lines.append(notes)
-
-    # Add machine-readable metadata block
-    lines.append("")
-    lines.append("---")
-    lines.append("[CIRCUS_ARCHIVE_META]")
-
-    meta = {}
-    if act:
-        meta['act'] = act
-    if year:
-        meta['year'] = year
-    if show:
-        meta['show'] = show
-    if performers:
-        meta['performers'] = performers
-
-    for key, value in meta.items():
-        if isinstance(value, list):
-            lines.append(f"{key}={','.join(str(v) for v in value)}")
-        else:
-            lines.append(f"{key}={value}")
-
-    lines.append("[/CIRCUS_ARCHIVE_META]")
-
-    return "\n".join(lines)
-
-
-def build_tags(act: str, year: Optional[int], show: Optional[str] = None) -> List[str]:
-    """Build standard tags for a circus video."""
-    tags = [
-        "FSU",
-        "Florida State University",
-        "Flying High Circus",
-        "circus",
-        "college circus",
-    ]
-
-    if act:
-        tags.append(act.lower())
-        if act == "Quartet Adagio":
-            tags.extend(["quartet", "adagio", "partner acrobatics"])
-        elif act == "Russian Bar":
-            tags.extend(["russian bar", "acrobatics"])
-        elif act == "Teeterboard":
-            tags.extend(["teeter board", "teeterboard", "acrobatics"])
-        elif act == "Juggling":
-            tags.extend(["juggling", "juggler"])
-        elif "Trapeze" in act:
-            tags.extend(["trapeze", "aerial", "flying trapeze"])
-
-    if year:
-        tags.append(str(year))
-
-    if show:
-        if "Callaway" in show:
-            tags.extend(["Callaway Gardens", "summer show"])
-        elif "Home" in show:
-            tags.append("home show")
-
-    return tags
-
-
-def upload_video(
-    youtube,
-    file_path: str,
-    title: str,
-    description: str = '',
-    category_id: str = '22',
-    privacy: str = 'unlisted',
-    tags: Optional[List[str]] = None
-) -> Optional[str]:
-    """Upload a video to YouTube."""
-    if not os.path.exists(file_path):
-        print(f"Error: File not found: {file_path}")
-        return None
+def local_url_prefix(directory: Path) -> str:
+    """file:// URL prefix shared by every file under a directory."""
+    return directory.resolve().as_uri().rstrip('/') + '/'
 
-    body = {
-        'snippet': {
-            'title': title,
-            'description': description,
-            'tags': tags or [],
-            'categoryId': category_id
-        },
-        'status': {
-            'privacyStatus': privacy,
-            'selfDeclaredMadeForKids': False
-        }
-    }
-
-    media = MediaFileUpload(
-        file_path,
-        chunksize=1024*1024,
-        resumable=True
-    )
 
-    request = youtube.videos().insert(
-        part=','.join(body.keys()),
-        body=body,
-        media_body=media
-    )
+def local_file_path(blob_url: str) -> str:
+    """Path of a locally ingested file from its file:// blob URL."""
+    return url2pathname(urlparse(blob_url).path)
 
-    print(f"\nUploading: {os.path.basename(file_path)}")
-    print(f"Title: {title}")
-    print(f"Privacy: {privacy}")
-    print("-" * 40)
 
-    response = None
-    retry = 0
+def read_ingest_metadata(path: Path) -> List[Dict[str, Any]]:
+    """Read ingest rows from a CSV, JSON Lines or JSON file.
 
-    while response is None:
-        try:
-            status, response = request.next_chunk()
-            if status:
-                progress = int(status.progress() * 100)
-                print(f"\rProgress: {progress}%", end='', flush=True)
-
-        except HttpError as e:
-            if e.resp.status in RETRIABLE_STATUS_CODES:
-                retry = handle_retry(retry, e)
-                if retry is None:
-                    return None
-            else:
-                print(f"\nHTTP error {e.resp.status}: {e.content}")
-                return None
+    Each row has 'file' (relative to the ingest directory) and 'year', and
+    optionally 'show', 'acts' and 'performers' (lists, or ";"-separated
+    names in CSV), 'title' and 'description'.
+    """
+    with open(path, newline='') as f:
+        if path.suffix.lower() == '.csv':
+            return list(csv.DictReader(f))
+        if path.suffix.lower() == '.json':
+            data = json.load(f)
+            return data.get('videos', []) if isinstance(data, dict) else data
+        return [json.loads(line) for line in f if line.strip()]
 
-        except RETRIABLE_EXCEPTIONS as e:
-            retry = handle_retry(retry, e)
-            if retry is None:
-                return None
 
-    print("\n")
+def _names(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [name.strip() for name in value.split(';') if name.strip()]
+    return list(value or [])
 
-    if response:
-        video_id = response.get('id')
-        print(f"Upload successful!")
-        print(f"Video ID: {video_id}")
-        print(f"URL: https://www.youtube.com/watch?v={video_id}")
-        return video_id
 
-    return None
+@profiled('db')
+def find_uploader(conn, uploader: str) -> Optional[str]:
+    """Resolve a user ID, email or "First Last" name to a user ID."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT id FROM users
+            WHERE id = %s
+                OR lower(email) = lower(%s)
+                OR lower(first_name || ' ' || last_name) = lower(%s)
+        """, (uploader, uploader, uploader))
+        rows = cur.fetchall()
+    return rows[0][0] if len(rows) == 1 else None
+
+
+@profiled('db')
+def queue_local_files(conn, directory: Path, metadata_path: Path, uploader_id: str) -> Dict[str, List]:
+    """Create upload_queue rows for local files, in one batch.
+
+    Files already queued (from an earlier ingest of the same directory) are
+    skipped, so an interrupted ingest can simply be rerun.
+
+    Args:
+        conn: Database connection
+        directory: Directory holding the files
+        metadata_path: CSV/JSONL/JSON rows describing the files
+        uploader_id: User credited with the uploads
+
+    Returns:
+        Dict with 'queued' and 'skipped' rows
+    """
+    act_ids = fetch_act_ids(conn)
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, lower(first_name || ' ' || last_name) FROM users")
+        user_ids = {name: user_id for user_id, name in cur.fetchall()}
+
+    prefix = local_url_prefix(directory)
+    results = {'queued': [], 'skipped': []}
+    rows = []
+    for entry in read_ingest_metadata(metadata_path):
+        # Normalised but not symlink-resolved, so it stays under the prefix
+        file_path = Path(os.path.abspath(directory.resolve() / str(entry.get('file') or '')))
+        year = str(entry.get('year') or '')
+        acts = _names(entry.get('acts'))
+        unknown_acts = [act for act in acts if act.lower() not in act_ids]
+
+        problem = None
+        if not entry.get('file') or not file_path.is_file():
+            problem = 'file not found'
+        elif not file_path.as_uri().startswith(prefix):
+            problem = 'outside the ingest directory'
+        elif not year.isdigit():
+            problem = 'no year'
+        elif unknown_acts:
+            problem = f"unknown acts: {', '.join(unknown_acts)}"
+        if problem:
+            print(f"[SKIP] {entry.get('file')}: {problem}")
+            results['skipped'].append({'file': entry.get('file'), 'reason': problem})
+            continue
+
+        performer_ids = []
+        for name in _names(entry.get('performers')):
+            if name.lower() in user_ids:
+                performer_ids.append(user_ids[name.lower()])
+            else:
+                print(f"[WARN] {entry['file']}: no user named {name!r}, not tagged")
+
+        show = show_type(entry.get('show')) or 'HOME'
+        show_name = 'Callaway Gardens' if show == 'CALLAWAY' else 'Home Show'
+        rows.append({
+            'id': str(uuid.uuid4()),
+            'file_name': file_path.name,
+            'file_size': min(file_path.stat().st_size, MAX_QUEUE_FILE_SIZE),
+            'blob_url': file_path.as_uri(),
+            'title': entry.get('title') or build_title(acts, int(year), show_name),
+            'year': int(year),
+            'description': entry.get('description') or None,
+            'show_type': show,
+            'act_ids': [act_ids[act.lower()] for act in acts],
+            'performer_ids': performer_ids,
+            'uploader_id': uploader_id,
+        })
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT blob_url FROM upload_queue WHERE blob_url = ANY(%s)",
+                    ([row['blob_url'] for row in rows],))
+        queued = {url for (url,) in cur.fetchall()}
+    for row in rows:
+        if row['blob_url'] in queued:
+            results['skipped'].append({'file': row['file_name'], 'reason': 'already queued'})
+        else:
+            results['queued'].append(row)
 
+    with conn.cursor() as cur:
+        execute_batch(cur, """
+            INSERT INTO upload_queue (
+                id, file_name, file_size, blob_url, title, year, description,
+                show_type, act_ids, performer_ids, uploader_id, status,
+                created_at, updated_at
+            ) VALUES (
+                %(id)s, %(file_name)s, %(file_size)s, %(blob_url)s, %(title)s, %(year)s,
+                %(description)s, %(show_type)s, %(act_ids)s, %(performer_ids)s,
+                %(uploader_id)s, 'PENDING', NOW(), NOW()
+            )
+        """, results['queued'], page_size=500)
+    conn.commit()
+    return results
 
-def handle_retry(retry: int, error) -> Optional[int]:
-    """Handle retry logic for failed uploads."""
-    if retry >= MAX_RETRIES:
-        print(f"\nMax retries exceeded. Last error: {error}")
+
+def upload_blob(path: Path, pathname: str, content_type: str) -> Optional[str]:
+    """Upload a file to Vercel Blob at a fixed pathname and return its public URL."""
+    blob_token = os.environ.get('BLOB_READ_WRITE_TOKEN')
+    if not blob_token:
+        print("Warning: BLOB_READ_WRITE_TOKEN not set, skipping blob upload")
         return None
 
-    retry += 1
-    sleep_seconds = random.random() * (2 ** retry)
-    print(f"\nRetry {retry}/{MAX_RETRIES} in {sleep_seconds:.1f}s... ({error})")
-    time.sleep(sleep_seconds)
-    return retry
+    req = Request(f'https://blob.vercel-storage.com/{pathname}', path.read_bytes(), method='PUT')
+    req.add_header('Authorization', f'Bearer {blob_token}')
+    req.add_header('x-api-version', '7')
+    req.add_header('x-content-type', content_type)
+    req.add_header('x-add-random-suffix', '0')
+    req.add_header('x-allow-overwrite', '1')
+    response = urlopen(req, timeout=60)
+    return json.loads(response.read())['url']
+
+
+@profiled('previews')
+def publish_previews(conn, video_id: str, video_path: Path) -> bool:
+    """Generate a video's poster and preview sprite, store them in Blob and record them.
 
+    Failures are reported but never fail the upload; the video keeps using
+    YouTube's thumbnail.
 
+    Returns:
+        True if the videos row now has a poster_url and preview_sprite
+    """
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            record = generate_previews(video_path, Path(work_dir), 'preview')
+            if record is None:
+                print("[WARN] Preview generation failed")
+                return False
+
+            urls = {}
+            for kind in ('poster', 'sprite'):
+                extension = Path(record[kind]).suffix
+                urls[kind] = upload_blob(
+                    Path(work_dir) / record[kind],
+                    f"{PREVIEW_BLOB_PREFIX}/{video_id}/{kind}{extension}",
+                    record['content_type']
+                )
+                if not urls[kind]:
+                    return False
+    except (OSError, URLError, ValueError, KeyError) as e:
+        print(f"[WARN] Could not publish previews: {e}")
+        return False
+
+    sprite = {key: record[key] for key in ('columns', 'rows', 'tile_width', 'tile_height', 'interval')}
+    sprite['url'] = urls['sprite']
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE videos
+            SET poster_url = %s, preview_sprite = %s, updated_at = NOW()
+            WHERE id = %s
+        """, (urls['poster'], json.dumps(sprite), video_id))
+    conn.commit()
+    print(f"[OK] Previews published: {urls['poster']}")
+    return True
+
+
+@profiled('db')
 def create_video_entry(
     conn,
     queue_item: Dict,
@@ -446,14 +886,21 @@ def create_video_entry(
     return video_id
 
 
+@profiled('db')
 def update_queue_status(
     conn,
     queue_id: str,
+    holder: str,
     status: str,
     youtube_url: Optional[str] = None,
     error_message: Optional[str] = None
 ) -> None:
-    """Update queue item status."""
+    """Update queue item status and release its lease.
+
+    Raises:
+        LeaseLost: This runner no longer holds the row's lease (nothing
+            was written)
+    """
     with conn.cursor() as cur:
         if status == 'UPLOADED':
             cur.execute("""
@@ -461,86 +908,358 @@ def update_queue_status(
                     status = %s,
                     youtube_url = %s,
                     processed_at = NOW(),
+                    lease_holder = NULL,
+                    lease_expires_at = NULL,
                     updated_at = NOW()
-                WHERE id = %s
-            """, (status, youtube_url, queue_id))
+                WHERE id = %s AND lease_holder = %s
+            """, (status, youtube_url, queue_id, holder))
         else:
             cur.execute("""
                 UPDATE upload_queue SET
                     status = %s,
                     error_message = %s,
+                    attempts = attempts + 1,
+                    lease_holder = NULL,
+                    lease_expires_at = NULL,
                     updated_at = NOW()
-                WHERE id = %s
-            """, (status, error_message, queue_id))
+                WHERE id = %s AND lease_holder = %s
+            """, (status, error_message, queue_id, holder))
+        updated = cur.rowcount
     conn.commit()
+    if not updated:
+        raise LeaseLost(queue_id)
+
+
+@profiled('db')
+def archive_finished_items(conn, older_than_days: int = ARCHIVE_AFTER_DAYS) -> int:
+    """Move old UPLOADED and finally-FAILED rows into upload_queue_archive.
+
+    Rows are moved in batches, each in its own transaction. The archive
+    keeps the key columns plus the full original row as JSON.
+
+    Returns:
+        Number of rows archived
+    """
+    total = 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute("""
+                WITH moved AS (
+                    DELETE FROM upload_queue
+                    WHERE id IN (
+                        SELECT id FROM upload_queue
+                        WHERE (status = 'UPLOADED'
+                               OR (status = 'FAILED' AND GREATEST(attempts, 1) >= %s))
+                            AND updated_at < NOW() - make_interval(days => %s)
+                        ORDER BY updated_at
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING *
+                )
+                INSERT INTO upload_queue_archive (
+                    id, status, youtube_url, uploader_id, created_at, processed_at, data
+                )
+                SELECT id, status, youtube_url, uploader_id, created_at, processed_at, to_jsonb(moved)
+                FROM moved
+            """, (QUEUE_MAX_ATTEMPTS, older_than_days, ARCHIVE_BATCH_SIZE))
+            moved = cur.rowcount
+        conn.commit()
+
+        total += moved
+        if moved < ARCHIVE_BATCH_SIZE:
+            return total
+
+
+@profiled('db')
+def get_videos_to_poll(conn, days: int = STATUS_POLL_DAYS) -> List[Dict]:
+    """Get recently uploaded videos whose YouTube processing hasn't finished."""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT id, youtube_id, youtube_url, title
+            FROM videos
+            WHERE (processing_status IS NULL OR processing_status = 'processing')
+                AND created_at > NOW() - make_interval(days => %s)
+            ORDER BY created_at
+        """, (days,))
+        return cur.fetchall()
+
+
+def summarize_processing(video: Optional[Dict]) -> Tuple[str, Optional[str]]:
+    """Reduce a videos.list resource to (processing_status, failure reason).
+
+    processing_status is one of processing, processed, failed, rejected,
+    deleted or missing (not returned by YouTube at all).
+    """
+    if video is None:
+        return 'missing', 'Video not found on YouTube'
+
+    status = video.get('status', {})
+    upload_status = status.get('uploadStatus')
+    if upload_status in ('failed', 'rejected', 'deleted'):
+        return upload_status, status.get('failureReason') or status.get('rejectionReason')
+
+    processing = video.get('processingDetails', {})
+    if processing.get('processingStatus') in ('failed', 'terminated'):
+        return 'failed', processing.get('processingFailureReason')
+
+    if upload_status == 'processed' or processing.get('processingStatus') == 'succeeded':
+        return 'processed', None
+    return 'processing', None
+
+
+def best_thumbnail(video: Optional[Dict]) -> Optional[str]:
+    thumbnails = (video or {}).get('snippet', {}).get('thumbnails', {})
+    for size in THUMBNAIL_PREFERENCE:
+        if size in thumbnails:
+            return thumbnails[size]['url']
+    return None
+
+
+@profiled('db')
+def record_processing_status(conn, updates: List[Tuple]) -> None:
+    """Store (status, duration, thumbnail, video id) rows on videos."""
+    with conn.cursor() as cur:
+        execute_batch(cur, """
+            UPDATE videos SET
+                processing_status = %s,
+                duration_seconds = COALESCE(%s, duration_seconds),
+                thumbnail_url = COALESCE(%s, thumbnail_url),
+                status_checked_at = NOW(),
+                updated_at = NOW()
+            WHERE id = %s
+        """, updates)
+    conn.commit()
+
+
+@profiled('db')
+def flag_failed_uploads(conn, failures: List[Tuple[str, str]]) -> None:
+    """Mark the queue rows of videos YouTube failed or rejected as FAILED.
+
+    The blob was deleted after the upload, so these need the uploader to
+    submit the file again; attempts is maxed out to stop automatic retries.
+
+    Args:
+        conn: Database connection
+        failures: (youtube_url, error message) pairs
+    """
+    with conn.cursor() as cur:
+        execute_batch(cur, """
+            UPDATE upload_queue SET
+                status = 'FAILED',
+                error_message = %s,
+                attempts = GREATEST(attempts, %s),
+                updated_at = NOW()
+            WHERE youtube_url = %s AND status = 'UPLOADED'
+        """, [(message, QUEUE_MAX_ATTEMPTS, url) for url, message in failures])
+    conn.commit()
+
 
+def poll_processing_status(conn, pool: ChannelPool, days: int = STATUS_POLL_DAYS) -> Dict[str, int]:
+    """Check YouTube's processing result for recent uploads, 50 IDs per call.
 
-def process_queue() -> None:
-    """Main queue processing function."""
+    Only the owning channel sees processingDetails, so each channel in the
+    pool is asked about the videos the previous channels didn't own. The
+    public view (status, duration, thumbnails) is used for videos no
+    channel owns.
+
+    A channel whose token can't be used for reading (issued for uploads
+    only, before youtube.readonly was part of the sign-in) is skipped.
+    Its videos can't be told apart from missing ones then, so videos
+    without processing details are left for a later poll instead of being
+    recorded.
+
+    Returns:
+        Count of videos per processing status
+    """
+    rows = get_videos_to_poll(conn, days)
+    if not rows:
+        print("No uploads awaiting processing")
+        return {}
+
+    unowned = {row['youtube_id'] for row in rows}
+    found: Dict[str, Dict] = {}
+    calls = 0
+    skipped = []
+    for channel in pool.channels:
+        if not unowned:
+            break
+        try:
+            youtube = pool.service(channel)
+        except RefreshError as e:
+            print(f"[WARN] Channel {channel['name']} can't read video status, skipping it ({e}). "
+                  "Sign its token in again to grant youtube.readonly (see tools/youtube/README.md)")
+            skipped.append(channel['name'])
+            continue
+        calls += -(-len(unowned) // VIDEOS_LIST_BATCH)
+        videos = list_videos(youtube, unowned, STATUS_POLL_PARTS, STATUS_POLL_FIELDS)
+        for youtube_id, video in videos.items():
+            if 'processingDetails' in video or youtube_id not in found:
+                found[youtube_id] = video
+            if 'processingDetails' in video:
+                unowned.discard(youtube_id)
+
+    if len(skipped) == len(pool.channels):
+        print("[SKIP] No channel could read video status")
+        return {}
+
+    counts: Dict[str, int] = {}
+    updates = []
+    failures = []
+    for row in rows:
+        video = found.get(row['youtube_id'])
+        if skipped and 'processingDetails' not in (video or {}):
+            # May belong to a skipped channel
+            counts['unchecked'] = counts.get('unchecked', 0) + 1
+            continue
+        status, reason = summarize_processing(video)
+        counts[status] = counts.get(status, 0) + 1
+        duration = parse_duration((video or {}).get('contentDetails', {}).get('duration'))
+        updates.append((status, duration, best_thumbnail(video), row['id']))
+        if status not in ('processing', 'processed'):
+            print(f"[WARN] {row['title']}: YouTube {status} ({reason or 'no reason given'})")
+            failures.append((row['youtube_url'], f"YouTube processing {status}: {reason or 'unknown'}"))
+
+    record_processing_status(conn, updates)
+    if failures:
+        flag_failed_uploads(conn, failures)
+
+    summary = ', '.join(f"{status} {count}" for status, count in sorted(counts.items()))
+    print(f"Checked {len(rows)} uploads in {calls} videos.list calls: {summary}")
+    return counts
+
+
+def poll_status_job(days: int = STATUS_POLL_DAYS) -> None:
+    """Status stage: record processing results for recent uploads."""
+    print(f"\n{'=' * 60}")
+    print("YouTube Processing Status")
+    print(f"{'=' * 60}")
+
+    conn = get_db_connection()
+    try:
+        pool = ChannelPool(
+            load_channels(),
+            DatabaseUploadCounter(conn),
+            lambda channel: get_authenticated_service(channel, READ_SCOPES)
+        )
+        poll_processing_status(conn, pool, days)
+    finally:
+        conn.close()
+
+
+def archive_queue(older_than_days: int) -> None:
+    """Archival job: move finished rows out of the hot queue table."""
+    print("=" * 60)
+    print("Upload Queue Archival")
+    print("=" * 60)
+    print(f"Archiving finished rows older than {older_than_days} days")
+
+    conn = get_db_connection()
+    try:
+        archived = archive_finished_items(conn, older_than_days)
+        print(f"Archived: {archived}")
+    finally:
+        conn.close()
+
+
+def process_queue(local_root: Optional[Path] = None) -> None:
+    """Main queue processing function.
+
+    Args:
+        local_root: Process only files ingested from this directory,
+            uploading them from disk (default: only web uploads)
+    """
     print("=" * 60)
     print("GitHub Actions Upload Queue Processor")
     print("=" * 60)
     print(f"Started at: {datetime.now(timezone.utc).isoformat()}")
-    print(f"Daily upload limit: {DAILY_UPLOAD_LIMIT}")
+    print(f"Pre-upload optimisation: {'on' if OPTIMIZE_UPLOADS else 'off'}")
+
+    holder = make_lease_holder()
+    print(f"Lease holder: {holder}")
 
     conn = get_db_connection()
+    heartbeat = None
 
     try:
-        # Check daily limit
-        current_count = get_daily_upload_count(conn)
-        remaining_uploads = DAILY_UPLOAD_LIMIT - current_count
-
-        print(f"Uploads today: {current_count}/{DAILY_UPLOAD_LIMIT}")
-        print(f"Remaining slots: {remaining_uploads}")
+        # Check each channel's daily budget
+        pool = ChannelPool(load_channels(), DatabaseUploadCounter(conn), get_authenticated_service)
+        print(f"Uploads today (all channels): {get_daily_upload_count(conn)}")
+        for line in pool.describe():
+            print(f"  {line}")
+
+        if not pool.has_capacity():
+            print("\nDaily upload limit reached on every channel. Exiting.")
+            return
 
-        if remaining_uploads <= 0:
-            print("\nDaily upload limit reached. Exiting.")
+        # Authenticate before claiming anything, so refused credentials leave
+        # the queue untouched instead of failing rows
+        for name, error in pool.authenticate_all().items():
+            print(f"[ERROR] Channel {name} failed to authenticate: {error}")
+        if not pool.has_capacity():
+            print("\nNo channel with budget left could authenticate. Exiting.")
             return
 
-        # Get pending items
-        pending_items = get_pending_items(conn, remaining_uploads)
+        abandoned = fail_abandoned_items(conn)
+        if abandoned:
+            print(f"[WARN] {abandoned} items used up their attempts on lapsed leases, marked FAILED")
 
-        print(f"\nPending items in queue: {len(pending_items)}")
+        # Claim pending items one at a time, oldest first
+        act_name_map: Dict[str, str] = {}
+        pending_items = iter_claimed_items(conn, holder, pool, act_name_map, local_root)
+        first_item = next(pending_items, None)
 
-        if not pending_items:
-            print("No items to process. Exiting.")
+        if first_item is None:
+            print("\nNo items to process. Exiting.")
             return
 
-        # Get act names for all items
-        all_act_ids = []
-        for item in pending_items:
-            all_act_ids.extend(item['act_ids'])
-        act_name_map = get_act_names(conn, list(set(all_act_ids)))
+        heartbeat = LeaseHeartbeat(holder)
+        heartbeat.start()
 
-        # Authenticate with YouTube
-        youtube = get_authenticated_service()
-        print("YouTube authentication successful")
+        optimizer = optimizer_from_env() if OPTIMIZE_UPLOADS else None
 
         # Process each item
         success_count = 0
         fail_count = 0
 
-        for item in pending_items:
+        for item in itertools.chain([first_item], pending_items):
             print(f"\n{'-' * 60}")
             print(f"Processing: {item['title']}")
             print(f"Uploaded by: {item['first_name']} {item['last_name']}")
 
             temp_path = None
+            optimized_path = None
+            heartbeat.watch(item['id'])
 
             try:
-                # Download from Vercel Blob
-                temp_path = download_from_blob(item['blob_url'], item['file_name'])
+                local = item['blob_url'].startswith(LOCAL_FILE_PREFIX)
+                if local:
+                    # Ingested from this machine's disk: upload the file in place
+                    source_path = local_file_path(item['blob_url'])
+                    if not os.path.exists(source_path):
+                        raise FileNotFoundError(f"Local file missing: {source_path}")
+                else:
+                    # Download from Vercel Blob
+                    temp_path = download_from_blob(item['blob_url'], item['file_name'])
+                    source_path = temp_path
+                upload_path = source_path
+
+                # Faststart remux, plus transcode when it saves upload time
+                if optimizer:
+                    optimized = optimizer.optimize(Path(source_path), Path(tempfile.gettempdir()))
+                    upload_path = str(optimized['path'])
+                    if upload_path != source_path:
+                        optimized_path = upload_path
 
                 # Build title and metadata
                 act_names = [act_name_map.get(aid, 'Unknown') for aid in item['act_ids']]
-                act_part = ' & '.join(act_names) if act_names else 'Performance'
-                show_name = 'Callaway' if item['show_type'] == 'CALLAWAY' else 'Home Show'
-                full_title = f"{act_part} - FSU Flying High Circus {show_name} {item['year']}"
+                show_name = 'Callaway Gardens' if item['show_type'] == 'CALLAWAY' else 'Home Show'
+                full_title = build_title(act_names, item['year'], show_name)
 
                 description = generate_description(
                     act=act_names[0] if act_names else None,
                     year=item['year'],
-                    show='Callaway Gardens' if item['show_type'] == 'CALLAWAY' else 'Home Show',
+                    show=show_name,
                     notes=item['description']
                 )
                 tags = build_tags(
@@ -549,66 +1268,196 @@ def process_queue() -> None:
                     show_name
                 )
 
-                # Upload to YouTube
-                video_id = upload_video(
-                    youtube,
-                    temp_path,
-                    full_title,
-                    description=description,
-                    privacy='unlisted',
-                    tags=tags
-                )
+                # Another runner may have taken over if our lease lapsed
+                if not holds_lease(conn, item['id'], holder):
+                    raise LeaseLost(item['id'])
+
+                # Upload to YouTube through the channel with the most budget left
+                upload_started = time.monotonic()
+                try:
+                    video_id, channel = upload_with_pool(pool, lambda youtube: upload_video(
+                        youtube,
+                        upload_path,
+                        full_title,
+                        description=description,
+                        privacy='unlisted',
+                        tags=tags,
+                        cancel=heartbeat.lost
+                    ))
+                except UploadCancelled:
+                    raise LeaseLost(item['id'])
+                if video_id and optimizer:
+                    optimizer.record_upload(
+                        os.path.getsize(upload_path), time.monotonic() - upload_started
+                    )
 
                 if video_id:
-                    youtube_url = f"https://www.youtube.com/watch?v={video_id}"
-
-                    # Update queue status
-                    update_queue_status(conn, item['id'], 'UPLOADED', youtube_url)
+                    url = youtube_url(video_id)
+
+                    # Update queue status. The lease can go while the last chunk
+                    # is in flight; the row is then the other runner's to upload
+                    try:
+                        if heartbeat.lost.is_set():
+                            raise LeaseLost(item['id'])
+                        update_queue_status(conn, item['id'], holder, 'UPLOADED', url)
+                    except LeaseLost:
+                        delete_reclaimed_upload(channel, video_id)
+                        raise
 
                     # Create video entry
-                    create_video_entry(conn, item, youtube_url, video_id)
+                    db_video_id = create_video_entry(conn, item, url, video_id)
+
+                    # Self-hosted poster and hover preview, from the original file
+                    if GENERATE_PREVIEWS:
+                        publish_previews(conn, db_video_id, Path(source_path))
 
                     # Increment daily count
                     increment_daily_upload_count(conn)
 
                     # Delete blob from Vercel storage
-                    delete_blob(item['blob_url'])
+                    if not local:
+                        delete_blob(item['blob_url'])
 
                     success_count += 1
-                    print(f"SUCCESS: {youtube_url}")
+                    print(f"SUCCESS: {url} (channel {channel['name']})")
                 else:
-                    update_queue_status(conn, item['id'], 'FAILED', error_message='Upload failed - no video ID returned')
+                    update_queue_status(conn, item['id'], holder, 'FAILED',
+                                        error_message='Upload failed - no video ID returned')
                     fail_count += 1
                     print("FAILED: Upload returned no video ID")
 
+            except LeaseLost:
+                print("[WARN] Lease lapsed and the item was reclaimed by another runner; skipping")
+
+            except NoChannelCapacity as e:
+                # Leave the item pending for the next run; its lease is
+                # released below without counting an attempt
+                print(f"\n{e}. Stopping.")
+                break
+
             except Exception as e:
                 error_msg = str(e)
                 print(f"Error processing item: {error_msg}")
-                update_queue_status(conn, item['id'], 'FAILED', error_message=f"Processing error: {error_msg}")
-                fail_count += 1
+                try:
+                    update_queue_status(conn, item['id'], holder, 'FAILED',
+                                        error_message=f"Processing error: {error_msg}")
+                    fail_count += 1
+                except LeaseLost:
+                    print("[WARN] Lease lapsed and the item was reclaimed by another runner; skipping")
 
             finally:
-                # Clean up temp file
-                if temp_path and os.path.exists(temp_path):
-                    os.unlink(temp_path)
-                    print(f"Cleaned up temp file: {temp_path}")
+                # Clean up temp files
+                for path in (temp_path, optimized_path):
+                    if path and os.path.exists(path):
+                        os.unlink(path)
+                        print(f"Cleaned up temp file: {path}")
 
         # Summary
         print(f"\n{'=' * 60}")
         print("SUMMARY")
         print(f"{'=' * 60}")
-        print(f"Processed: {len(pending_items)}")
+        print(f"Processed: {success_count + fail_count}")
         print(f"Successful: {success_count}")
         print(f"Failed: {fail_count}")
+        print("Uploads today per channel:")
+        for line in pool.describe():
+            print(f"  {line}")
         print(f"Completed at: {datetime.now(timezone.utc).isoformat()}")
 
     finally:
+        if heartbeat:
+            heartbeat.stop()
+        try:
+            conn.rollback()
+            release_leases(conn, holder)
+        except psycopg2.Error as e:
+            print(f"[WARN] Could not release leases, they will expire: {e}")
         conn.close()
 
 
+def ingest_job(directory: Path, metadata_path: Optional[Path], uploader: Optional[str],
+               queue_only: bool = False) -> int:
+    """Queue local files in bulk, then upload every queued file from the directory."""
+    if not directory.is_dir():
+        print(f"Error: Not a directory: {directory}")
+        return 1
+
+    if metadata_path:
+        conn = get_db_connection()
+        try:
+            uploader_id = find_uploader(conn, uploader or '')
+            if not uploader_id:
+                print(f"Error: --uploader must match exactly one user (got {uploader!r})")
+                return 1
+            results = queue_local_files(conn, directory, metadata_path, uploader_id)
+        finally:
+            conn.close()
+        print(f"Queued: {len(results['queued'])}")
+        print(f"Skipped: {len(results['skipped'])}")
+
+    if not queue_only:
+        process_queue(local_root=directory)
+    return 0
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Process pending uploads from the upload queue',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Process web uploads (what the scheduled workflow runs)
+  python scripts/process-queue-gh.py
+
+  # Record YouTube's processing result for the last week's uploads
+  python scripts/process-queue-gh.py --poll-status
+
+  # Queue a drive of show recordings and upload them straight from disk
+  python scripts/process-queue-gh.py --ingest /media/shows --metadata shows.csv \\
+      --uploader "Jane Smith"
+
+  # Continue an ingest stopped by the daily upload limit
+  python scripts/process-queue-gh.py --ingest /media/shows
+
+Ingest metadata columns: file (relative to the directory), year, show, acts and
+performers (";"-separated names), title and description (both optional).
+        '''
+    )
+    parser.add_argument('--archive', action='store_true',
+                        help='Archive old UPLOADED/FAILED rows instead of processing the queue')
+    parser.add_argument('--archive-days', type=int, default=ARCHIVE_AFTER_DAYS,
+                        help=f'Archive rows finished more than this many days ago '
+                             f'(default: {ARCHIVE_AFTER_DAYS})')
+    parser.add_argument('--poll-status', action='store_true',
+                        help='Check processing status of recent uploads instead of processing '
+                             'the queue (the workflow runs this once, after all queue runners)')
+    parser.add_argument('--poll-days', type=int, default=STATUS_POLL_DAYS,
+                        help=f'Check uploads from the last N days (default: {STATUS_POLL_DAYS})')
+    parser.add_argument('--ingest', metavar='DIR',
+                        help='Upload files ingested from this local directory instead of web uploads')
+    parser.add_argument('--metadata', metavar='FILE',
+                        help='With --ingest: CSV/JSONL/JSON describing new files to queue first')
+    parser.add_argument('--uploader', help='With --metadata: user ID, email or "First Last" to credit')
+    parser.add_argument('--queue-only', action='store_true',
+                        help='With --metadata: only create the queue rows')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    profiling.start(args.profile)
+
     try:
-        process_queue()
+        if args.archive:
+            archive_queue(args.archive_days)
+        elif args.ingest:
+            sys.exit(ingest_job(
+                Path(args.ingest),
+                Path(args.metadata) if args.metadata else None,
+                args.uploader,
+                args.queue_only
+            ))
+        elif args.poll_status:
+            poll_status_job(args.poll_days)
+        else:
+            process_queue()
     except Exception as e:
         print(f"Fatal error: {e}")
         sys.exit(1)
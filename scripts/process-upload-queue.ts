@@ -325,9 +325,10 @@ async function processQueue(): Promise<void> {
     return;
   }
 
-  // Get pending items
+  // Get pending items (file:// rows are local ingests, uploaded by the
+  // Python processor's --ingest mode on the machine that holds the files)
   const pendingItems = await prisma.uploadQueue.findMany({
-    where: { status: UploadStatus.PENDING },
+    where: { status: UploadStatus.PENDING, NOT: { blobUrl: { startsWith: 'file://' } } },
     orderBy: { createdAt: 'asc' },
     take: remainingUploads,
     include: {
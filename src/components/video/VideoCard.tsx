@@ -10,7 +10,7 @@ export interface VideoCardProps {
 }
 
 export function VideoCard({ video, showVotes = false, rank }: VideoCardProps) {
-  const thumbnailUrl = getThumbnailUrl(video.youtubeId, 'medium');
+  const thumbnailUrl = video.posterUrl || getThumbnailUrl(video.youtubeId, 'medium');
   const performers = video.performers || [];
   const performerText = performers
     .slice(0, 2)
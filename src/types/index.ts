@@ -48,6 +48,8 @@ export interface Video {
   showType: ShowType;
   // V6: Flag for videos needing performer tags (set by discovery tool)
   needsPerformers?: boolean;
+  // Self-hosted poster frame (falls back to the YouTube thumbnail)
+  posterUrl?: string | null;
   // V5: Multiple acts via join table
   acts?: VideoAct[];
   // Legacy single act (for backward compat during transition)
@@ -0,0 +1 @@
+"""Circus Archives YouTube tools: download, merge, optimise and upload."""
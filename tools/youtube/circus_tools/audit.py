@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""Audit channel uploads against the archive database.
+
+Every upload's [CIRCUS_ARCHIVE_META] block is read back from the channel's
+uploads playlist (one playlistItems.list call per 50 videos) and compared in
+one pass with videos, video_acts and video_performers:
+
+    orphan     on the channel with a meta block, but no videos row
+    missing    uploaded through the queue, but on none of the audited channels
+    drift      meta block and database disagree on act, year, show or performers
+
+--fix creates videos rows for orphans, marks missing videos, and fills in
+acts the database lacks. Other drift is only reported: the database is the
+source of truth, and the metadata updater pushes it to YouTube.
+
+The uploads playlist is newest-first and its page tokens are offsets, so a
+single new upload changes every page and page ETags never match. Uploads are
+cached per video ID instead: a repeat audit reads pages only until one ends
+on a video it already has, and re-reads the cached uploads it would report.
+--full reads every page again.
+"""
+
+import argparse
+import json
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+from circus_tools import profiling
+from circus_tools.db import fetch_act_ids, fetch_archive_videos, get_db_connection, show_type
+from circus_tools.metadata import parse_archive_meta, youtube_url
+from circus_tools.profiling import add_profile_argument, profiled
+from circus_tools.upload import load_channel_pool
+from circus_tools.youtube_api import MAX_RETRIES, PAGE_SIZE, READ_SCOPES, list_videos, uploads_playlist_id
+
+
+def _upload_entry(snippet: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'title': snippet.get('title'),
+        'description': snippet.get('description', ''),
+        'meta': parse_archive_meta(snippet.get('description')),
+    }
+
+
+@profiled('list')
+def read_channel(
+    youtube,
+    cached: Dict[str, Dict[str, Any]]
+) -> Tuple[Dict[str, Dict[str, Any]], Set[str]]:
+    """Read every upload on a channel with its parsed meta block.
+
+    Pages are read newest-first until one ends on a video in cached; the
+    older uploads are taken from cached. When the total doesn't match the
+    channel's upload count (a video was deleted) every page is read.
+
+    Args:
+        youtube: Authenticated YouTube API service
+        cached: youtube_id -> upload from the last audit ({} reads every page)
+
+    Returns:
+        (youtube_id -> {'title', 'description', 'meta'}, IDs read from the playlist)
+    """
+    playlist_id = uploads_playlist_id(youtube)
+    fetched = {}
+    total = None
+    page_token = None
+    while True:
+        response = youtube.playlistItems().list(
+            part='snippet,contentDetails', playlistId=playlist_id, maxResults=PAGE_SIZE,
+            pageToken=page_token
+        ).execute(num_retries=MAX_RETRIES)
+        items = response.get('items', [])
+        for item in items:
+            fetched[item['contentDetails']['videoId']] = _upload_entry(item['snippet'])
+        total = response.get('pageInfo', {}).get('totalResults')
+
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return fetched, set(fetched)
+        if items and items[-1]['contentDetails']['videoId'] in cached:
+            break
+
+    videos = dict(cached, **fetched)
+    if total is not None and len(videos) != total:
+        print(f"[INFO] {len(videos)} uploads cached, {total} on the channel: reading every page")
+        return read_channel(youtube, {})
+    return videos, set(fetched)
+
+
+def _flagged(video: Dict[str, Any], row: Dict[str, Any]) -> bool:
+    """Whether an upload would be reported as an orphan or as drift."""
+    return video['meta'] is not None and (row is None or bool(find_drift(video['meta'], row)))
+
+
+def find_drift(meta: Dict[str, Any], row: Dict[str, Any]) -> List[str]:
+    """List the fields where a meta block disagrees with its videos row."""
+    drift = []
+    acts = [name.lower() for name in row['acts']]
+    if meta.get('act') and meta['act'].lower() not in acts:
+        drift.append(f"act: channel {meta['act']!r}, database {row['acts']}")
+    if meta.get('year') and meta['year'] != row['year']:
+        drift.append(f"year: channel {meta['year']}, database {row['year']}")
+    if meta.get('show') and show_type(meta['show']) != row['show_type']:
+        drift.append(f"show: channel {meta['show']!r}, database {row['show_type']}")
+    if meta.get('performers') and set(meta['performers']) != set(row['performers']):
+        drift.append(f"performers: channel {meta['performers']}, database {row['performers']}")
+    return drift
+
+
+def fetch_queue_uploads(conn) -> set:
+    """youtube_urls of everything the upload queue has uploaded, archived rows included."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('upload_queue_archive') IS NOT NULL")
+        has_archive = cur.fetchone()[0]
+        archived = ("UNION SELECT youtube_url FROM upload_queue_archive WHERE status = 'UPLOADED'"
+                    if has_archive else "")
+        cur.execute(f"""
+            SELECT youtube_url FROM upload_queue WHERE status = 'UPLOADED'
+            {archived}
+        """)
+        return {url for (url,) in cur.fetchall() if url}
+
+
+def audit(pool, conn, cache_dir: Path, full: bool = False) -> Dict[str, Any]:
+    """Compare every audited channel's uploads with the database.
+
+    Cached uploads that would be reported are re-read with videos.list
+    first, so a description changed since the last audit (by the metadata
+    updater, say) isn't reported from its old copy.
+
+    Args:
+        pool: ChannelPool of the channels to audit
+        conn: Database connection
+        cache_dir: Where each channel's upload cache is kept
+        full: Ignore the caches and read every page
+
+    Returns:
+        Report dict with orphans, missing, drift, unmanaged and counts
+    """
+    rows = fetch_archive_videos(conn)
+    queue_uploads = fetch_queue_uploads(conn)
+
+    channel_videos: Dict[str, Dict[str, Any]] = {}
+    for channel in pool.channels:
+        cache_path = cache_dir / f"audit-uploads-{channel['name']}.json"
+        cached = json.loads(cache_path.read_text()) if cache_path.exists() and not full else {}
+        youtube = pool.service(channel)
+        videos, fetched = read_channel(youtube, cached)
+
+        stale = [youtube_id for youtube_id, video in videos.items()
+                 if youtube_id not in fetched and _flagged(video, rows.get(youtube_id))]
+        for youtube_id, video in list_videos(youtube, stale, 'snippet').items():
+            videos[youtube_id] = _upload_entry(video['snippet'])
+
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(videos))
+        print(f"[OK] {channel['name']}: {len(videos)} uploads "
+              f"({len(fetched)} read, {len(videos) - len(fetched)} cached, {len(stale)} re-checked)")
+        for youtube_id, video in videos.items():
+            channel_videos[youtube_id] = dict(video, channel=channel['name'])
+
+    report: Dict[str, Any] = {
+        'channel_videos': len(channel_videos),
+        'database_videos': len(rows),
+        'orphans': [],
+        'missing': [],
+        'drift': [],
+        'unmanaged': [],
+    }
+
+    for youtube_id, video in channel_videos.items():
+        meta = video['meta']
+        row = rows.get(youtube_id)
+        if meta is None:
+            report['unmanaged'].append({'youtube_id': youtube_id, 'title': video['title']})
+        elif row is None:
+            report['orphans'].append({
+                'youtube_id': youtube_id,
+                'title': video['title'],
+                'channel': video['channel'],
+                'meta': meta,
+            })
+        else:
+            drift = find_drift(meta, row)
+            if drift:
+                report['drift'].append({
+                    'youtube_id': youtube_id,
+                    'video_id': row['id'],
+                    'title': row['title'],
+                    'meta': meta,
+                    'fields': drift,
+                    'database_acts': row['acts'],
+                })
+
+    for youtube_id, row in rows.items():
+        if youtube_id not in channel_videos and row['youtube_url'] in queue_uploads:
+            report['missing'].append({'youtube_id': youtube_id, 'video_id': row['id'], 'title': row['title']})
+
+    return report
+
+
+@profiled('db')
+def fix(conn, report: Dict[str, Any]) -> Dict[str, int]:
+    """Apply the safe fixes: add orphans, mark missing videos, fill in missing acts.
+
+    Returns:
+        Count of rows changed per kind of fix
+    """
+    act_ids = fetch_act_ids(conn)
+    fixed = {'orphans': 0, 'missing': 0, 'acts': 0}
+
+    with conn.cursor() as cur:
+        for orphan in report['orphans']:
+            meta = orphan['meta']
+            if not meta.get('year'):
+                print(f"[SKIP] {orphan['title']}: meta block has no year")
+                continue
+            video_id = str(uuid.uuid4())
+            cur.execute("""
+                INSERT INTO videos (
+                    id, youtube_url, youtube_id, title, year, show_type,
+                    needs_performers, created_at, updated_at
+                ) VALUES (%s, %s, %s, %s, %s, %s, TRUE, NOW(), NOW())
+            """, (video_id, youtube_url(orphan['youtube_id']), orphan['youtube_id'],
+                  orphan['title'], meta['year'], show_type(meta.get('show')) or 'HOME'))
+            act_id = act_ids.get((meta.get('act') or '').lower())
+            if act_id:
+                cur.execute("""
+                    INSERT INTO video_acts (id, video_id, act_id, created_at)
+                    VALUES (%s, %s, %s, NOW())
+                """, (str(uuid.uuid4()), video_id, act_id))
+            print(f"[FIX] Added {orphan['title']} ({orphan['youtube_id']})")
+            fixed['orphans'] += 1
+
+        for missing in report['missing']:
+            cur.execute("""
+                UPDATE videos SET processing_status = 'missing', updated_at = NOW()
+                WHERE id = %s
+            """, (missing['video_id'],))
+            print(f"[FIX] Marked missing: {missing['title']}")
+            fixed['missing'] += 1
+
+        for drift in report['drift']:
+            act_id = act_ids.get((drift['meta'].get('act') or '').lower())
+            if drift['database_acts'] or not act_id:
+                continue
+            cur.execute("""
+                INSERT INTO video_acts (id, video_id, act_id, created_at)
+                VALUES (%s, %s, %s, NOW())
+            """, (str(uuid.uuid4()), drift['video_id'], act_id))
+            print(f"[FIX] Added act {drift['meta']['act']} to {drift['title']}")
+            fixed['acts'] += 1
+
+    conn.commit()
+    return fixed
+
+
+def print_report(report: Dict[str, Any], verbose: bool = False) -> None:
+    """Print audit findings and totals."""
+    for orphan in report['orphans']:
+        print(f"[ORPHAN] {orphan['title']} ({orphan['youtube_id']}, {orphan['channel']})")
+    for missing in report['missing']:
+        print(f"[MISSING] {missing['title']} ({missing['youtube_id']})")
+    for drift in report['drift']:
+        print(f"[DRIFT] {drift['title']} ({drift['youtube_id']})")
+        for field in drift['fields']:
+            print(f"    {field}")
+    if verbose:
+        for video in report['unmanaged']:
+            print(f"[INFO] No meta block: {video['title']} ({video['youtube_id']})")
+
+    print(f"\n{'='*60}")
+    print("AUDIT SUMMARY")
+    print(f"{'='*60}")
+    print(f"Channel uploads: {report['channel_videos']}")
+    print(f"Database videos: {report['database_videos']}")
+    print(f"Orphans: {len(report['orphans'])}")
+    print(f"Missing: {len(report['missing'])}")
+    print(f"Drift: {len(report['drift'])}")
+    print(f"Without meta block: {len(report['unmanaged'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Reconcile channel uploads with the archive database',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Report differences for every saved channel
+  python audit.py
+
+  # Save the findings and apply the safe fixes
+  python audit.py --report audit.json --fix
+
+  # Audit one channel
+  python audit.py --channel overflow
+
+  # Read every upload again instead of stopping at cached ones
+  python audit.py --full
+
+Needs DATABASE_PUBLIC_URL and a token with read access (see Credentials).
+        '''
+    )
+    parser.add_argument('--channel', action='append', metavar='NAME',
+                        help='Channel to audit (repeatable; default: every saved channel)')
+    parser.add_argument('--cache-dir', default='./output/cache',
+                        help='Directory for the upload caches (default: ./output/cache)')
+    parser.add_argument('--full', action='store_true',
+                        help='Read every page of the uploads playlist, ignoring the cache')
+    parser.add_argument('--report', help='Write the findings to this JSON file')
+    parser.add_argument('--fix', action='store_true',
+                        help='Add orphans, mark missing videos and fill in missing acts')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='Also list uploads without a meta block')
+    add_profile_argument(parser)
+
+    args = parser.parse_args()
+    profiling.start(args.profile)
+
+    try:
+        pool = load_channel_pool(args.channel, scopes=READ_SCOPES)
+        conn = get_db_connection()
+    except (RuntimeError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    try:
+        report = audit(pool, conn, Path(args.cache_dir), args.full)
+        print_report(report, args.verbose)
+
+        if args.report:
+            Path(args.report).write_text(json.dumps(report, indent=2, default=str))
+            print(f"\nReport written to {args.report}")
+
+        if args.fix:
+            fixed = fix(conn, report)
+            print(f"\nFixed: {fixed['orphans']} orphans added, {fixed['missing']} marked missing, "
+                  f"{fixed['acts']} acts filled in")
+    finally:
+        conn.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+"""Offline catalogue of the legacy channel, for planning migration batches.
+
+The channel's upload listing is flat-extracted once (a few paged requests,
+no per-video extraction) into a local SQLite catalogue: ID, title and
+duration for every video. A detail pass then fills in what the flat listing
+doesn't carry - upload date, description and the available formats - one
+extraction per video, only for videos that don't have them yet.
+
+Later refreshes are incremental: the listing is newest first, so paging
+stops once a run of already-catalogued videos is reached. --full re-lists
+everything and marks videos that have disappeared from the channel.
+
+Manifests are generated from the catalogue without touching the network:
+videos are filtered by title, upload date, duration and the inferred
+act/year/show, clips titled "Part 2", "pt 3", "(2 of 5)" ... are grouped
+into merge_sources entries, and videos already in other manifests are left
+out. For groups whose formats are catalogued, the stream profile the
+download step would pick is planned up front.
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from circus_tools import profiling
+from circus_tools.manifest import (
+    add_filter_arguments, describe_filters, filters_from_args, iter_manifest, matches
+)
+from circus_tools.metadata import build_title
+from circus_tools.profiling import add_profile_argument, stage
+
+DEFAULT_CATALOGUE = './output/catalogue.sqlite'
+
+# An incremental refresh stops paging after this many consecutive videos
+# that are already catalogued (about one page of the listing)
+KNOWN_STREAK = 30
+
+# Format fields kept by the detail pass: what download.plan_group_formats
+# needs, plus sizes for estimating a batch
+FORMAT_FIELDS = ['format_id', 'ext', 'vcodec', 'acodec', 'width', 'height', 'fps', 'tbr',
+                 'asr', 'audio_channels', 'filesize', 'filesize_approx']
+
+SCHEMA_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS videos (
+        video_id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        duration REAL,
+        upload_date TEXT,           -- YYYYMMDD, from the detail pass
+        description TEXT,
+        formats TEXT,               -- JSON list of FORMAT_FIELDS dicts, from the detail pass
+        listed_at TEXT NOT NULL,    -- first seen in the listing
+        seen_at TEXT NOT NULL,      -- last seen in the listing
+        detailed_at TEXT,
+        removed INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS videos_upload_date ON videos (upload_date)",
+    "CREATE INDEX IF NOT EXISTS videos_title ON videos (title COLLATE NOCASE)",
+    "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)",
+]
+
+# Title inference, the same patterns the discovery tool (tools/discovery/discover.ts) uses
+ACT_PATTERNS = [
+    (r'flying\s*trapeze', 'Flying Trapeze'),
+    (r'triple\s*trapeze', 'Triple Trapeze'),
+    (r'double\s*trapeze', 'Double Trapeze'),
+    (r'swinging\s*trapeze', 'Swinging Trapeze'),
+    (r'trapeze', 'Flying Trapeze'),
+    (r'juggl', 'Juggling'),
+    (r'russian\s*bar', 'Russian Bar'),
+    (r'teeter\s*board', 'Teeterboard'),
+    (r'quartet|adagio', 'Quartet Adagio'),
+    (r'skat(e|ing)', 'Skating'),
+    (r'bike\s*(for)?\s*five', 'Bike for Five'),
+    (r'clown', 'Clowning'),
+    (r'jump\s*rope', 'Jump Rope'),
+    (r'hand\s*balanc', 'Hand Balancing'),
+    (r'rolla', 'Rolla'),
+    (r'slack\s*(rope|wire)', 'Slack Rope'),
+    (r'(tight|high)\s*wire', 'Tight Wire'),
+    (r'low\s*cast', 'Low Casting'),
+    (r'cloud\s*swing', 'Cloud Swing'),
+    (r'chinese\s*pole', 'Chinese Pole'),
+    (r'web', 'Web'),
+    (r'cradle', 'Cradle'),
+    (r'sky\s*pole', 'Sky Pole'),
+    (r'unicycle', 'Unicycle'),
+    (r'trampoline', 'Trampoline'),
+]
+SHOW_PATTERNS = [
+    (re.compile(r'callaway|pine\s*mountain|georgia', re.I), 'Callaway Gardens'),
+    (re.compile(r'home\s*show|tallahassee|fsu\s*campus', re.I), 'Home Show'),
+]
+YEAR_PATTERN = re.compile(r'\b(19[5-9]\d|20[0-3]\d)\b')
+
+# Part markers of multi-part clips: "Part 2", "pt. 3 of 5", "(2 of 5)", "[2/5]"
+PART_PATTERN = re.compile(
+    r'\b(?:part|pt\.?)\s*(\d{1,2})\b(?:\s*(?:of|/)\s*\d{1,2}\b)?'
+    r'|[(\[]\s*(\d{1,2})\s*(?:of|/)\s*\d{1,2}\s*[)\]]',
+    re.I
+)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def open_catalogue(path: Path) -> sqlite3.Connection:
+    """Open (creating if needed) the catalogue database."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    for statement in SCHEMA_STATEMENTS:
+        conn.execute(statement)
+    return conn
+
+
+def get_setting(conn: sqlite3.Connection, key: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+    return row['value'] if row else None
+
+
+def set_setting(conn: sqlite3.Connection, key: str, value: str) -> None:
+    conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+
+
+def listing_url(channel: str) -> str:
+    """Turn a channel handle or URL into the URL of its uploads listing."""
+    if channel.startswith('@'):
+        channel = f"https://www.youtube.com/{channel}"
+    channel = channel.rstrip('/')
+    if re.search(r'/(@[^/]+|channel/[^/]+|c/[^/]+|user/[^/]+)$', channel):
+        channel += '/videos'
+    return channel
+
+
+def iter_listing(url: str) -> Iterator[Dict[str, Any]]:
+    """Yield the flat entries of a channel or playlist listing, newest first.
+
+    Entries are fetched page by page as they are consumed, so stopping
+    early skips the remaining pages.
+    """
+    import yt_dlp
+
+    opts = {'extract_flat': 'in_playlist', 'lazy_playlist': True, 'quiet': True, 'no_warnings': True}
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(url, download=False, process=False)
+        for entry in info.get('entries') or []:
+            if entry and entry.get('id'):
+                yield entry
+
+
+def refresh_listing(conn: sqlite3.Connection, url: str, full: bool = False) -> Dict[str, int]:
+    """Add new videos from the channel listing to the catalogue.
+
+    Args:
+        conn: Catalogue connection
+        url: Channel listing URL
+        full: Page through the whole listing and mark videos no longer
+            listed as removed (default: stop after KNOWN_STREAK known videos)
+
+    Returns:
+        Counts: listed, added, updated, removed
+    """
+    counts = {'listed': 0, 'added': 0, 'updated': 0, 'removed': 0}
+    known = {
+        row['video_id']: (row['title'], row['duration'], row['removed'])
+        for row in conn.execute("SELECT video_id, title, duration, removed FROM videos")
+    }
+    seen = set()
+    streak = 0
+    now = _now()
+
+    with stage('extract'):
+        for entry in iter_listing(url):
+            video_id = entry['id']
+            title = entry.get('title') or video_id
+            counts['listed'] += 1
+            seen.add(video_id)
+            if video_id not in known:
+                streak = 0
+                conn.execute("""
+                    INSERT INTO videos (video_id, title, duration, listed_at, seen_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (video_id, title, entry.get('duration'), now, now))
+                known[video_id] = (title, entry.get('duration'), 0)
+                counts['added'] += 1
+                continue
+
+            old_title, old_duration, removed = known[video_id]
+            duration = entry.get('duration') or old_duration
+            if (title, duration, removed) != (old_title, old_duration, 0):
+                counts['updated'] += 1
+            conn.execute("UPDATE videos SET title = ?, duration = ?, seen_at = ?, removed = 0 WHERE video_id = ?",
+                         (title, duration, now, video_id))
+            streak += 1
+            if not full and streak >= KNOWN_STREAK:
+                break
+
+    if full:
+        gone = [(video_id,) for video_id, (_, _, removed) in known.items() if video_id not in seen and not removed]
+        conn.executemany("UPDATE videos SET removed = 1 WHERE video_id = ?", gone)
+        counts['removed'] = len(gone)
+        set_setting(conn, 'full_refresh_at', now)
+    set_setting(conn, 'refreshed_at', now)
+    conn.commit()
+    return counts
+
+
+def compact_formats(info: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Keep only FORMAT_FIELDS of each downloadable format (no URLs, which expire)."""
+    return [
+        {field: f.get(field) for field in FORMAT_FIELDS if f.get(field) is not None}
+        for f in info.get('formats') or []
+        if f.get('format_id') and not str(f.get('format_id')).startswith('sb')  # storyboards
+    ]
+
+
+def refresh_details(conn: sqlite3.Connection, jobs: int = 4, redo: bool = False) -> Dict[str, int]:
+    """Extract upload date, description and formats for videos missing them.
+
+    Args:
+        conn: Catalogue connection
+        jobs: Videos extracted at once
+        redo: Re-extract every listed video, not only those without details
+
+    Returns:
+        Counts: detailed, failed
+    """
+    from circus_tools.download import _WorkerYDLs, build_ydl_opts, extract_info
+
+    where = "NOT removed" if redo else "NOT removed AND detailed_at IS NULL"
+    video_ids = [row['video_id'] for row in conn.execute(f"SELECT video_id FROM videos WHERE {where}")]
+    counts = {'detailed': 0, 'failed': 0}
+    if not video_ids:
+        return counts
+
+    print(f"Extracting details of {len(video_ids)} videos ({jobs} at a time)")
+    pool = _WorkerYDLs(build_ydl_opts(quiet=True))
+    try:
+        with stage('extract'), ThreadPoolExecutor(max_workers=jobs) as executor:
+            infos = executor.map(lambda video_id: extract_info(pool.get(), video_id), video_ids)
+            for number, (video_id, info) in enumerate(zip(video_ids, infos), 1):
+                if info is None:
+                    counts['failed'] += 1
+                    continue
+                conn.execute("""
+                    UPDATE videos SET title = ?, duration = COALESCE(?, duration), upload_date = ?,
+                        description = ?, formats = ?, detailed_at = ?
+                    WHERE video_id = ?
+                """, (info.get('title') or video_id, info.get('duration'), info.get('upload_date'),
+                      info.get('description'), json.dumps(compact_formats(info)), _now(), video_id))
+                counts['detailed'] += 1
+                # Commit as we go so an interrupted pass keeps what it fetched
+                if number % 50 == 0:
+                    conn.commit()
+                    print(f"[INFO] {number}/{len(video_ids)} extracted")
+    finally:
+        pool.close()
+        conn.commit()
+    return counts
+
+
+def infer_metadata(title: str) -> Dict[str, Any]:
+    """Guess act, year and show from a legacy title, as the discovery tool does."""
+    act = next((name for pattern, name in ACT_PATTERNS if re.search(pattern, title, re.I)), None)
+    year = YEAR_PATTERN.search(title)
+    show = next((name for pattern, name in SHOW_PATTERNS if pattern.search(title)), None)
+    return {'act': act, 'year': int(year.group(1)) if year else None, 'show': show}
+
+
+def split_part(title: str) -> Tuple[str, Optional[int]]:
+    """Split a title into (group key, part number); part is None for single clips.
+
+    The group key is the title without its part marker, lowercased and with
+    punctuation collapsed, so "Juggling Part 1" and "Juggling - part 2" share it.
+    """
+    match = PART_PATTERN.search(title)
+    part = None
+    if match:
+        part = int(match.group(1) or match.group(2))
+        title = title[:match.start()] + ' ' + title[match.end():]
+    return re.sub(r'[\W_]+', ' ', title).strip().casefold(), part
+
+
+def group_parts(rows: List[sqlite3.Row], log=print) -> List[List[sqlite3.Row]]:
+    """Group catalogue rows into clips: multi-part groups ordered by part, or single videos.
+
+    Parts are grouped by title with the part marker removed. Groups with a
+    repeated part number can't be ordered safely, so their videos stay
+    separate (with a warning).
+    """
+    groups: Dict[str, List[Tuple[int, sqlite3.Row]]] = {}
+    singles = []
+    for row in rows:
+        key, part = split_part(row['title'])
+        if part is None:
+            singles.append([row])
+        else:
+            groups.setdefault(key, []).append((part, row))
+
+    clips = singles
+    for parts in groups.values():
+        numbers = [part for part, _ in parts]
+        if len(set(numbers)) != len(numbers):
+            log(f"[WARN] Repeated part numbers, not grouping: {', '.join(r['title'] for _, r in parts)}")
+            clips.extend([row] for _, row in parts)
+            continue
+        parts.sort(key=lambda item: item[0])
+        missing = sorted(set(range(1, max(numbers) + 1)) - set(numbers))
+        if missing:
+            log(f"[WARN] {parts[0][1]['title']}: part(s) {', '.join(map(str, missing))} "
+                  f"not in the selection")
+        clips.append([row for _, row in parts])
+
+    clips.sort(key=lambda clip: (clip[0]['upload_date'] or '', clip[0]['title']))
+    return clips
+
+
+def _filename(meta: Dict[str, Any], fallback: str) -> str:
+    """Manifest filename in the usual style: juggling_callaway_2017."""
+    parts = [meta['act'] or fallback]
+    if meta['show'] == 'Callaway Gardens':
+        parts.append('callaway')
+    if meta['year']:
+        parts.append(str(meta['year']))
+    return re.sub(r'[\W_]+', '_', ' '.join(parts)).strip('_').lower()[:80] or 'video'
+
+
+def build_entry(clip: List[sqlite3.Row], used_filenames: set) -> Dict[str, Any]:
+    """Turn a clip (one video, or the ordered parts of one) into a manifest entry."""
+    titles = [row['title'] for row in clip]
+    meta = infer_metadata(' '.join(titles))
+    base_title = PART_PATTERN.sub('', titles[0]).strip(' -–:,') if len(clip) > 1 else titles[0]
+
+    # build_title reads a missing show as the home show, so only retitle when
+    # the legacy title named all three
+    if meta['act'] and meta['year'] and meta['show']:
+        title = build_title([meta['act']], meta['year'], meta['show'])
+    else:
+        title = base_title
+
+    filename = _filename(meta, base_title)
+    if filename in used_filenames:
+        suffix = 2
+        while f"{filename}_{suffix}" in used_filenames:
+            suffix += 1
+        filename = f"{filename}_{suffix}"
+    used_filenames.add(filename)
+
+    entry: Dict[str, Any] = {'title': title, 'filename': filename}
+    if len(clip) > 1:
+        entry['merge_sources'] = [row['video_id'] for row in clip]
+    else:
+        entry['source_id'] = clip[0]['video_id']
+    entry.update(act=meta['act'], year=meta['year'], show=meta['show'])
+    entry['notes'] = 'Legacy title: ' + ' | '.join(titles)
+    return entry
+
+
+def select_videos(
+    conn: sqlite3.Connection,
+    match: Optional[str] = None,
+    uploaded_after: Optional[str] = None,
+    uploaded_before: Optional[str] = None,
+    min_duration: Optional[float] = None,
+    max_duration: Optional[float] = None,
+    exclude_ids: Optional[set] = None,
+    log=print
+) -> List[sqlite3.Row]:
+    """Query the catalogue for listed videos matching the given filters.
+
+    Args:
+        conn: Catalogue connection
+        match: Case-insensitive regular expression the title must contain
+        uploaded_after: Earliest upload date (YYYYMMDD, inclusive)
+        uploaded_before: Latest upload date (YYYYMMDD, inclusive)
+        min_duration: Shortest duration in seconds
+        max_duration: Longest duration in seconds
+        exclude_ids: Video IDs to leave out (e.g. already in a manifest)
+        log: Where warnings go
+
+    Returns:
+        Matching rows, oldest upload first
+    """
+    clauses, params = ["NOT removed"], []
+    if uploaded_after:
+        clauses.append("upload_date >= ?")
+        params.append(uploaded_after)
+    if uploaded_before:
+        clauses.append("upload_date <= ?")
+        params.append(uploaded_before)
+    if min_duration is not None:
+        clauses.append("duration >= ?")
+        params.append(min_duration)
+    if max_duration is not None:
+        clauses.append("duration <= ?")
+        params.append(max_duration)
+
+    rows = conn.execute(
+        f"SELECT * FROM videos WHERE {' AND '.join(clauses)} ORDER BY upload_date, title",
+        params
+    ).fetchall()
+    if uploaded_after or uploaded_before:
+        # Flat listings carry no upload date until details are extracted
+        undated = conn.execute(
+            "SELECT COUNT(*) FROM videos WHERE NOT removed AND upload_date IS NULL"
+        ).fetchone()[0]
+        if undated:
+            log(f"[WARN] {undated} videos without an upload date were left out by the date filter "
+                f"(run 'refresh --details' to date them)")
+    pattern = re.compile(match, re.I) if match else None
+    return [
+        row for row in rows
+        if (not pattern or pattern.search(row['title'])) and row['video_id'] not in (exclude_ids or ())
+    ]
+
+
+def manifest_ids(paths: List[Path]) -> Tuple[set, set]:
+    """Source IDs and filenames already used by existing manifests."""
+    ids, filenames = set(), set()
+    for path in paths:
+        for entry in iter_manifest(path):
+            ids.update(entry.get('merge_sources') or [entry.get('source_id')])
+            filenames.add(entry.get('filename'))
+    ids.discard(None)
+    filenames.discard(None)
+    return ids, filenames
+
+
+def plan_clip_formats(clip: List[sqlite3.Row], quality: str) -> Optional[Dict[str, Any]]:
+    """Plan a merge group's common stream profile from catalogued formats (None if not all known)."""
+    if any(not row['formats'] for row in clip):
+        return None
+    from circus_tools.download import plan_group_formats
+
+    return plan_group_formats([{'formats': json.loads(row['formats'])} for row in clip], quality)
+
+
+def generate_manifest(
+    conn: sqlite3.Connection,
+    rows: List[sqlite3.Row],
+    filters: Optional[Dict[str, List[Any]]] = None,
+    group: bool = True,
+    used_filenames: Optional[set] = None,
+    limit: Optional[int] = None,
+    quality: str = '1080',
+    log=print
+) -> List[Dict[str, Any]]:
+    """Build manifest entries from catalogue rows.
+
+    Args:
+        conn: Catalogue connection
+        rows: Selected videos (see select_videos)
+        filters: act/year/show filters, applied to the inferred metadata
+        group: Group multi-part clips into merge_sources entries
+        used_filenames: Filenames to avoid (updated with the new ones)
+        limit: Stop after this many entries
+        quality: Quality cap used to plan merge groups
+        log: Callable used to report warnings and merge-group plans
+
+    Returns:
+        Manifest entries
+    """
+    clips = group_parts(rows, log) if group else [[row] for row in rows]
+    used_filenames = used_filenames if used_filenames is not None else set()
+    entries = []
+    for clip in clips:
+        if limit is not None and len(entries) >= limit:
+            break
+        entry = build_entry(clip, used_filenames)
+        if not matches(entry, filters):
+            used_filenames.discard(entry['filename'])
+            continue
+        if len(clip) > 1:
+            plan = plan_clip_formats(clip, quality)
+            if plan is None:
+                log(f"[PLAN] {entry['filename']}: {len(clip)} parts, formats not catalogued yet")
+            elif plan['formats']:
+                log(f"[PLAN] {entry['filename']}: {len(clip)} parts, {plan['video']} + {plan['audio']} "
+                      f"(stream copy)")
+            else:
+                log(f"[PLAN] {entry['filename']}: {len(clip)} parts, merge will need re-encoding - "
+                      f"{plan['reason']}")
+        entries.append(entry)
+    return entries
+
+
+def _format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '?'
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+def _date(value: str) -> str:
+    """argparse type for YYYYMMDD or YYYY-MM-DD dates, normalised to YYYYMMDD."""
+    digits = value.replace('-', '')
+    if not re.fullmatch(r'\d{8}', digits):
+        raise argparse.ArgumentTypeError(f"expected YYYYMMDD or YYYY-MM-DD, got {value!r}")
+    return digits
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Catalogue the legacy channel offline and generate manifests from it',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # First run: list the channel, then fetch upload dates and formats
+  python catalogue.py refresh --channel https://www.youtube.com/@OldCircusAccount --details
+
+  # Later runs: pick up new uploads only (add --full to re-list everything)
+  python catalogue.py refresh --details
+
+  # Browse the catalogue
+  python catalogue.py list --match juggl --uploaded-after 2017-01-01
+
+  # Next migration batch: 2017 Callaway clips not already in a manifest
+  python catalogue.py manifest --year 2017 --show "Callaway Gardens" \\
+      --exclude manifest.json --exclude manifest_remaining.json -o batch_2017.jsonl
+        '''
+    )
+    parser.add_argument('action', choices=['refresh', 'list', 'manifest'],
+                        help='Update the catalogue, list videos, or write a manifest')
+    parser.add_argument('--catalogue', default=DEFAULT_CATALOGUE,
+                        help=f'Catalogue database (default: {DEFAULT_CATALOGUE})')
+
+    refresh = parser.add_argument_group('refresh')
+    refresh.add_argument('--channel',
+                         help='Legacy channel URL or @handle (remembered; needed on the first refresh)')
+    refresh.add_argument('--full', action='store_true',
+                         help='Re-list the whole channel and mark videos that are gone')
+    refresh.add_argument('--details', action='store_true',
+                         help='Also extract upload date and formats of videos that lack them')
+    refresh.add_argument('--redo-details', action='store_true',
+                         help='Re-extract details of every video (formats change as YouTube re-encodes)')
+    refresh.add_argument('-j', '--jobs', type=int, default=4, help='Detail extractions at once (default: 4)')
+
+    select = parser.add_argument_group('list and manifest')
+    select.add_argument('--match', metavar='REGEX', help='Only titles matching this (case-insensitive)')
+    select.add_argument('--uploaded-after', type=_date, metavar='DATE', help='Uploaded on or after DATE')
+    select.add_argument('--uploaded-before', type=_date, metavar='DATE', help='Uploaded on or before DATE')
+    select.add_argument('--min-duration', type=float, metavar='SECONDS', help='Only videos at least this long')
+    select.add_argument('--max-duration', type=float, metavar='SECONDS', help='Only videos at most this long')
+    select.add_argument('--exclude', action='append', default=[], metavar='MANIFEST',
+                        help='Leave out videos (and filenames) used by this manifest (repeatable)')
+    select.add_argument('--no-group', dest='group', action='store_false',
+                        help='Keep multi-part clips as separate entries')
+    select.add_argument('--limit', type=int, help='manifest: at most this many entries')
+    select.add_argument('-q', '--quality', default='1080', choices=['best', '1080', '720', '480'],
+                        help='manifest: quality cap used to plan merge groups (default: 1080)')
+    select.add_argument('-o', '--output',
+                        help='manifest: write to this .jsonl (or .json) file (default: print JSON Lines)')
+    add_filter_arguments(parser)
+    add_profile_argument(parser)
+
+    args = parser.parse_args()
+    profiling.start(args.profile)
+
+    conn = open_catalogue(Path(args.catalogue))
+    try:
+        if args.action == 'refresh':
+            return _refresh(conn, args, parser)
+        return _select(conn, args)
+    finally:
+        conn.close()
+
+
+def _refresh(conn: sqlite3.Connection, args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    channel = args.channel or get_setting(conn, 'channel')
+    if not channel:
+        parser.error('the first refresh needs --channel')
+    url = listing_url(channel)
+    set_setting(conn, 'channel', channel)
+
+    print(f"Catalogue: {args.catalogue}")
+    print(f"Listing: {url}{' (full)' if args.full else ''}")
+    try:
+        counts = refresh_listing(conn, url, args.full)
+    except Exception as e:
+        print(f"[ERROR] Listing failed: {e}")
+        return 1
+    print(f"[OK] {counts['listed']} listed: {counts['added']} new, {counts['updated']} changed, "
+          f"{counts['removed']} gone")
+
+    details = {'detailed': 0, 'failed': 0}
+    if args.details or args.redo_details:
+        details = refresh_details(conn, args.jobs, args.redo_details)
+
+    total, detailed, removed = conn.execute(
+        "SELECT COUNT(*), COUNT(detailed_at), SUM(removed) FROM videos"
+    ).fetchone()
+
+    print(f"\n{'='*60}")
+    print("CATALOGUE REFRESH SUMMARY")
+    print(f"{'='*60}")
+    print(f"New videos: {counts['added']}")
+    print(f"Details extracted: {details['detailed']} ({details['failed']} failed)")
+    print(f"Catalogue: {total} videos ({removed or 0} gone from the channel), {detailed} with details")
+    return 1 if details['failed'] else 0
+
+
+def _select(conn: sqlite3.Connection, args: argparse.Namespace) -> int:
+    # Status goes to stderr when the manifest itself is printed
+    log = print if args.output else (lambda message: print(message, file=sys.stderr))
+    try:
+        excluded_ids, used_filenames = manifest_ids([Path(p) for p in args.exclude])
+        rows = select_videos(conn, args.match, args.uploaded_after, args.uploaded_before,
+                             args.min_duration, args.max_duration, excluded_ids, log)
+    except (OSError, ValueError, re.error) as e:
+        print(f"Error: {e}")
+        return 1
+
+    filters = filters_from_args(args)
+    if args.action == 'list':
+        for clip in group_parts(rows) if args.group else [[row] for row in rows]:
+            if not matches(infer_metadata(' '.join(row['title'] for row in clip)), filters):
+                continue
+            for number, row in enumerate(clip):
+                marker = '  +' if number else ('[G]' if len(clip) > 1 else '   ')
+                print(f"{marker} {row['video_id']}  {row['upload_date'] or '????????'}  "
+                      f"{_format_duration(row['duration']):>7}  {row['title']}")
+        return 0
+
+    if filters:
+        log(f"Filter: {describe_filters(filters)}")
+    entries = generate_manifest(conn, rows, filters, args.group, used_filenames, args.limit, args.quality, log)
+
+    if not args.output:
+        for entry in entries:
+            print(json.dumps(entry))
+        return 0
+
+    output = Path(args.output)
+    with open(output, 'w') as out:
+        if output.suffix.lower() == '.json':
+            json.dump({'description': f"Generated from {args.catalogue} on {_now()[:10]}",
+                       'videos': entries}, out, indent=2)
+            out.write('\n')
+        else:
+            for entry in entries:
+                out.write(json.dumps(entry) + '\n')
+
+    groups = sum(1 for entry in entries if entry.get('merge_sources'))
+    print(f"\n{'='*60}")
+    print("MANIFEST SUMMARY")
+    print(f"{'='*60}")
+    print(f"Videos selected: {len(rows)}")
+    print(f"Entries written: {len(entries)} ({groups} multi-part)")
+    print(f"Without an inferred act or year: "
+          f"{sum(1 for entry in entries if not entry['act'] or not entry['year'])}")
+    print(f"Output: {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
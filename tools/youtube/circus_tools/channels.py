@@ -0,0 +1,263 @@
+"""Pools of YouTube channel credentials with per-channel daily upload budgets.
+
+One channel only accepts so many uploads a day. A ChannelPool spreads
+uploads over several channels, always handing out the one with the most
+budget left. A channel is retired for the day when YouTube reports its
+quota as spent, and for the run when its credentials are refused. Video
+IDs are global, so the youtube_url of an upload is the same whichever
+channel it went to.
+
+The daily counts live in a counter: upload.py keeps them in a JSON file
+next to its tokens (FileUploadCounter), the queue processor in the
+database. A counter provides count(name), reserve(name, limit) (take one
+slot if any are left), release(name) (give a slot back after a failed
+upload) and exhaust(name, limit) (mark the day's budget as used up).
+
+QuotaBudget caps the API units the channel maintenance commands spend per
+day, so they leave room for uploads.
+"""
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.auth.exceptions import RefreshError
+
+from circus_tools.youtube_api import QuotaExceeded
+
+
+class NoChannelCapacity(Exception):
+    """Raised when every channel in the pool has used its daily budget or can't authenticate."""
+
+
+def today() -> str:
+    """Current UTC date, the key for daily upload counts."""
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class FileUploadCounter:
+    """Per-channel upload counts for the current day, kept in a JSON file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def _load(self) -> Dict[str, Any]:
+        data = json.loads(self.path.read_text()) if self.path.exists() else {}
+        if data.get('date') != today():
+            data = {'date': today(), 'counts': {}}
+        return data
+
+    def _save(self, data: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(data, indent=2))
+
+    def count(self, name: str) -> int:
+        return self._load()['counts'].get(name, 0)
+
+    def reserve(self, name: str, limit: Optional[int]) -> bool:
+        data = self._load()
+        used = data['counts'].get(name, 0)
+        if limit is not None and used >= limit:
+            return False
+        data['counts'][name] = used + 1
+        self._save(data)
+        return True
+
+    def release(self, name: str) -> None:
+        data = self._load()
+        data['counts'][name] = max(data['counts'].get(name, 0) - 1, 0)
+        self._save(data)
+
+    def exhaust(self, name: str, limit: int) -> None:
+        data = self._load()
+        data['counts'][name] = max(data['counts'].get(name, 0), limit)
+        self._save(data)
+
+
+class QuotaBudget:
+    """API units spent today, shared by every run on the same day."""
+
+    def __init__(self, path: Path, limit: int):
+        self.path = path
+        self.limit = limit
+        state = json.loads(path.read_text()) if path.exists() else {}
+        self.used = state.get('used', 0) if state.get('date') == today() else 0
+
+    def spend(self, units: int) -> bool:
+        """Take units from the budget; False (nothing taken) if they don't fit."""
+        if self.used + units > self.limit:
+            return False
+        self.used += units
+        return True
+
+    def charge(self, units: int) -> None:
+        """Record units already spent (list calls made before their count was known)."""
+        self.used += units
+
+    def exhaust(self) -> None:
+        self.used = max(self.used, self.limit)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({'date': today(), 'used': self.used}))
+
+
+class ChannelPool:
+    """Hands out the channel with the most daily upload budget left.
+
+    Channels are dicts with at least 'name' and 'daily_limit' (None for no
+    limit of our own; the channel is then used until YouTube refuses).
+    Any other keys are for the authenticate callback, which turns a channel
+    into an API service. Services are built on first use and cached.
+    """
+
+    def __init__(
+        self,
+        channels: List[Dict[str, Any]],
+        counter,
+        authenticate: Callable[[Dict[str, Any]], Any]
+    ):
+        if not channels:
+            raise ValueError("A channel pool needs at least one channel")
+        self.channels = channels
+        self.counter = counter
+        self._authenticate = authenticate
+        self._services: Dict[str, Any] = {}
+        self._exhausted: set = set()
+        self._auth_failed: Dict[str, str] = {}
+
+    def remaining(self, channel: Dict[str, Any]) -> Optional[int]:
+        """Uploads left today on a channel (None = no limit of our own)."""
+        if channel['name'] in self._exhausted or channel['name'] in self._auth_failed:
+            return 0
+        if channel['daily_limit'] is None:
+            return None
+        return max(channel['daily_limit'] - self.counter.count(channel['name']), 0)
+
+    def has_capacity(self) -> bool:
+        return any(self.remaining(channel) != 0 for channel in self.channels)
+
+    def acquire(self) -> Dict[str, Any]:
+        """Reserve one upload on the channel with the most budget left.
+
+        Raises:
+            NoChannelCapacity: Every channel is at its daily limit (or disabled)
+        """
+        remaining = {channel['name']: self.remaining(channel) for channel in self.channels}
+        ranked = sorted(
+            (channel for channel in self.channels if remaining[channel['name']] != 0),
+            key=lambda channel: float('inf') if remaining[channel['name']] is None
+            else remaining[channel['name']],
+            reverse=True
+        )
+        for channel in ranked:
+            # Another process may have taken the last slot since we looked
+            if self.counter.reserve(channel['name'], channel['daily_limit']):
+                return channel
+        reason = "reached its daily upload limit"
+        if self._auth_failed:
+            reason += " or failed to authenticate"
+        raise NoChannelCapacity(f"Every channel has {reason}")
+
+    def release(self, channel: Dict[str, Any]) -> None:
+        """Give back a reserved upload that didn't happen."""
+        self.counter.release(channel['name'])
+
+    def exhaust(self, channel: Dict[str, Any]) -> None:
+        """Retire a channel for the rest of the day."""
+        self._exhausted.add(channel['name'])
+        if channel['daily_limit'] is not None:
+            self.counter.exhaust(channel['name'], channel['daily_limit'])
+
+    def disable(self, channel: Dict[str, Any], error: Exception) -> None:
+        """Take a channel whose credentials were refused out of rotation for this run."""
+        self._auth_failed[channel['name']] = str(error)
+        self._services.pop(channel['name'], None)
+
+    def service(self, channel: Dict[str, Any]):
+        if channel['name'] not in self._services:
+            self._services[channel['name']] = self._authenticate(channel)
+        return self._services[channel['name']]
+
+    def authenticate_all(self) -> Dict[str, str]:
+        """Build the service of every channel with budget left, up front.
+
+        Channels that fail are disabled, so work is only taken on when some
+        channel can actually upload it.
+
+        Returns:
+            Error message per channel name, for the channels that failed
+        """
+        for channel in self.channels:
+            if self.remaining(channel) == 0:
+                continue
+            try:
+                self.service(channel)
+            except Exception as e:
+                self.disable(channel, e)
+        return dict(self._auth_failed)
+
+    def describe(self) -> List[str]:
+        lines = []
+        for channel in self.channels:
+            used = self.counter.count(channel['name'])
+            limit = channel['daily_limit']
+            status = ''
+            if channel['name'] in self._exhausted:
+                status = ' (quota exhausted)'
+            elif channel['name'] in self._auth_failed:
+                status = ' (authentication failed)'
+            lines.append(f"{channel['name']}: {used}/{limit if limit is not None else '-'}{status}")
+        return lines
+
+
+def upload_with_pool(
+    pool: ChannelPool,
+    upload: Callable[[Any], Optional[str]]
+) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Run an upload on channels from the pool until one accepts it.
+
+    A channel whose quota runs out mid-run is retired and the upload moves
+    to the next one, as does a channel whose credentials are refused (it is
+    disabled for the rest of the run). A failed upload gives its slot back.
+
+    Args:
+        pool: Channel pool
+        upload: Called with a YouTube API service; returns the video ID or None
+
+    Returns:
+        (video ID or None, channel used)
+
+    Raises:
+        NoChannelCapacity: No channel could take the upload
+    """
+    while True:
+        channel = pool.acquire()
+        try:
+            youtube = pool.service(channel)
+        except Exception as e:
+            print(f"\n[WARN] Channel {channel['name']} failed to authenticate ({e}), trying the next one")
+            pool.release(channel)
+            pool.disable(channel, e)
+            continue
+
+        try:
+            video_id = upload(youtube)
+        except QuotaExceeded as e:
+            print(f"\n[WARN] Channel {channel['name']} is out of quota ({e}), trying the next one")
+            pool.exhaust(channel)
+            continue
+        except RefreshError as e:
+            # The access token expired mid-run and the refresh token was refused
+            print(f"\n[WARN] Channel {channel['name']} failed to authenticate ({e}), trying the next one")
+            pool.release(channel)
+            pool.disable(channel, e)
+            continue
+        except Exception:
+            pool.release(channel)
+            raise
+
+        if not video_id:
+            pool.release(channel)
+        return video_id, channel
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Single entry point for the YouTube tools: circus-tools <command> [options].
+
+Each command's module is imported only when that command runs, so yt-dlp
+and the Google API client are loaded only by the commands that use them.
+"""
+
+import argparse
+import importlib
+import sys
+from typing import List, Optional
+
+# Command name -> (circus_tools module, summary)
+COMMANDS = {
+    'catalogue': ('catalogue', 'Catalogue the legacy channel and generate manifests from it'),
+    'download': ('download', 'Download videos from YouTube with yt-dlp'),
+    'merge': ('merge', 'Merge multi-part videos with ffmpeg'),
+    'optimize': ('optimize', 'Prepare a video file for upload'),
+    'previews': ('previews', 'Generate poster frames and hover-preview sprites'),
+    'upload': ('upload', 'Upload videos to YouTube'),
+    'validate': ('validate', 'Check a manifest and its files before a long run'),
+    'manifest': ('manifest', 'Convert or filter a manifest into JSON Lines'),
+    'audit': ('audit', 'Reconcile channel uploads with the archive database'),
+    'update-metadata': ('update_metadata', 'Update uploaded videos whose metadata has changed'),
+    'playlists': ('playlists', 'Sync act, year and show playlists with the database'),
+    'fingerprint': ('fingerprint', 'Index perceptual fingerprints and flag likely duplicates'),
+}
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    width = max(len(name) for name in COMMANDS)
+    commands = '\n'.join(
+        f"  {name:<{width}}  {summary}" for name, (_, summary) in COMMANDS.items()
+    )
+    return argparse.ArgumentParser(
+        prog='circus-tools',
+        description='Circus Archives YouTube tools',
+        usage='circus-tools <command> [options]',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f'''
+Commands:
+{commands}
+
+Run "circus-tools <command> --help" for a command's options.
+
+Examples:
+  circus-tools download --manifest manifest.json -o ./output --jobs 4
+  circus-tools validate --manifest manifest.json --output-dir ./output
+  circus-tools upload --manifest manifest.json --output-dir ./output
+        '''
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+
+    if not argv or argv[0].startswith('-'):
+        parser = _build_parser()
+        parser.parse_args(argv)  # handles --help
+        parser.print_help()
+        return 1
+
+    command, args = argv[0], argv[1:]
+    if command not in COMMANDS:
+        _build_parser().error(f"unknown command '{command}' (choose from {', '.join(COMMANDS)})")
+
+    module = importlib.import_module(f"circus_tools.{COMMANDS[command][0]}")
+
+    # Command modules parse sys.argv themselves
+    sys.argv = [f"circus-tools {command}", *args]
+    return module.main()
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,78 @@
+"""Archive database access for the channel maintenance commands.
+
+Needs psycopg2 (pip install 'circus-tools[db]') and DATABASE_PUBLIC_URL,
+the same connection string the queue processor uses.
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+# show_type enum value -> show name used in descriptions and tags
+SHOW_NAMES = {'HOME': 'Home Show', 'CALLAWAY': 'Callaway Gardens'}
+
+
+def get_db_connection():
+    """Connect to the archive database named by DATABASE_PUBLIC_URL."""
+    try:
+        import psycopg2
+    except ImportError:
+        raise RuntimeError(
+            "psycopg2 is required for database commands: pip install 'circus-tools[db]'"
+        )
+
+    database_url = os.environ.get('DATABASE_PUBLIC_URL')
+    if not database_url:
+        raise ValueError("DATABASE_PUBLIC_URL environment variable is required")
+    return psycopg2.connect(database_url)
+
+
+def show_type(show: Optional[str]) -> Optional[str]:
+    """Map a show name ("Callaway Gardens", "Home Show") to its show_type."""
+    if not show:
+        return None
+    return 'CALLAWAY' if 'callaway' in show.lower() else 'HOME'
+
+
+def fetch_archive_videos(conn) -> Dict[str, Dict[str, Any]]:
+    """Load every archived video with its act and performer names.
+
+    Returns:
+        Dict of youtube_id -> row with id, youtube_id, youtube_url, title,
+        year, show_type, description, acts (names, in tagging order) and
+        performers ("First Last")
+    """
+    from psycopg2.extras import RealDictCursor
+
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT
+                v.id,
+                v.youtube_id,
+                v.youtube_url,
+                v.title,
+                v.year,
+                v.show_type,
+                v.description,
+                COALESCE(
+                    (SELECT array_agg(a.name ORDER BY va.created_at)
+                     FROM video_acts va JOIN acts a ON a.id = va.act_id
+                     WHERE va.video_id = v.id),
+                    '{}'
+                ) AS acts,
+                COALESCE(
+                    (SELECT array_agg(u.first_name || ' ' || u.last_name ORDER BY vp.created_at)
+                     FROM video_performers vp JOIN users u ON u.id = vp.user_id
+                     WHERE vp.video_id = v.id),
+                    '{}'
+                ) AS performers
+            FROM videos v
+            ORDER BY v.created_at
+        """)
+        return {row['youtube_id']: row for row in cur.fetchall()}
+
+
+def fetch_act_ids(conn) -> Dict[str, str]:
+    """Map lower-cased act names to act IDs."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, name FROM acts")
+        return {name.lower(): act_id for act_id, name in cur.fetchall()}
@@ -0,0 +1,677 @@
+#!/usr/bin/env python3
+"""Download YouTube videos using yt-dlp."""
+
+import argparse
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import yt_dlp
+
+from circus_tools import profiling
+from circus_tools.manifest import add_filter_arguments, describe_filters, filters_from_args, iter_manifest
+from circus_tools.profiling import add_profile_argument, stage
+
+# Format selection
+FORMAT_MAP = {
+    'best': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
+    '1080': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best',
+    '720': 'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/best[height<=720][ext=mp4]/best',
+    '480': 'bestvideo[height<=480][ext=mp4]+bestaudio[ext=m4a]/best[height<=480][ext=mp4]/best',
+}
+
+# Codec families in order of preference when planning merge groups
+# (most widely stream-copyable into mp4 first)
+VIDEO_CODEC_PREFERENCE = ['avc1', 'vp09', 'vp9', 'av01']
+AUDIO_CODEC_PREFERENCE = ['mp4a', 'opus']
+
+
+def extract_video_id(url: str) -> str:
+    """Extract video ID from various YouTube URL formats.
+
+    Args:
+        url: YouTube URL or video ID
+
+    Returns:
+        Video ID string
+    """
+    # Already just an ID
+    if len(url) == 11 and '/' not in url and '.' not in url:
+        return url
+
+    # Handle various URL formats
+    if 'youtu.be/' in url:
+        # https://youtu.be/VIDEO_ID or https://youtu.be/VIDEO_ID?si=...
+        video_id = url.split('youtu.be/')[-1].split('?')[0].split('&')[0]
+    elif 'youtube.com/watch' in url:
+        # https://www.youtube.com/watch?v=VIDEO_ID
+        if 'v=' in url:
+            video_id = url.split('v=')[-1].split('&')[0].split('?')[0]
+        else:
+            video_id = url
+    else:
+        video_id = url
+
+    return video_id[:11]  # Video IDs are always 11 chars
+
+
+def build_ydl_opts(
+    quality: str = '1080',
+    concurrent_fragments: int = 1,
+    quiet: bool = False
+) -> Dict[str, Any]:
+    """Build yt-dlp options shared by every download in a run.
+
+    Args:
+        quality: Video quality (best, 1080, 720, 480)
+        concurrent_fragments: Number of fragments of a DASH/HLS format to
+            download in parallel
+        quiet: Suppress yt-dlp's own per-video output (used with --jobs so
+            concurrent downloads don't interleave on the console)
+
+    Returns:
+        yt-dlp options dict
+    """
+    return {
+        'format': FORMAT_MAP.get(quality, FORMAT_MAP['1080']),
+        'merge_output_format': 'mp4',
+        'writeinfojson': True,  # Save metadata
+        'noplaylist': True,
+        'concurrent_fragment_downloads': max(1, concurrent_fragments),
+        'quiet': quiet,
+        'noprogress': quiet,
+        'no_warnings': quiet,
+    }
+
+
+def _set_output_template(ydl: 'yt_dlp.YoutubeDL', output_template: str) -> None:
+    """Point a reused YoutubeDL instance at a new output filename.
+
+    yt-dlp normalises ``outtmpl`` into a dict keyed by output type when the
+    instance is created, so only the default template is swapped here.
+    """
+    outtmpl = ydl.params.get('outtmpl')
+    if isinstance(outtmpl, dict):
+        outtmpl['default'] = output_template
+    else:
+        ydl.params['outtmpl'] = {'default': output_template}
+
+
+def _set_format(ydl: 'yt_dlp.YoutubeDL', format_string: str) -> None:
+    """Change the format selection of a reused YoutubeDL instance.
+
+    The selector is compiled when the instance is created, so it is rebuilt
+    along with the 'format' param.
+    """
+    if ydl.params.get('format') != format_string:
+        ydl.params['format'] = format_string
+        ydl.format_selector = ydl.build_format_selector(format_string)
+
+
+def download_video(
+    url_or_id: str,
+    output_dir: Path,
+    quality: str = '1080',
+    filename: Optional[str] = None,
+    concurrent_fragments: int = 1,
+    ydl: Optional['yt_dlp.YoutubeDL'] = None,
+    format_string: Optional[str] = None,
+    info: Optional[Dict[str, Any]] = None
+) -> Optional[Path]:
+    """Download a single YouTube video.
+
+    Args:
+        url_or_id: YouTube URL or video ID
+        output_dir: Directory to save video
+        quality: Video quality (best, 1080, 720, 480)
+        filename: Optional custom filename (without extension)
+        concurrent_fragments: Fragments to download in parallel
+        ydl: Optional YoutubeDL instance to reuse (keeps extractor state such
+            as player JS and cookies between downloads). Its options take
+            precedence over concurrent_fragments.
+        format_string: Explicit yt-dlp format selector (e.g. from
+            plan_group_formats); defaults to the quality fallback chain
+        info: Unprocessed info dict already extracted for this video, so it
+            is not extracted a second time (requires ydl)
+
+    Returns:
+        Path to downloaded file, or None if failed
+    """
+    video_id = extract_video_id(url_or_id)
+    url = f"https://www.youtube.com/watch?v={video_id}"
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Use custom filename or video ID
+    base_name = filename if filename else video_id
+    output_template = str(output_dir / f"{base_name}.%(ext)s")
+    format_string = format_string or FORMAT_MAP.get(quality, FORMAT_MAP['1080'])
+
+    # Quiet shared instances belong to a --jobs run, which reports aggregate
+    # progress instead of per-video banners
+    verbose = ydl is None or not ydl.params.get('quiet')
+
+    try:
+        if verbose:
+            print(f"\n{'='*60}")
+            print(f"Downloading: {video_id}")
+            print(f"URL: {url}")
+            print(f"Output: {base_name}.mp4")
+            print(f"{'='*60}")
+
+        with stage('download'):
+            if ydl is not None:
+                _set_output_template(ydl, output_template)
+                _set_format(ydl, format_string)
+                if info is not None:
+                    ydl.process_ie_result(info, download=True)
+                else:
+                    ydl.download([url])
+            else:
+                ydl_opts = build_ydl_opts(quality, concurrent_fragments)
+                ydl_opts['outtmpl'] = output_template
+                ydl_opts['format'] = format_string
+                with yt_dlp.YoutubeDL(ydl_opts) as single_ydl:
+                    single_ydl.download([url])
+
+        # Find the downloaded file
+        output_path = output_dir / f"{base_name}.mp4"
+        if output_path.exists():
+            if verbose:
+                print(f"[OK] Downloaded: {output_path}")
+            return output_path
+        else:
+            # Check for other extensions
+            for ext in ['mp4', 'mkv', 'webm']:
+                alt_path = output_dir / f"{base_name}.{ext}"
+                if alt_path.exists():
+                    if verbose:
+                        print(f"[OK] Downloaded: {alt_path}")
+                    return alt_path
+
+        print(f"[WARN] Download completed but file not found at expected path")
+        return None
+
+    except Exception as e:
+        print(f"[ERROR] Failed to download {video_id}: {e}")
+        return None
+
+
+def _codec_family(codec: Optional[str]) -> str:
+    """Reduce a codec string like 'avc1.640028' to its family ('avc1')."""
+    return (codec or 'none').split('.')[0]
+
+
+def _preference(family: str, order: List[str]) -> int:
+    return order.index(family) if family in order else len(order)
+
+
+def _stream_profiles(info: Dict[str, Any], max_height: Optional[int]):
+    """Index a video's DASH formats by stream profile.
+
+    Returns:
+        (video, audio) dicts mapping a profile tuple to the best format
+        (highest bitrate) with that profile. Video profiles are
+        (codec, width, height, fps), audio profiles (codec, sample rate,
+        channels) - the properties the concat demuxer needs to match.
+    """
+    video: Dict[tuple, Dict[str, Any]] = {}
+    audio: Dict[tuple, Dict[str, Any]] = {}
+
+    for f in info.get('formats') or []:
+        vcodec, acodec = f.get('vcodec'), f.get('acodec')
+        if vcodec not in (None, 'none') and acodec == 'none':
+            if not f.get('width') or not f.get('height'):
+                continue
+            if max_height and f['height'] > max_height:
+                continue
+            key = (_codec_family(vcodec), f['width'], f['height'], round(f.get('fps') or 0))
+            target = video
+        elif acodec not in (None, 'none') and vcodec == 'none':
+            key = (_codec_family(acodec), f.get('asr'), f.get('audio_channels'))
+            target = audio
+        else:
+            continue
+
+        if key not in target or (f.get('tbr') or 0) > (target[key].get('tbr') or 0):
+            target[key] = f
+
+    return video, audio
+
+
+def _describe_video(profile: tuple) -> str:
+    codec, width, height, fps = profile
+    return f"{width}x{height} {codec} {fps}fps"
+
+
+def _describe_audio(profile: tuple) -> str:
+    codec, asr, channels = profile
+    return f"{codec} {asr or '?'}Hz {channels or '?'}ch"
+
+
+def plan_group_formats(
+    infos: List[Optional[Dict[str, Any]]],
+    quality: str = '1080'
+) -> Dict[str, Any]:
+    """Choose one stream profile that every part of a merge group offers.
+
+    Downloading all parts with matching codec, resolution, frame rate and
+    audio layout lets merge.py join them with the lossless concat demuxer
+    instead of re-encoding.
+
+    Args:
+        infos: Extracted info dict per part (None if extraction failed)
+        quality: Quality cap (best, 1080, 720, 480)
+
+    Returns:
+        Dict with 'formats' (one format selector per part, or None if no
+        common profile exists), 'video'/'audio' profile descriptions and
+        'reason' explaining why planning failed (None on success)
+    """
+    plan: Dict[str, Any] = {'formats': None, 'video': None, 'audio': None, 'reason': None}
+    max_height = None if quality == 'best' else int(quality)
+
+    failed = [str(i) for i, info in enumerate(infos, 1) if info is None]
+    if failed:
+        plan['reason'] = f"format info unavailable for part(s) {', '.join(failed)}"
+        return plan
+
+    profiles = [_stream_profiles(info, max_height) for info in infos]
+
+    for i, (video, audio) in enumerate(profiles, 1):
+        if not video:
+            limit = f" at or below {max_height}p" if max_height else ''
+            plan['reason'] = f"part {i} has no separate video stream{limit}"
+            return plan
+        if not audio:
+            plan['reason'] = f"part {i} has no separate audio stream"
+            return plan
+
+    common_video = set.intersection(*(set(video) for video, _ in profiles))
+    if not common_video:
+        best = [
+            max(video, key=lambda p: (p[2], p[1], p[3]))
+            for video, _ in profiles
+        ]
+        details = '; '.join(f"part {i}: up to {_describe_video(p)}" for i, p in enumerate(best, 1))
+        plan['reason'] = f"no codec/resolution/fps offered by every part ({details})"
+        return plan
+
+    common_audio = set.intersection(*(set(audio) for _, audio in profiles))
+    if not common_audio:
+        details = '; '.join(
+            f"part {i}: {', '.join(sorted(_describe_audio(p) for p in audio))}"
+            for i, (_, audio) in enumerate(profiles, 1)
+        )
+        plan['reason'] = f"no audio codec/sample rate/channels offered by every part ({details})"
+        return plan
+
+    video_profile = max(
+        common_video,
+        key=lambda p: (p[2], -_preference(p[0], VIDEO_CODEC_PREFERENCE), p[3], p[1])
+    )
+    audio_profile = max(
+        common_audio,
+        key=lambda p: (-_preference(p[0], AUDIO_CODEC_PREFERENCE), p[1] or 0, p[2] or 0)
+    )
+
+    plan['formats'] = [
+        f"{video[video_profile]['format_id']}+{audio[audio_profile]['format_id']}"
+        for video, audio in profiles
+    ]
+    plan['video'] = _describe_video(video_profile)
+    plan['audio'] = _describe_audio(audio_profile)
+    return plan
+
+
+def extract_info(ydl: 'yt_dlp.YoutubeDL', url_or_id: str) -> Optional[Dict[str, Any]]:
+    """Extract a video's metadata and format list without downloading.
+
+    The result is unprocessed, so it can later be handed to download_video
+    (via ``info``) without a second network extraction.
+    """
+    video_id = extract_video_id(url_or_id)
+    try:
+        return ydl.extract_info(
+            f"https://www.youtube.com/watch?v={video_id}",
+            download=False,
+            process=False
+        )
+    except Exception as e:
+        print(f"[ERROR] Failed to extract formats for {video_id}: {e}")
+        return None
+
+
+class DownloadProgress:
+    """Aggregate progress across concurrent downloads.
+
+    Registered as a yt-dlp progress hook on every worker's YoutubeDL, and
+    prints a single status line covering the whole run.
+    """
+
+    PRINT_INTERVAL = 1.0  # seconds between status lines
+
+    def __init__(self, total: int = 0):
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self._finished_bytes = 0
+        self._active: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._last_print = 0.0
+        self._started = time.monotonic()
+
+    def hook(self, d: Dict[str, Any]) -> None:
+        """yt-dlp progress hook (called from worker threads)."""
+        key = d.get('filename') or d.get('tmpfilename')
+        if not key:
+            return
+
+        with self._lock:
+            if d['status'] == 'downloading':
+                self._active[key] = {
+                    'downloaded': d.get('downloaded_bytes') or 0,
+                    'speed': d.get('speed') or 0,
+                }
+            elif d['status'] in ('finished', 'error'):
+                stats = self._active.pop(key, None)
+                if d['status'] == 'finished':
+                    self._finished_bytes += d.get('total_bytes') or (stats or {}).get('downloaded', 0)
+
+        self._maybe_print()
+
+    def add_jobs(self, count: int) -> None:
+        """Count downloads queued after the run started (streamed manifests)."""
+        with self._lock:
+            self.total += count
+
+    def mark_done(self, ok: bool) -> None:
+        """Record that one manifest download has finished."""
+        with self._lock:
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+        self._maybe_print(force=True)
+
+    def _maybe_print(self, force: bool = False) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_print < self.PRINT_INTERVAL:
+                return
+            self._last_print = now
+            downloaded = self._finished_bytes + sum(a['downloaded'] for a in self._active.values())
+            speed = sum(a['speed'] for a in self._active.values())
+            done = self.completed + self.failed
+            active = len(self._active)
+
+        elapsed = now - self._started
+        print(
+            f"\r[{done}/{self.total}] {active} active, "
+            f"{downloaded / 1024**2:.1f} MiB total, {speed / 1024**2:.1f} MiB/s, "
+            f"{self.failed} failed, {elapsed:.0f}s elapsed",
+            end='', flush=True
+        )
+
+
+class _WorkerYDLs:
+    """One YoutubeDL per worker thread, reused for every download it runs.
+
+    YoutubeDL is not thread-safe, but reusing an instance within a thread
+    keeps the extractor caches (player JS, signatures, cookies) warm instead
+    of rebuilding them for every video.
+    """
+
+    def __init__(self, ydl_opts: Dict[str, Any], progress: Optional[DownloadProgress] = None):
+        self._opts = ydl_opts
+        self._progress = progress
+        self._local = threading.local()
+        self._instances: List['yt_dlp.YoutubeDL'] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> 'yt_dlp.YoutubeDL':
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            opts = dict(self._opts)
+            if self._progress:
+                opts['progress_hooks'] = [self._progress.hook]
+            ydl = yt_dlp.YoutubeDL(opts)
+            self._local.ydl = ydl
+            with self._lock:
+                self._instances.append(ydl)
+        return ydl
+
+    def close(self) -> None:
+        for ydl in self._instances:
+            ydl.close()
+
+
+def _entry_jobs(entry: Dict[str, Any]) -> List[Tuple[str, str, Optional[str]]]:
+    """Flatten one manifest entry into (source_id, filename, merge_group) jobs.
+
+    merge_group is the entry title for parts of a merge group, else None.
+    """
+    if entry.get('merge_sources'):
+        # This is a merge entry - download all source videos
+        return [
+            (source_id, f"{entry['filename']}_part{i}", entry['title'])
+            for i, source_id in enumerate(entry['merge_sources'], 1)
+        ]
+    # Single video
+    return [(entry['source_id'], entry['filename'], None)]
+
+
+def _plan_group(
+    entry: Dict[str, Any],
+    pool: _WorkerYDLs,
+    quality: str,
+    mapper=map,
+    log=print
+) -> Dict[str, Tuple[Optional[str], Optional[Dict[str, Any]]]]:
+    """Extract every part of a merge group and plan one common format for them.
+
+    Args:
+        entry: Manifest entry with merge_sources
+        pool: Worker YoutubeDL instances used for extraction
+        quality: Quality cap
+        mapper: map-like callable used to run extractions (executor.map
+            for --jobs runs)
+        log: Callable used to report the plan
+
+    Returns:
+        Dict mapping part filename to (format selector, info dict). Parts of
+        groups without a common profile keep their info but get no selector,
+        so they fall back to the quality chain.
+    """
+    sources = entry['merge_sources']
+    with stage('extract'):
+        infos = list(mapper(lambda source_id: extract_info(pool.get(), source_id), sources))
+
+    plan = plan_group_formats(infos, quality)
+    if plan['formats']:
+        log(f"[PLAN] {entry['filename']}: {plan['video']} + {plan['audio']} (stream copy)")
+    else:
+        log(f"[PLAN] {entry['filename']}: merge will need re-encoding - {plan['reason']}")
+
+    formats = plan['formats'] or [None] * len(sources)
+    return {
+        f"{entry['filename']}_part{i}": (format_string, info)
+        for i, (format_string, info) in enumerate(zip(formats, infos), 1)
+    }
+
+
+def download_from_manifest(
+    manifest_path: Path,
+    output_dir: Path,
+    quality: str = '1080',
+    jobs: int = 1,
+    concurrent_fragments: int = 1,
+    plan_formats: bool = True,
+    filters: Optional[Dict[str, List[Any]]] = None
+) -> Dict[str, List[str]]:
+    """Download all videos from a manifest file.
+
+    Entries are read as a stream and downloaded as they are read, so large
+    JSON Lines manifests start immediately and can grow during the run.
+
+    Args:
+        manifest_path: Path to manifest file (.json or .jsonl)
+        output_dir: Directory to save videos
+        quality: Video quality
+        jobs: Number of videos to download at once
+        concurrent_fragments: Fragments to download in parallel per video
+        plan_formats: Pick one common format for all parts of each merge
+            group so they can be merged without re-encoding
+        filters: Optional act/year/show filters
+
+    Returns:
+        Dict with 'successful' and 'failed' filename lists
+    """
+    print(f"Processing manifest: {manifest_path.name}")
+    if filters:
+        print(f"Filter: {describe_filters(filters)}")
+    print()
+
+    downloads_dir = output_dir / 'downloads'
+    results: Dict[str, List[str]] = {'successful': [], 'failed': []}
+
+    # Concurrent runs keep yt-dlp quiet and report one aggregate status line
+    parallel = jobs > 1
+    progress = DownloadProgress() if parallel else None
+    pool = _WorkerYDLs(
+        build_ydl_opts(quality, concurrent_fragments, quiet=parallel),
+        progress
+    )
+    # Planned formats are popped as their part starts, so this only holds
+    # the groups currently in flight
+    planned: Dict[str, Tuple[Optional[str], Optional[Dict[str, Any]]]] = {}
+
+    def run(job: Tuple[str, str, Optional[str]]) -> Optional[Path]:
+        source_id, filename, _ = job
+        format_string, info = planned.pop(filename, (None, None))
+        return download_video(
+            source_id,
+            downloads_dir,
+            quality,
+            filename,
+            ydl=pool.get(),
+            format_string=format_string,
+            info=info
+        )
+
+    def entry_jobs(mapper=map, log=print) -> Iterator[List[Tuple[str, str, Optional[str]]]]:
+        for entry in iter_manifest(manifest_path, filters):
+            if plan_formats and entry.get('merge_sources'):
+                planned.update(_plan_group(entry, pool, quality, mapper, log))
+            yield _entry_jobs(entry)
+
+    try:
+        if not parallel:
+            for entry_downloads in entry_jobs():
+                merge_group = entry_downloads[0][2]
+                if merge_group:
+                    print(f"\n[MERGE GROUP] {merge_group}")
+                for job in entry_downloads:
+                    ok = run(job) is not None
+                    results['successful' if ok else 'failed'].append(job[1])
+        else:
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                print(f"Downloading with {jobs} workers ({concurrent_fragments} fragments each)\n")
+                pending: Dict[Any, str] = {}
+
+                def collect(futures) -> None:
+                    for future in futures:
+                        ok = future.result() is not None
+                        progress.mark_done(ok)
+                        results['successful' if ok else 'failed'].append(pending.pop(future))
+
+                # Keep a bounded window of queued downloads so the manifest
+                # is only read as fast as it is downloaded
+                # Plans are printed below the status line rather than onto it
+                for entry_downloads in entry_jobs(executor.map, lambda msg: print(f"\n{msg}")):
+                    progress.add_jobs(len(entry_downloads))
+                    for job in entry_downloads:
+                        while len(pending) >= jobs * 2:
+                            collect(wait(pending, return_when=FIRST_COMPLETED).done)
+                        pending[executor.submit(run, job)] = job[1]
+                collect(list(pending))
+            print()
+    finally:
+        pool.close()
+
+    print(f"\n{'='*60}")
+    print("DOWNLOAD SUMMARY")
+    print(f"{'='*60}")
+    print(f"Successful: {len(results['successful'])}")
+    print(f"Failed: {len(results['failed'])}")
+    for filename in results['failed']:
+        print(f"  - {filename}")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Download YouTube videos',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python download.py VIDEO_ID
+  python download.py "https://youtu.be/VIDEO_ID"
+  python download.py --manifest ../manifest.json
+  python download.py VIDEO_ID -o ./videos -q 720
+  python download.py --manifest ../manifest.json --jobs 4 --fragments 4
+  python download.py --manifest ../archive.jsonl --year 2017 --act Juggling
+        '''
+    )
+    parser.add_argument('url', nargs='?', help='YouTube URL or video ID')
+    parser.add_argument('-m', '--manifest', help='Path to manifest file (.json or .jsonl)')
+    parser.add_argument('-o', '--output', default='./output',
+                        help='Output directory (default: ./output)')
+    parser.add_argument('-q', '--quality', default='1080',
+                        choices=['best', '1080', '720', '480'],
+                        help='Video quality (default: 1080)')
+    parser.add_argument('-n', '--name', help='Custom filename (without extension)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of videos to download at once (default: 1)')
+    parser.add_argument('--fragments', type=int, default=1,
+                        help='Concurrent fragment downloads per video (default: 1)')
+    parser.add_argument('--no-format-plan', dest='plan_formats', action='store_false',
+                        help='Download merge-group parts independently instead of '
+                             'picking one common format per group')
+    add_filter_arguments(parser)
+    add_profile_argument(parser)
+
+    args = parser.parse_args()
+    output_dir = Path(args.output)
+    profiling.start(args.profile)
+
+    if args.manifest:
+        download_from_manifest(
+            Path(args.manifest),
+            output_dir,
+            args.quality,
+            jobs=args.jobs,
+            concurrent_fragments=args.fragments,
+            plan_formats=args.plan_formats,
+            filters=filters_from_args(args)
+        )
+    elif args.url:
+        download_video(
+            args.url,
+            output_dir / 'downloads',
+            args.quality,
+            args.name,
+            concurrent_fragments=args.fragments
+        )
+    else:
+        parser.print_help()
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""Perceptual fingerprints for spotting re-encoded duplicates.
+
+Exact file hashes miss the usual duplicate: the same performance as a
+different encode (a legacy-channel clip, a phone recording of it, a fan's
+re-upload). Fingerprints compare what the frames look like instead:
+
+1. Frames are sampled with ffmpeg as small grayscale images: one every
+   SAMPLE_SECONDS from local files, or YouTube's auto-generated thumbnails
+   (frames at 25/50/75%) for videos that haven't been downloaded.
+2. Black letterbox/pillarbox borders are trimmed and near-blank frames
+   dropped, then every frame gets a 64-bit DCT perceptual hash, computed
+   for all frames at once with NumPy.
+3. Hashes go into an on-disk index (hashes.npy, owners.npy, videos.json)
+   searched by vectorised Hamming distance. Two videos match when enough
+   frames of one have a near-identical frame in the other, which holds
+   across re-encodes, resizes, trims and thumbnails-vs-file comparisons.
+
+Needs numpy (pip install 'circus-tools[fingerprint]').
+"""
+
+import argparse
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from circus_tools import profiling
+from circus_tools.manifest import add_filter_arguments, describe_filters, filters_from_args, iter_manifest
+from circus_tools.merge import find_video_file
+from circus_tools.profiling import add_profile_argument, profiled
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Frame sampling: seconds between frames of local files (a 1s step keeps any
+# trim offset within half a second of a sampled frame), and the grayscale
+# size frames are decoded at (before border trimming)
+SAMPLE_SECONDS = 1
+DECODE_SIZE = 128
+
+# YouTube's auto-generated thumbnails, taken at about 25%, 50% and 75%
+THUMBNAIL_URL = 'https://i.ytimg.com/vi/{video_id}/{name}.jpg'
+THUMBNAIL_NAMES = ['hq1', 'hq2', 'hq3']
+
+# Rows/columns at the frame edge darker than this are letterbox borders;
+# frames flatter than MIN_FRAME_STD (fades, black, title cards) are dropped
+BORDER_LEVEL = 24
+MIN_FRAME_STD = 6.0
+
+# pHash: HASH_SIZE^2 DCT of the frame, keeping the low HASH_BITS_SIDE^2
+# coefficients
+HASH_SIZE = 32
+HASH_BITS_SIDE = 8
+
+# Matching: frames within FRAME_DISTANCE bits are the same picture; a video
+# matches when MATCH_FRACTION of the frames on either side are matched, and
+# at least MIN_MATCHED_FRAMES (or all, if fewer were sampled)
+FRAME_DISTANCE = 10
+MATCH_FRACTION = 0.5
+MIN_MATCHED_FRAMES = 2
+
+# Hash pairs (query frames x index frames) compared per NumPy block, bounding
+# search memory to a few tens of MB whatever the length of either side
+SEARCH_BLOCK = 1 << 20
+
+DEFAULT_INDEX_DIR = './output/fingerprints'
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("numpy is required for fingerprints: pip install 'circus-tools[fingerprint]'")
+
+
+def _decode_gray(cmd_input: List[str], video_filter: str) -> 'np.ndarray':
+    """Run ffmpeg on an input, returning DECODE_SIZE^2 grayscale frames (n, size, size)."""
+    cmd = [
+        'ffmpeg', '-v', 'error',
+        *cmd_input,
+        '-vf', f"{video_filter}scale={DECODE_SIZE}:{DECODE_SIZE}:flags=area,format=gray",
+        '-f', 'rawvideo',
+        '-'
+    ]
+    result = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True)
+    frame_bytes = DECODE_SIZE * DECODE_SIZE
+    usable = len(result.stdout) // frame_bytes * frame_bytes
+    if result.returncode != 0 and not usable:
+        return np.empty((0, DECODE_SIZE, DECODE_SIZE), dtype=np.uint8)
+    return np.frombuffer(result.stdout[:usable], dtype=np.uint8).reshape(-1, DECODE_SIZE, DECODE_SIZE)
+
+
+@profiled('extract')
+def sample_file(path: Path, keyframes_only: bool = False) -> 'np.ndarray':
+    """Decode one frame every SAMPLE_SECONDS of a local video."""
+    skip = ['-skip_frame', 'nokey'] if keyframes_only else []
+    return _decode_gray([*skip, '-i', str(path)], f"fps=1/{SAMPLE_SECONDS},")
+
+
+@profiled('download')
+def sample_youtube(video_id: str) -> 'np.ndarray':
+    """Fetch a YouTube video's auto-generated thumbnails (a few KB each) as frames."""
+    frames = [_decode_gray(['-i', THUMBNAIL_URL.format(video_id=video_id, name=name)], '')
+              for name in THUMBNAIL_NAMES]
+    return np.concatenate(frames) if frames else np.empty((0, DECODE_SIZE, DECODE_SIZE), np.uint8)
+
+
+def _trim_borders(frame: 'np.ndarray') -> 'np.ndarray':
+    """Cut dark rows and columns off the edges of a frame."""
+    rows = np.flatnonzero(frame.mean(axis=1) > BORDER_LEVEL)
+    cols = np.flatnonzero(frame.mean(axis=0) > BORDER_LEVEL)
+    if not len(rows) or not len(cols):
+        return frame[:0, :0]
+    return frame[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+
+
+def _block_resize(frame: 'np.ndarray', size: int) -> 'np.ndarray':
+    """Area-average a frame (at least size x size) down to size x size."""
+    rows = np.linspace(0, frame.shape[0], size + 1).astype(int)
+    cols = np.linspace(0, frame.shape[1], size + 1).astype(int)
+    sums = np.add.reduceat(np.add.reduceat(frame.astype(np.float32), rows[:-1], axis=0), cols[:-1], axis=1)
+    return sums / np.outer(np.diff(rows), np.diff(cols))
+
+
+def normalize_frames(frames: 'np.ndarray') -> 'np.ndarray':
+    """Trim borders, resize to HASH_SIZE^2 and drop near-blank frames."""
+    normalized = []
+    for frame in frames:
+        trimmed = _trim_borders(frame)
+        if min(trimmed.shape) < HASH_SIZE:
+            continue
+        small = _block_resize(trimmed, HASH_SIZE)
+        if small.std() >= MIN_FRAME_STD:
+            normalized.append(small)
+    return np.stack(normalized) if normalized else np.empty((0, HASH_SIZE, HASH_SIZE), np.float32)
+
+
+def _dct_matrix(size: int) -> 'np.ndarray':
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+
+def phash(frames: 'np.ndarray') -> 'np.ndarray':
+    """64-bit perceptual hashes of HASH_SIZE^2 frames, all frames at once.
+
+    Each bit says whether a low-frequency DCT coefficient is above the
+    median of the block (the DC term, which only tracks brightness, is
+    left out of the median).
+
+    Returns:
+        uint64 array, one hash per frame
+    """
+    if not len(frames):
+        return np.empty(0, dtype=np.uint64)
+    dct = _dct_matrix(HASH_SIZE)
+    coefficients = dct @ frames @ dct.T
+    low = coefficients[:, :HASH_BITS_SIDE, :HASH_BITS_SIDE].reshape(len(frames), -1)
+    bits = low > np.median(low[:, 1:], axis=1, keepdims=True)
+    return np.packbits(bits, axis=1).view('>u8').ravel().astype(np.uint64)
+
+
+def fingerprint_frames(frames: 'np.ndarray') -> 'np.ndarray':
+    """Hash sampled frames, dropping consecutive repeats (static shots)."""
+    hashes = phash(normalize_frames(frames))
+    if len(hashes) > 1:
+        hashes = hashes[np.concatenate([[True], hashes[1:] != hashes[:-1]])]
+    return hashes
+
+
+def hamming(a: 'np.ndarray', b: 'np.ndarray') -> 'np.ndarray':
+    """Pairwise Hamming distances between two uint64 hash arrays, shape (len(a), len(b))."""
+    xor = a[:, None] ^ b[None, :]
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(xor)
+    # NumPy < 2.0: count bits a byte at a time
+    table = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    return table[xor.view(np.uint8)].reshape(*xor.shape, 8).sum(axis=-1)
+
+
+class FingerprintIndex:
+    """Frame hashes of known videos, kept in a directory.
+
+    hashes.npy holds every frame hash, owners.npy the position in
+    videos.json ({'key', 'label', 'frames'}) of the video each belongs to.
+    Keys are 'youtube:<id>' or 'file:<name>'; adding a key again replaces
+    its hashes.
+    """
+
+    def __init__(self, directory: Path):
+        _require_numpy()
+        self.directory = directory
+        videos_path = directory / 'videos.json'
+        if videos_path.exists():
+            self.videos = json.loads(videos_path.read_text())
+            self.hashes = np.load(directory / 'hashes.npy')
+            self.owners = np.load(directory / 'owners.npy')
+        else:
+            self.videos = []
+            self.hashes = np.empty(0, dtype=np.uint64)
+            self.owners = np.empty(0, dtype=np.uint32)
+        self._positions = {video['key']: i for i, video in enumerate(self.videos)}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    def __len__(self) -> int:
+        return len(self.videos)
+
+    def add(self, key: str, label: str, hashes: 'np.ndarray') -> None:
+        position = self._positions.get(key)
+        if position is None:
+            position = len(self.videos)
+            self.videos.append({'key': key})
+            self._positions[key] = position
+        else:
+            keep = self.owners != position
+            self.hashes, self.owners = self.hashes[keep], self.owners[keep]
+        self.videos[position].update(label=label, frames=len(hashes))
+        self.hashes = np.concatenate([self.hashes, hashes.astype(np.uint64)])
+        self.owners = np.concatenate([self.owners, np.full(len(hashes), position, dtype=np.uint32)])
+
+    def save(self) -> None:
+        """Write the index, replacing each file only once it is complete."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for name, array in (('hashes.npy', self.hashes), ('owners.npy', self.owners)):
+            partial = self.directory / f"{name}.partial"
+            with open(partial, 'wb') as f:
+                np.save(f, array)
+            os.replace(partial, self.directory / name)
+        partial = self.directory / 'videos.json.partial'
+        partial.write_text(json.dumps(self.videos))
+        os.replace(partial, self.directory / 'videos.json')
+
+    @profiled('hash')
+    def search(
+        self,
+        hashes: 'np.ndarray',
+        max_distance: int = FRAME_DISTANCE,
+        exclude: Tuple[str, ...] = ()
+    ) -> List[Dict[str, Any]]:
+        """Find indexed videos that share enough near-identical frames.
+
+        Args:
+            hashes: Frame hashes of the video to look up
+            max_distance: Largest Hamming distance counted as the same frame
+            exclude: Keys never reported (the video itself)
+
+        Returns:
+            Matches, best first, each with key, label, score (share of
+            frames matched, on whichever side it is higher) and matched
+            (frames matched on that side)
+        """
+        if not len(hashes) or not len(self.hashes):
+            return []
+
+        query_step = min(len(hashes), SEARCH_BLOCK)
+        index_step = max(1, SEARCH_BLOCK // query_step)
+        query_frames, index_frames = [], []
+        for query_start in range(0, len(hashes), query_step):
+            query = hashes[query_start:query_start + query_step]
+            for start in range(0, len(self.hashes), index_step):
+                block = self.hashes[start:start + index_step]
+                i, j = np.nonzero(hamming(query, block) <= max_distance)
+                query_frames.append(i + query_start)
+                index_frames.append(j + start)
+        i = np.concatenate(query_frames)
+        j = np.concatenate(index_frames)
+        if not len(i):
+            return []
+
+        count = len(self.videos)
+        owners = self.owners[j].astype(np.int64)
+        # Distinct query frames matched per video, and distinct indexed frames matched
+        query_matched = np.bincount(np.unique(owners * len(hashes) + i) // len(hashes), minlength=count)
+        index_matched = np.bincount(self.owners[np.unique(j)], minlength=count)
+        frames = np.bincount(self.owners, minlength=count)
+
+        query_score = query_matched / len(hashes)
+        index_score = index_matched / np.maximum(frames, 1)
+        score = np.maximum(query_score, index_score)
+        matched = np.where(query_score >= index_score, query_matched, index_matched)
+        needed = np.minimum(MIN_MATCHED_FRAMES, np.minimum(len(hashes), frames))
+
+        results = []
+        for position in np.flatnonzero((score >= MATCH_FRACTION) & (matched >= needed)):
+            video = self.videos[position]
+            if video['key'] in exclude:
+                continue
+            results.append({
+                'key': video['key'],
+                'label': video['label'],
+                'score': round(float(score[position]), 2),
+                'matched': int(matched[position]),
+            })
+        results.sort(key=lambda match: -match['score'])
+        return results
+
+
+def _file_targets(paths: List[Path]) -> Iterator[Tuple[str, str, Path]]:
+    """(key, label, path) for video files, expanding directories."""
+    for path in paths:
+        files = sorted(p for p in path.iterdir() if p.is_file()) if path.is_dir() else [path]
+        for file in files:
+            yield f"file:{file.resolve()}", file.name, file
+
+
+def _manifest_files(manifest_path: Path, output_dir: Path, filters) -> Iterator[Tuple[str, str, Path]]:
+    """(key, label, path) for every downloaded or merged manifest video."""
+    for entry in iter_manifest(manifest_path, filters):
+        source_dir = output_dir / ('merged' if entry.get('merge_sources') else 'downloads')
+        path = find_video_file(source_dir, entry['filename'])
+        if path:
+            yield f"file:{entry['filename']}", entry['title'], path
+        else:
+            print(f"[SKIP] Not downloaded: {entry['filename']}")
+
+
+def _manifest_sources(manifest_path: Path, filters) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """(key, label, entry) for every YouTube source of a manifest, before download."""
+    for entry in iter_manifest(manifest_path, filters):
+        for source_id in entry.get('merge_sources') or [entry.get('source_id')]:
+            if source_id:
+                yield f"youtube:{source_id}", f"{entry['title']} ({source_id})", entry
+
+
+def _fingerprint_target(target: Tuple[str, str, Any], keyframes_only: bool) -> 'np.ndarray':
+    key, _, source = target
+    if key.startswith('youtube:'):
+        return fingerprint_frames(sample_youtube(key.split(':', 1)[1]))
+    return fingerprint_frames(sample_file(source, keyframes_only))
+
+
+def fingerprint_all(
+    targets: Iterator[Tuple[str, str, Any]],
+    jobs: int,
+    keyframes_only: bool = False
+) -> Iterator[Tuple[Tuple[str, str, Any], 'np.ndarray']]:
+    """Fingerprint targets in parallel (ffmpeg and downloads run outside the GIL)."""
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [(target, executor.submit(_fingerprint_target, target, keyframes_only))
+                   for target in targets]
+        for target, future in futures:
+            yield target, future.result()
+
+
+def _archive_targets(index: FingerprintIndex, force: bool) -> Iterator[Tuple[str, str, None]]:
+    from circus_tools.db import fetch_archive_videos, get_db_connection
+
+    conn = get_db_connection()
+    try:
+        rows = fetch_archive_videos(conn)
+    finally:
+        conn.close()
+    for youtube_id, row in rows.items():
+        key = f"youtube:{youtube_id}"
+        if force or key not in index:
+            yield key, row['title'], None
+
+
+def _discovered_targets() -> Iterator[Tuple[str, str, None]]:
+    from circus_tools.db import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT youtube_id, raw_title FROM discovered_videos
+                WHERE status = 'PENDING'
+                ORDER BY created_at
+            """)
+            rows = cur.fetchall()
+    finally:
+        conn.close()
+    for youtube_id, title in rows:
+        yield f"youtube:{youtube_id}", title, None
+
+
+def add_to_index(index: FingerprintIndex, targets, jobs: int, keyframes_only: bool) -> Dict[str, List]:
+    """Fingerprint targets and add them to the index (saved by the caller)."""
+    results = {'added': [], 'failed': []}
+    for (key, label, _), hashes in fingerprint_all(targets, jobs, keyframes_only):
+        if not len(hashes):
+            print(f"[ERROR] No usable frames: {label}")
+            results['failed'].append({'key': key, 'label': label})
+            continue
+        index.add(key, label, hashes)
+        print(f"[OK] {label}: {len(hashes)} frames")
+        results['added'].append({'key': key, 'label': label, 'frames': len(hashes)})
+    return results
+
+
+def check_against_index(
+    index: FingerprintIndex,
+    targets,
+    jobs: int,
+    max_distance: int,
+    keyframes_only: bool = False
+) -> Dict[str, List]:
+    """Look every target up in the index.
+
+    Returns:
+        Dict with 'duplicates' (target plus its matches), 'unique' and
+        'failed' targets; each item carries the target's third field as
+        'source' (path or manifest entry)
+    """
+    results = {'duplicates': [], 'unique': [], 'failed': []}
+    for (key, label, source), hashes in fingerprint_all(targets, jobs, keyframes_only):
+        item = {'key': key, 'label': label, 'source': source}
+        if not len(hashes):
+            print(f"[WARN] No usable frames: {label}")
+            results['failed'].append(item)
+            continue
+
+        exclude = (key,)
+        if isinstance(source, dict):
+            exclude += (f"file:{source['filename']}",)
+        matches = index.search(hashes, max_distance, exclude)
+        if matches:
+            best = matches[0]
+            print(f"[DUPLICATE] {label} -> {best['label']} "
+                  f"({best['score']:.0%} of frames, {best['matched']} matched)")
+            results['duplicates'].append(dict(item, matches=matches))
+        else:
+            results['unique'].append(item)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Index video fingerprints and flag likely re-encoded duplicates',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Index the archive (from YouTube thumbnails) and the local downloads
+  python fingerprint.py add --archive
+  python fingerprint.py add --manifest manifest.json --output-dir ./output
+
+  # Check discovery candidates and a phone recording against the index
+  python fingerprint.py check --discovered
+  python fingerprint.py check phone_upload.mov
+
+  # Check a manifest before downloading, keeping only entries with no match
+  python fingerprint.py check --manifest remaining.jsonl -o remaining-unique.jsonl
+
+Archive and discovery lookups need DATABASE_PUBLIC_URL and pip install 'circus-tools[db]'.
+        '''
+    )
+    parser.add_argument('action', choices=['add', 'check'], help='Add videos to the index, or look them up')
+    parser.add_argument('files', nargs='*', help='Video files or directories')
+    parser.add_argument('--youtube', action='append', default=[], metavar='ID',
+                        help='YouTube video ID, fingerprinted from its thumbnails (repeatable)')
+    parser.add_argument('--manifest', help='Manifest (.json or .jsonl): add indexes its downloaded/merged '
+                                           'files, check looks up its YouTube sources before download')
+    parser.add_argument('--output-dir', default='./output',
+                        help='With add --manifest: base output directory (default: ./output)')
+    parser.add_argument('--archive', action='store_true',
+                        help='add: every video in the archive database not yet indexed')
+    parser.add_argument('--discovered', action='store_true',
+                        help='check: every PENDING discovered_videos candidate')
+    parser.add_argument('--index', default=DEFAULT_INDEX_DIR,
+                        help=f'Index directory (default: {DEFAULT_INDEX_DIR})')
+    parser.add_argument('--distance', type=int, default=FRAME_DISTANCE,
+                        help=f'Max Hamming distance between matching frames (default: {FRAME_DISTANCE})')
+    parser.add_argument('--keyframes', action='store_true',
+                        help='Sample keyframes only (much faster on long files, coarser timing)')
+    parser.add_argument('--force', action='store_true', help='add --archive: re-index videos already indexed')
+    parser.add_argument('-j', '--jobs', type=int, default=4, help='Videos fingerprinted at once (default: 4)')
+    parser.add_argument('-o', '--output', help='check --manifest: write entries without a match to this .jsonl')
+    parser.add_argument('--report', help='check: write the findings to this JSON file')
+    add_filter_arguments(parser)
+    add_profile_argument(parser)
+
+    args = parser.parse_args()
+    profiling.start(args.profile)
+
+    try:
+        index = FingerprintIndex(Path(args.index))
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 1
+    filters = filters_from_args(args)
+    if filters and args.manifest:
+        print(f"Filter: {describe_filters(filters)}")
+
+    targets = [
+        *_file_targets([Path(f) for f in args.files]),
+        *((f"youtube:{video_id}", video_id, None) for video_id in args.youtube),
+    ]
+
+    try:
+        if args.action == 'add':
+            if args.manifest:
+                targets.extend(_manifest_files(Path(args.manifest), Path(args.output_dir), filters))
+            if args.archive:
+                targets.extend(_archive_targets(index, args.force))
+        else:
+            if args.manifest:
+                targets.extend(_manifest_sources(Path(args.manifest), filters))
+            if args.discovered:
+                targets.extend(_discovered_targets())
+    except (RuntimeError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    if not targets:
+        parser.error('nothing to fingerprint: give files, --youtube, --manifest, --archive or --discovered')
+
+    print(f"Index: {args.index} ({len(index)} videos)")
+    print(f"Fingerprinting {len(targets)} videos\n")
+
+    if args.action == 'add':
+        try:
+            results = add_to_index(index, targets, args.jobs, args.keyframes)
+        finally:
+            index.save()
+        print(f"\n{'='*60}")
+        print("FINGERPRINT INDEX SUMMARY")
+        print(f"{'='*60}")
+        print(f"Added: {len(results['added'])}")
+        print(f"Failed: {len(results['failed'])}")
+        print(f"Index: {len(index)} videos, {len(index.hashes)} frames")
+        return 0
+
+    results = check_against_index(index, targets, args.jobs, args.distance, args.keyframes)
+
+    if args.output and args.manifest:
+        flagged = {id(item['source']) for item in results['duplicates']}
+        written = 0
+        with open(args.output, 'w') as out:
+            for entry in {id(source): source for _, _, source in targets if isinstance(source, dict)}.values():
+                if id(entry) not in flagged:
+                    out.write(json.dumps(entry) + '\n')
+                    written += 1
+        print(f"\nWrote {written} entries without a match to {args.output}")
+
+    if args.report:
+        report = {kind: [{k: v for k, v in item.items() if k != 'source'} for item in items]
+                  for kind, items in results.items()}
+        Path(args.report).write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.report}")
+
+    print(f"\n{'='*60}")
+    print("DUPLICATE CHECK SUMMARY")
+    print(f"{'='*60}")
+    print(f"Likely duplicates: {len(results['duplicates'])}")
+    print(f"No match: {len(results['unique'])}")
+    print(f"Not fingerprinted: {len(results['failed'])}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
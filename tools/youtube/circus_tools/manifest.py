@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Read manifests as a stream of entries, in JSON or JSON Lines format.
+
+A JSON manifest holds every entry in one 'videos' array and is loaded whole.
+A JSON Lines manifest (.jsonl / .ndjson) holds one entry object per line and
+is read a line at a time, so memory use doesn't grow with its size and new
+entries can be appended while a pipeline is reading it.
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+JSONL_SUFFIXES = {'.jsonl', '.ndjson'}
+
+FILTER_FIELDS = ('act', 'year', 'show')
+
+
+def is_jsonl(manifest_path: Path) -> bool:
+    return manifest_path.suffix.lower() in JSONL_SUFFIXES
+
+
+def _warn_invalid(location: str, message: str) -> None:
+    print(f"[WARN] Manifest {location}: {message}, skipping")
+
+
+def matches(entry: Dict[str, Any], filters: Optional[Dict[str, List[Any]]]) -> bool:
+    """Check an entry against act/year/show filters.
+
+    Each filter field holds a list of accepted values; an entry must match
+    one value of every field given. Act and show compare case-insensitively.
+    """
+    for field, wanted in (filters or {}).items():
+        if not wanted:
+            continue
+        value = entry.get(field)
+        if field == 'year':
+            if value not in wanted:
+                return False
+        elif not isinstance(value, str) or value.casefold() not in {w.casefold() for w in wanted}:
+            return False
+    return True
+
+
+def _read_jsonl(
+    manifest_path: Path,
+    on_invalid: Callable[[str, str], None]
+) -> Iterator[Any]:
+    with open(manifest_path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                if not line.endswith('\n'):
+                    # A writer is probably still appending this line
+                    on_invalid(f"line {line_number}", 'incomplete last line')
+                else:
+                    on_invalid(f"line {line_number}", f"invalid JSON ({e})")
+
+
+def _read_json(
+    manifest_path: Path,
+    on_invalid: Callable[[str, str], None]
+) -> Iterator[Any]:
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('videos'), list):
+        on_invalid('top level', "expected an object with a 'videos' list")
+        return
+    yield from manifest['videos']
+
+
+def iter_manifest(
+    manifest_path: Path,
+    filters: Optional[Dict[str, List[Any]]] = None,
+    on_invalid: Optional[Callable[[str, str], None]] = None
+) -> Iterator[Dict[str, Any]]:
+    """Yield manifest entries one at a time.
+
+    JSON Lines files are read lazily: lines appended before the reader
+    reaches the end of the file are picked up by the same run.
+
+    Args:
+        manifest_path: Path to a .json or .jsonl manifest
+        filters: Optional act/year/show filters (see matches())
+        on_invalid: Called with (location, message) for entries that can't
+            be used; defaults to printing a warning
+
+    Yields:
+        Entry dicts matching the filters
+    """
+    on_invalid = on_invalid or _warn_invalid
+    reader = _read_jsonl if is_jsonl(manifest_path) else _read_json
+
+    for index, entry in enumerate(reader(manifest_path, on_invalid)):
+        if not isinstance(entry, dict):
+            on_invalid(f"entry {index + 1}", 'not an object')
+            continue
+        if matches(entry, filters):
+            yield entry
+
+
+def add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add --act/--year/--show manifest filters to a CLI."""
+    group = parser.add_argument_group('manifest filters (repeat to accept several values)')
+    group.add_argument('--act', dest='filter_act', action='append', metavar='ACT',
+                       help='Only entries for this act')
+    group.add_argument('--year', dest='filter_year', action='append', type=int, metavar='YEAR',
+                       help='Only entries from this year')
+    group.add_argument('--show', dest='filter_show', action='append', metavar='SHOW',
+                       help='Only entries from this show')
+
+
+def filters_from_args(args: argparse.Namespace) -> Dict[str, List[Any]]:
+    return {
+        field: getattr(args, f"filter_{field}")
+        for field in FILTER_FIELDS
+        if getattr(args, f"filter_{field}", None)
+    }
+
+
+def describe_filters(filters: Optional[Dict[str, List[Any]]]) -> str:
+    return ', '.join(
+        f"{field}={'|'.join(str(v) for v in values)}"
+        for field, values in (filters or {}).items() if values
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert or filter a manifest into JSON Lines',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python manifest.py ../manifest.json -o ../manifest.jsonl
+  python manifest.py ../archive.jsonl --year 2017 --act Juggling -o juggling_2017.jsonl
+  python manifest.py ../manifest.json --show "Callaway Gardens"
+        '''
+    )
+    parser.add_argument('manifest', help='Path to manifest (.json or .jsonl)')
+    parser.add_argument('-o', '--output',
+                        help='Append matching entries to this .jsonl file (default: print)')
+    add_filter_arguments(parser)
+
+    args = parser.parse_args()
+
+    filters = filters_from_args(args)
+    entries = iter_manifest(Path(args.manifest), filters)
+
+    count = 0
+    if args.output:
+        with open(args.output, 'a') as out:
+            for entry in entries:
+                out.write(json.dumps(entry) + '\n')
+                count += 1
+        print(f"Wrote {count} entries to {args.output}")
+    else:
+        for entry in entries:
+            print(json.dumps(entry))
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
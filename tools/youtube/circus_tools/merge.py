@@ -0,0 +1,1220 @@
+#!/usr/bin/env python3
+"""Merge multiple video files using ffmpeg."""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from circus_tools import profiling
+from circus_tools.manifest import add_filter_arguments, describe_filters, filters_from_args, iter_manifest
+from circus_tools.profiling import add_profile_argument, profiled, stage
+
+# Encoders used to normalise outlier parts to the majority stream profile
+VIDEO_ENCODERS = {'h264': 'libx264', 'hevc': 'libx265'}
+AUDIO_ENCODERS = {'aac': 'aac', 'mp3': 'libmp3lame', 'opus': 'libopus'}
+
+# Full re-encode settings
+REENCODE_PRESET = 'medium'
+REENCODE_CRF = '23'
+AUDIO_BITRATE = '192k'
+
+# Outliers sit next to untouched parts, so encode them close to transparent
+NORMALIZE_CRF = '18'
+
+# ffmpeg output handling: stderr lines kept for error reports, and seconds
+# between progress lines
+STDERR_TAIL_LINES = 40
+PROGRESS_INTERVAL = 5.0
+
+# Chunked re-encode: default segment length (split lands on the next keyframe)
+DEFAULT_CHUNK_SECONDS = 120
+
+# Stream properties that must match for the concat demuxer to stream-copy
+PROFILE_FIELDS = [
+    'vcodec', 'vprofile', 'width', 'height', 'pix_fmt', 'fps', 'time_base',
+    'acodec', 'sample_rate', 'channels',
+]
+
+
+def merge_videos(
+    input_files: List[Path],
+    output_path: Path,
+    reencode: bool = False,
+    threads: Optional[int] = None,
+    plan: Optional[Dict[str, Any]] = None,
+    chunk_seconds: Optional[int] = None,
+    incremental: bool = True,
+    cpu_budget: Optional['CpuBudget'] = None,
+    show_progress: bool = True
+) -> Optional[Path]:
+    """Merge multiple video files into one.
+
+    By default the inputs are probed and only parts whose streams differ
+    from the majority are re-encoded before everything is joined with
+    stream copy.
+
+    Args:
+        input_files: List of input video file paths (in order)
+        output_path: Output file path
+        reencode: If True, re-encode every input (slowest, last resort)
+        threads: ffmpeg -threads for encodes (None lets ffmpeg decide)
+        plan: Result of plan_merge, if the inputs were already probed
+        chunk_seconds: If set, full re-encodes split the timeline into
+            segments of about this length and encode them in parallel,
+            resuming from finished segments after an interruption
+        incremental: Skip the merge if the output's merge record shows it
+            was built from the same inputs with the same settings
+        cpu_budget: Shared budget a stream-copy merge takes threads from
+            if it has to fall back to re-encoding
+        show_progress: Print ffmpeg progress (off when groups run in parallel)
+
+    Returns:
+        Path to merged file, or None if failed
+    """
+    # Verify all input files exist
+    for f in input_files:
+        if not f.exists():
+            print(f"[ERROR] Input file not found: {f}")
+            return None
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    settings = merge_settings(reencode, chunk_seconds)
+    if incremental and is_merge_up_to_date(input_files, output_path, settings):
+        print(f"[SKIP] Up to date: {output_path}")
+        return output_path
+
+    print(f"\n{'='*60}")
+    print(f"Merging {len(input_files)} videos")
+    print(f"Output: {output_path}")
+    print(f"{'='*60}")
+
+    for i, f in enumerate(input_files, 1):
+        print(f"  {i}. {f.name}")
+
+    with stage('merge'):
+        if reencode:
+            # Re-encode method (slower but handles different codecs)
+            merged = _merge_reencode(
+                input_files, output_path, threads, chunk_seconds, show_progress=show_progress
+            )
+        else:
+            # Probe, normalise outliers, then concat demuxer (fast)
+            merged = _merge_smart(
+                input_files, output_path, plan, threads, chunk_seconds, cpu_budget, show_progress
+            )
+
+    if merged:
+        write_merge_record(input_files, output_path, settings)
+    return merged
+
+
+def merge_settings(reencode: bool = False, chunk_seconds: Optional[int] = None) -> Dict[str, Any]:
+    """Settings that affect a merge's output, as stored in its merge record."""
+    return {
+        'mode': 'reencode' if reencode else 'smart',
+        'chunk_seconds': chunk_seconds,
+        'preset': REENCODE_PRESET,
+        'crf': REENCODE_CRF,
+        'normalize_crf': NORMALIZE_CRF,
+        'audio_bitrate': AUDIO_BITRATE,
+    }
+
+
+def _merge_record_path(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.name}.merge.json")
+
+
+@profiled('hash')
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_record(path: Path, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Size, mtime and content hash of a file.
+
+    The hash is only recomputed when size or mtime differ from the previous
+    record, so unchanged multi-GB inputs are never re-read.
+    """
+    stat = path.stat()
+    record = {'name': path.name, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if previous and all(previous.get(k) == record[k] for k in ('name', 'size', 'mtime_ns')):
+        record['sha256'] = previous['sha256']
+    else:
+        record['sha256'] = _file_sha256(path)
+    return record
+
+
+def _read_merge_record(output_path: Path) -> Optional[Dict[str, Any]]:
+    record_path = _merge_record_path(output_path)
+    if not record_path.exists():
+        return None
+    try:
+        return json.loads(record_path.read_text())
+    except ValueError:
+        return None
+
+
+def is_merge_up_to_date(
+    input_files: List[Path],
+    output_path: Path,
+    settings: Dict[str, Any]
+) -> bool:
+    """Check a merged output against its merge record, make-style.
+
+    The output is current when it is unchanged since it was recorded, the
+    settings match, and every input has the same content. Inputs whose
+    size and mtime match are trusted without hashing; touched inputs are
+    re-hashed, and if their content is unchanged the record is refreshed
+    instead of rebuilding.
+    """
+    record = _read_merge_record(output_path)
+    if not record or not output_path.exists():
+        return False
+
+    stat = output_path.stat()
+    output = record.get('output', {})
+    if output.get('size') != stat.st_size or output.get('mtime_ns') != stat.st_mtime_ns:
+        return False
+    if record.get('settings') != settings:
+        return False
+
+    previous_inputs = record.get('inputs', [])
+    if len(previous_inputs) != len(input_files):
+        return False
+
+    current = [_file_record(f, prev) for f, prev in zip(input_files, previous_inputs)]
+    if [c['sha256'] for c in current] != [p.get('sha256') for p in previous_inputs]:
+        return False
+
+    if current != previous_inputs:
+        record['inputs'] = current
+        _merge_record_path(output_path).write_text(json.dumps(record, indent=2))
+    return True
+
+
+def write_merge_record(
+    input_files: List[Path],
+    output_path: Path,
+    settings: Dict[str, Any]
+) -> None:
+    """Store the inputs and settings a merged output was built from."""
+    with ThreadPoolExecutor(max_workers=min(4, len(input_files))) as executor:
+        inputs = list(executor.map(_file_record, input_files))
+
+    stat = output_path.stat()
+    record = {
+        'settings': settings,
+        'inputs': inputs,
+        'output': {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns},
+    }
+    _merge_record_path(output_path).write_text(json.dumps(record, indent=2))
+
+
+def probe_video(path: Path) -> Optional[Dict[str, Any]]:
+    """Run ffprobe on a file.
+
+    Returns:
+        Parsed ffprobe JSON (streams and format), or None if probing failed
+    """
+    cmd = [
+        'ffprobe',
+        '-v', 'error',
+        '-print_format', 'json',
+        '-show_streams',
+        '-show_format',
+        str(path)
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"[ERROR] ffprobe failed for {path.name}: {result.stderr.strip()}")
+        return None
+    return json.loads(result.stdout)
+
+
+def _total_duration(input_files: List[Path]) -> Optional[float]:
+    """Sum of the inputs' durations in seconds, or None if any is unknown."""
+    total = 0.0
+    for f in input_files:
+        probe = probe_video(f)
+        duration = probe and probe.get('format', {}).get('duration')
+        if not duration:
+            return None
+        total += float(duration)
+    return total
+
+
+def _format_seconds(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def _format_progress(stats: Dict[str, str], duration: Optional[float]) -> str:
+    """Render one ffmpeg -progress block as percent, fps, speed and ETA."""
+    try:
+        # out_time_ms is also in microseconds (a long-standing ffmpeg quirk)
+        done = int(stats.get('out_time_us') or stats.get('out_time_ms') or 0) / 1_000_000
+    except ValueError:
+        done = 0.0
+    try:
+        speed = float(stats.get('speed', '').rstrip('x'))
+    except ValueError:
+        speed = 0.0
+
+    position = f"{min(100.0, done / duration * 100):5.1f}%" if duration else _format_seconds(done)
+    speed_text = f"{speed:.2f}x" if speed else '?'
+    line = f"{position}  fps={stats.get('fps', '?')}  speed={speed_text}"
+    if duration and speed:
+        line += f"  ETA {_format_seconds(max(0.0, duration - done) / speed)}"
+    return line
+
+
+def run_ffmpeg(
+    cmd: List[str],
+    what: str,
+    duration: Optional[float] = None,
+    show_progress: bool = True
+) -> bool:
+    """Run ffmpeg, reporting live progress and keeping only a stderr tail.
+
+    ffmpeg's machine-readable ``-progress`` output is read from stdout as it
+    is produced, while stderr is drained on a background thread into a
+    bounded buffer, so memory stays flat however long the job runs.
+
+    Args:
+        cmd: ffmpeg command line (starting with 'ffmpeg')
+        what: Description used in progress and error messages
+        duration: Expected output duration in seconds, for percent and ETA
+        show_progress: Print progress lines (off for parallel segment jobs)
+
+    Returns:
+        True if ffmpeg succeeded
+    """
+    cmd = [cmd[0], '-nostats', '-progress', 'pipe:1', *cmd[1:]]
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors='replace'
+    )
+
+    stderr_tail: deque = deque(maxlen=STDERR_TAIL_LINES)
+
+    def drain_stderr():
+        for line in process.stderr:
+            stderr_tail.append(line.rstrip())
+
+    reader = threading.Thread(target=drain_stderr, daemon=True)
+    reader.start()
+
+    interactive = sys.stdout.isatty()
+    stats: Dict[str, str] = {}
+    last_print = 0.0
+    printed = False
+
+    for line in process.stdout:
+        key, _, value = line.strip().partition('=')
+        stats[key] = value
+        if key != 'progress' or not show_progress:
+            continue
+
+        now = time.monotonic()
+        if value == 'end' or now - last_print >= PROGRESS_INTERVAL:
+            last_print = now
+            printed = True
+            status = f"{what}: {_format_progress(stats, duration)}"
+            if interactive:
+                print(f"\r{status}", end='', flush=True)
+            else:
+                print(status, flush=True)
+
+    process.wait()
+    reader.join()
+
+    if printed and interactive:
+        print()
+
+    if process.returncode != 0:
+        print(f"[ERROR] ffmpeg failed {what} (exit code {process.returncode}):")
+        for line in stderr_tail:
+            print(f"  {line}")
+        return False
+    return True
+
+
+def _video_duration(video: Dict[str, Any]) -> float:
+    """Duration of a video stream in seconds, 0 when ffprobe doesn't know it.
+
+    Falls back to frame count over frame rate for containers (Matroska,
+    WebM) that only record the duration on the format.
+    """
+    if video.get('duration'):
+        return float(video['duration'])
+    frames = int(video.get('nb_frames') or 0)
+    num, _, den = (video.get('avg_frame_rate') or '').partition('/')
+    try:
+        rate = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+    return frames / rate if frames and rate else 0.0
+
+
+def stream_profile(probe: Dict[str, Any]) -> Dict[str, Any]:
+    """Summarise the first video and audio stream of an ffprobe result.
+
+    Audio fields are None when the file has no audio stream. duration is
+    the container's, video_duration the video stream's (0 when unknown).
+    """
+    streams = probe.get('streams', [])
+    video = next((st for st in streams if st.get('codec_type') == 'video'), {})
+    audio = next((st for st in streams if st.get('codec_type') == 'audio'), {})
+
+    return {
+        'vcodec': video.get('codec_name'),
+        'vprofile': (video.get('profile') or '').lower().replace('constrained ', '') or None,
+        'width': video.get('width'),
+        'height': video.get('height'),
+        'pix_fmt': video.get('pix_fmt'),
+        'fps': video.get('r_frame_rate'),
+        'time_base': video.get('time_base'),
+        'acodec': audio.get('codec_name'),
+        'sample_rate': audio.get('sample_rate'),
+        'channels': audio.get('channels'),
+        'channel_layout': audio.get('channel_layout'),
+        'audio_bit_rate': audio.get('bit_rate'),
+        'duration': float(probe.get('format', {}).get('duration') or 0),
+        'video_duration': _video_duration(video),
+    }
+
+
+def _profile_key(profile: Dict[str, Any]) -> tuple:
+    return tuple(profile[field] for field in PROFILE_FIELDS)
+
+
+def _describe_profile(profile: Dict[str, Any]) -> str:
+    video = (f"{profile['vcodec']} {profile['width']}x{profile['height']} "
+             f"{profile['pix_fmt']} {profile['fps']}fps tb={profile['time_base']}")
+    if not profile['acodec']:
+        return f"{video}, no audio"
+    return f"{video}, {profile['acodec']} {profile['sample_rate']}Hz {profile['channels']}ch"
+
+
+def _describe_mismatch(profile: Dict[str, Any], target: Dict[str, Any]) -> str:
+    return ', '.join(
+        f"{field} {profile[field]} != {target[field]}"
+        for field in PROFILE_FIELDS
+        if profile[field] != target[field]
+    )
+
+
+def _normalize_part(
+    input_file: Path,
+    output_path: Path,
+    source: Dict[str, Any],
+    target: Dict[str, Any],
+    threads: Optional[int] = None,
+    show_progress: bool = True
+) -> bool:
+    """Re-encode one part so its streams match the target profile.
+
+    The picture is scaled to fit and padded, so parts with a different
+    aspect ratio are letterboxed rather than stretched. A silent track is
+    added when the target has audio and the part has none.
+    """
+    width, height = target['width'], target['height']
+    video_filter = (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+        f"fps={target['fps']},format={target['pix_fmt']}"
+    )
+
+    cmd = ['ffmpeg', '-i', str(input_file)]
+    source_has_audio = bool(source['acodec'])
+
+    if target['acodec'] and not source_has_audio:
+        layout = target['channel_layout'] or ('stereo' if target['channels'] == 2 else 'mono')
+        cmd.extend([
+            '-f', 'lavfi',
+            '-i', f"anullsrc=channel_layout={layout}:sample_rate={target['sample_rate']}"
+        ])
+
+    cmd.extend(['-map', '0:v:0'])
+    if target['acodec']:
+        cmd.extend(['-map', '0:a:0' if source_has_audio else '1:a:0'])
+
+    cmd.extend([
+        '-vf', video_filter,
+        '-c:v', VIDEO_ENCODERS[target['vcodec']],
+        '-preset', REENCODE_PRESET,
+        '-crf', NORMALIZE_CRF,
+    ])
+    if target['vcodec'] == 'h264' and target['vprofile']:
+        cmd.extend(['-profile:v', target['vprofile']])
+    if target['time_base'] and '/' in target['time_base']:
+        cmd.extend(['-video_track_timescale', target['time_base'].split('/')[1]])
+    if threads:
+        cmd.extend(['-threads', str(threads)])
+
+    if target['acodec']:
+        cmd.extend([
+            '-c:a', AUDIO_ENCODERS[target['acodec']],
+            '-ar', str(target['sample_rate']),
+            '-ac', str(target['channels']),
+            '-b:a', target['audio_bit_rate'] or AUDIO_BITRATE,
+        ])
+        if not source_has_audio:
+            cmd.append('-shortest')
+    else:
+        cmd.append('-an')
+
+    cmd.extend(['-y', str(output_path)])
+
+    return run_ffmpeg(
+        cmd, f"normalising {input_file.name}", source['duration'] or None, show_progress=show_progress
+    )
+
+
+def plan_merge(input_files: List[Path]) -> Dict[str, Any]:
+    """Probe inputs and decide how they can be merged.
+
+    The most common stream profile wins (ties go to the earliest part);
+    parts that differ from it are outliers.
+
+    Returns:
+        Dict with 'mode' ('copy' when every part matches, 'normalize' when
+        only outliers need re-encoding, 'reencode' when everything does),
+        'profiles', 'target', 'outliers' (0-based indexes) and 'reason'
+    """
+    plan: Dict[str, Any] = {
+        'mode': 'reencode', 'profiles': None, 'target': None, 'outliers': [], 'reason': None
+    }
+
+    with ThreadPoolExecutor(max_workers=min(8, len(input_files))) as executor:
+        probes = list(executor.map(probe_video, input_files))
+
+    if any(probe is None for probe in probes):
+        plan['reason'] = 'could not probe every input'
+        return plan
+
+    profiles = [stream_profile(probe) for probe in probes]
+    keys = [_profile_key(profile) for profile in profiles]
+    counts = Counter(keys)
+    target_key = max(counts, key=lambda k: (counts[k], -keys.index(k)))
+    target = profiles[keys.index(target_key)]
+
+    plan['profiles'] = profiles
+    plan['target'] = target
+    plan['outliers'] = [i for i, key in enumerate(keys) if key != target_key]
+
+    if not plan['outliers']:
+        plan['mode'] = 'copy'
+    elif target['vcodec'] not in VIDEO_ENCODERS or (
+        target['acodec'] and target['acodec'] not in AUDIO_ENCODERS
+    ):
+        plan['reason'] = f"no encoder to match {target['vcodec']}/{target['acodec']}"
+    else:
+        plan['mode'] = 'normalize'
+
+    return plan
+
+
+def _merge_smart(
+    input_files: List[Path],
+    output_path: Path,
+    plan: Optional[Dict[str, Any]] = None,
+    threads: Optional[int] = None,
+    chunk_seconds: Optional[int] = None,
+    cpu_budget: Optional['CpuBudget'] = None,
+    show_progress: bool = True
+) -> Optional[Path]:
+    """Merge by re-encoding only the parts that differ from the majority.
+
+    Outliers are normalised in a scratch directory next to the output, then
+    all parts are joined with the concat demuxer.
+    """
+    plan = plan or plan_merge(input_files)
+
+    if plan['target']:
+        print(f"\nMajority profile: {_describe_profile(plan['target'])}")
+
+    if plan['mode'] == 'reencode':
+        print(f"[WARN] {plan['reason'].capitalize()}, re-encoding all parts")
+        return _merge_reencode(input_files, output_path, threads, chunk_seconds, plan, show_progress)
+
+    if plan['mode'] == 'copy':
+        print("All parts match, joining with stream copy")
+        return _merge_concat(input_files, output_path, threads, chunk_seconds, cpu_budget, show_progress)
+
+    profiles, target = plan['profiles'], plan['target']
+
+    with tempfile.TemporaryDirectory(prefix='.merge-', dir=output_path.parent) as scratch:
+        parts = list(input_files)
+        for i in plan['outliers']:
+            print(f"Normalising part {i + 1} ({input_files[i].name}): "
+                  f"{_describe_mismatch(profiles[i], target)}")
+            normalized = Path(scratch) / f"part{i + 1}.mp4"
+            if not _normalize_part(input_files[i], normalized, profiles[i], target, threads, show_progress):
+                print("[INFO] Trying re-encode method...")
+                return _merge_reencode(input_files, output_path, threads, chunk_seconds, plan, show_progress)
+            parts[i] = normalized
+
+        return _merge_concat(parts, output_path, threads, chunk_seconds, cpu_budget, show_progress)
+
+
+def _merge_concat(
+    input_files: List[Path],
+    output_path: Path,
+    threads: Optional[int] = None,
+    chunk_seconds: Optional[int] = None,
+    cpu_budget: Optional['CpuBudget'] = None,
+    show_progress: bool = True
+) -> Optional[Path]:
+    """Merge using ffmpeg concat demuxer (fast, lossless).
+
+    If the join fails the parts are re-encoded instead; a stream-copy job
+    running without threads of its own takes them from cpu_budget first.
+    """
+    # Create temporary file list
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+        for video in input_files:
+            # Escape single quotes in path
+            escaped = str(video.absolute()).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+        list_file = f.name
+
+    try:
+        cmd = [
+            'ffmpeg',
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', list_file,
+            '-c', 'copy',  # No re-encoding
+            '-y',  # Overwrite output
+            str(output_path)
+        ]
+
+        print(f"\nRunning: {' '.join(cmd[:6])}...")
+        if run_ffmpeg(cmd, 'joining', _total_duration(input_files), show_progress=show_progress):
+            print(f"[OK] Merged successfully: {output_path}")
+            return output_path
+
+        # Try re-encode method as fallback
+        print("[INFO] Trying re-encode method...")
+        if threads or not cpu_budget:
+            return _merge_reencode(input_files, output_path, threads, chunk_seconds,
+                                   show_progress=show_progress)
+        threads = cpu_budget.acquire(extra=True)
+        try:
+            return _merge_reencode(input_files, output_path, threads, chunk_seconds,
+                                   show_progress=show_progress)
+        finally:
+            cpu_budget.release(threads)
+
+    finally:
+        Path(list_file).unlink(missing_ok=True)
+
+
+def _merge_reencode(
+    input_files: List[Path],
+    output_path: Path,
+    threads: Optional[int] = None,
+    chunk_seconds: Optional[int] = None,
+    plan: Optional[Dict[str, Any]] = None,
+    show_progress: bool = True
+) -> Optional[Path]:
+    """Merge by re-encoding (slower but handles different codecs)."""
+    if chunk_seconds:
+        return _merge_reencode_chunked(input_files, output_path, chunk_seconds, threads, plan, show_progress)
+
+    # Build filter complex for concat
+    inputs = []
+    filter_parts = []
+
+    for i, video in enumerate(input_files):
+        inputs.extend(['-i', str(video)])
+        filter_parts.append(f'[{i}:v][{i}:a]')
+
+    filter_complex = ''.join(filter_parts) + f'concat=n={len(input_files)}:v=1:a=1[outv][outa]'
+
+    cmd = [
+        'ffmpeg',
+        *inputs,
+        '-filter_complex', filter_complex,
+        '-map', '[outv]',
+        '-map', '[outa]',
+        '-c:v', 'libx264',
+        '-preset', REENCODE_PRESET,
+        '-crf', REENCODE_CRF,
+        '-c:a', 'aac',
+        '-b:a', AUDIO_BITRATE,
+        *(['-threads', str(threads)] if threads else []),
+        '-y',
+        str(output_path)
+    ]
+
+    print(f"\nRe-encoding (this may take a while)...")
+    if run_ffmpeg(cmd, 're-encoding', _total_duration(input_files), show_progress=show_progress):
+        print(f"[OK] Merged successfully: {output_path}")
+        return output_path
+    return None
+
+
+def _input_fingerprint(input_files: List[Path]) -> List[List[Any]]:
+    """Identify inputs by path, size and mtime (cheap, no hashing)."""
+    fingerprint = []
+    for f in input_files:
+        stat = f.stat()
+        fingerprint.append([str(f.absolute()), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+def _prepare_chunk_dir(work_dir: Path, job: Dict[str, Any]) -> bool:
+    """Create or reuse a chunk work directory.
+
+    Returns:
+        True if an earlier run of the same job left checkpoints to resume
+    """
+    job_file = work_dir / 'job.json'
+    if job_file.exists():
+        try:
+            if json.loads(job_file.read_text()) == job:
+                return True
+        except ValueError:
+            pass
+        print("[INFO] Inputs or settings changed since last run, discarding old segments")
+        shutil.rmtree(work_dir)
+
+    (work_dir / 'split').mkdir(parents=True, exist_ok=True)
+    (work_dir / 'encoded').mkdir(exist_ok=True)
+    job_file.write_text(json.dumps(job, indent=2))
+    return False
+
+
+def _split_part(input_file: Path, index: int, split_dir: Path, chunk_seconds: int) -> bool:
+    """Split a part's video stream at keyframes (stream copy, no encode)."""
+    done_marker = split_dir / f"p{index:03d}.done"
+    if done_marker.exists():
+        return True
+
+    for stale in split_dir.glob(f"p{index:03d}_*.mkv"):
+        stale.unlink()
+
+    cmd = [
+        'ffmpeg',
+        '-i', str(input_file),
+        '-map', '0:v:0',
+        '-c', 'copy',
+        '-f', 'segment',
+        '-segment_time', str(chunk_seconds),
+        '-reset_timestamps', '1',
+        '-y',
+        str(split_dir / f"p{index:03d}_%05d.mkv")
+    ]
+    if not run_ffmpeg(cmd, f"splitting {input_file.name}", show_progress=False):
+        return False
+    done_marker.touch()
+    return True
+
+
+def _encode_segment(segment: Path, encoded_dir: Path, video_filter: str, threads: int) -> bool:
+    """Encode one video segment; the finished file is the checkpoint."""
+    final = encoded_dir / f"{segment.stem}.mp4"
+    if final.exists():
+        return True
+
+    partial = encoded_dir / f"{segment.stem}.partial.mp4"
+    cmd = [
+        'ffmpeg',
+        '-i', str(segment),
+        '-vf', video_filter,
+        '-c:v', 'libx264',
+        '-preset', REENCODE_PRESET,
+        '-crf', REENCODE_CRF,
+        '-threads', str(threads),
+        '-an',
+        '-y',
+        str(partial)
+    ]
+    if not run_ffmpeg(cmd, f"encoding {segment.name}", show_progress=False):
+        partial.unlink(missing_ok=True)
+        return False
+    partial.rename(final)
+    return True
+
+
+def _encode_timeline_audio(
+    input_files: List[Path],
+    profiles: List[Dict[str, Any]],
+    output: Path
+) -> bool:
+    """Encode the audio of all parts as one continuous track.
+
+    Audio is cheap to encode, and doing it in one pass avoids gaps and
+    priming artefacts at segment boundaries. Each part's audio is padded
+    with silence or trimmed to the length of its video stream, which is
+    what the encoded segments of that part add up to, so a track shorter
+    or longer than its picture doesn't shift later parts out of sync.
+    Parts without audio are all silence. When ffprobe reports no video
+    duration the part's audio is left as it is, and a part with neither
+    audio nor a known duration fails the merge (its silence would never
+    end).
+    """
+    if output.exists():
+        return True
+
+    inputs = []
+    filter_parts = []
+    for i, (video, profile) in enumerate(zip(input_files, profiles)):
+        duration = profile['video_duration']
+        if not profile['acodec'] and not duration:
+            print(f"[ERROR] {video.name} has no audio and no known video duration")
+            return False
+        inputs.extend(['-i', str(video)])
+        source = f"[{i}:a]" if profile['acodec'] else "anullsrc=r=48000:cl=stereo,"
+        fit = f",apad,atrim=duration={duration}" if duration else ''
+        filter_parts.append(
+            f"{source}aresample=48000,aformat=sample_fmts=fltp:channel_layouts=stereo{fit}[a{i}]"
+        )
+
+    filter_complex = ';'.join(filter_parts) + ';' + ''.join(
+        f"[a{i}]" for i in range(len(input_files))
+    ) + f"concat=n={len(input_files)}:v=0:a=1[outa]"
+
+    partial = output.with_suffix('.partial.m4a')
+    cmd = [
+        'ffmpeg',
+        *inputs,
+        '-filter_complex', filter_complex,
+        '-map', '[outa]',
+        '-c:a', 'aac',
+        '-b:a', AUDIO_BITRATE,
+        '-y',
+        str(partial)
+    ]
+    if not run_ffmpeg(cmd, 'encoding audio', show_progress=False):
+        partial.unlink(missing_ok=True)
+        return False
+    partial.rename(output)
+    return True
+
+
+def _merge_reencode_chunked(
+    input_files: List[Path],
+    output_path: Path,
+    chunk_seconds: int = DEFAULT_CHUNK_SECONDS,
+    threads: Optional[int] = None,
+    plan: Optional[Dict[str, Any]] = None,
+    show_progress: bool = True
+) -> Optional[Path]:
+    """Merge by re-encoding the timeline in parallel segments.
+
+    Each part's video is split at keyframes into roughly chunk_seconds long
+    segments (stream copy), the segments are encoded to the majority
+    resolution/frame rate by a pool of ffmpeg processes, audio is encoded
+    once for the whole timeline, and everything is joined with the concat
+    demuxer. Segments are checkpointed in a hidden work directory next to
+    the output, so an interrupted merge resumes with the unfinished ones.
+    """
+    plan = plan if plan and plan['profiles'] else plan_merge(input_files)
+    if not plan['profiles']:
+        print(f"[ERROR] Chunked re-encode needs probe data: {plan['reason']}")
+        return None
+
+    target = plan['target']
+    width, height = target['width'], target['height']
+    video_filter = (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+        f"fps={target['fps']},format=yuv420p"
+    )
+
+    total_threads = threads or os.cpu_count() or 1
+    workers = max(1, total_threads // 2)
+    threads_per_segment = max(1, total_threads // workers)
+
+    work_dir = output_path.parent / f".{output_path.stem}.chunks"
+    job = {
+        'inputs': _input_fingerprint(input_files),
+        'chunk_seconds': chunk_seconds,
+        'video_filter': video_filter,
+    }
+    if _prepare_chunk_dir(work_dir, job):
+        print(f"[INFO] Resuming chunked encode from {work_dir}")
+
+    split_dir, encoded_dir = work_dir / 'split', work_dir / 'encoded'
+
+    print(f"\nSplitting {len(input_files)} parts into ~{chunk_seconds}s segments...")
+    with ThreadPoolExecutor(max_workers=min(4, len(input_files))) as executor:
+        split_ok = list(executor.map(
+            lambda item: _split_part(item[1], item[0], split_dir, chunk_seconds),
+            enumerate(input_files, 1)
+        ))
+    if not all(split_ok):
+        return None
+
+    segments = sorted(split_dir.glob('p*_*.mkv'))
+    pending = [seg for seg in segments if not (encoded_dir / f"{seg.stem}.mp4").exists()]
+    print(f"Encoding {len(pending)} of {len(segments)} segments "
+          f"({workers} workers x {threads_per_segment} threads)...")
+
+    audio_path = work_dir / 'audio.m4a'
+    has_audio = any(profile['acodec'] for profile in plan['profiles'])
+
+    encode_ok = []
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers + 1) as executor:
+        audio_future = executor.submit(
+            _encode_timeline_audio, input_files, plan['profiles'], audio_path
+        ) if has_audio else None
+        futures = [
+            executor.submit(_encode_segment, seg, encoded_dir, video_filter, threads_per_segment)
+            for seg in pending
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            encode_ok.append(future.result())
+            elapsed = time.monotonic() - started
+            eta = elapsed / done * (len(futures) - done)
+            print(f"  {done}/{len(futures)} segments encoded, "
+                  f"{_format_seconds(elapsed)} elapsed, ETA {_format_seconds(eta)}")
+        audio_ok = audio_future.result() if audio_future else True
+
+    if not all(encode_ok) or not audio_ok:
+        print(f"[ERROR] Chunked encode incomplete; re-run to resume from {work_dir}")
+        return None
+
+    list_file = work_dir / 'segments.txt'
+    with open(list_file, 'w') as f:
+        for seg in segments:
+            escaped = str((encoded_dir / f"{seg.stem}.mp4").absolute()).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    cmd = ['ffmpeg', '-f', 'concat', '-safe', '0', '-i', str(list_file)]
+    if has_audio:
+        cmd.extend(['-i', str(audio_path), '-map', '0:v', '-map', '1:a'])
+    cmd.extend(['-c', 'copy', '-y', str(output_path)])
+
+    print("Joining encoded segments...")
+    total = sum(profile['duration'] for profile in plan['profiles'])
+    if not run_ffmpeg(cmd, 'joining segments', total or None, show_progress=show_progress):
+        return None
+
+    shutil.rmtree(work_dir)
+    print(f"[OK] Merged successfully: {output_path}")
+    return output_path
+
+
+def find_video_file(directory: Path, base_name: str) -> Optional[Path]:
+    """Find a downloaded video by base name, trying the extensions yt-dlp may produce."""
+    for ext in ['mp4', 'mkv', 'webm']:
+        candidate = directory / f"{base_name}.{ext}"
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def _find_parts(entry: Dict[str, Any], downloads_dir: Path) -> List[Path]:
+    """Locate the downloaded parts of a merge group (in order)."""
+    input_files = []
+    for i in range(1, len(entry['merge_sources']) + 1):
+        part_file = find_video_file(downloads_dir, f"{entry['filename']}_part{i}")
+        if part_file:
+            input_files.append(part_file)
+    return input_files
+
+
+class CpuBudget:
+    """Hands out ffmpeg -threads allotments from a fixed number of cores.
+
+    Each encode job asks for an even share of the budget among the encode
+    jobs that are still unfinished, so the last jobs of a run get more
+    threads instead of leaving cores idle.
+    """
+
+    def __init__(self, total: int, encode_jobs: int, max_concurrent: int):
+        self.total = max(1, total)
+        self.free = self.total
+        self.remaining = encode_jobs
+        self.max_concurrent = max(1, max_concurrent)
+        self._cond = threading.Condition()
+
+    def acquire(self, extra: bool = False) -> int:
+        """Block until a core is free, then take this job's share.
+
+        Args:
+            extra: The job was not counted in encode_jobs (a stream-copy
+                merge falling back to re-encoding)
+        """
+        with self._cond:
+            if extra:
+                self.remaining += 1
+            while self.free < 1:
+                self._cond.wait()
+            share = self.total // max(1, min(self.remaining, self.max_concurrent))
+            granted = max(1, min(share, self.free))
+            self.free -= granted
+            return granted
+
+    def release(self, threads: int) -> None:
+        with self._cond:
+            self.free += threads
+            self.remaining -= 1
+            self._cond.notify_all()
+
+
+def _merge_parallel(
+    groups: List[Dict[str, Any]],
+    reencode: bool,
+    jobs: int,
+    copy_jobs: int,
+    cpu_budget: int,
+    chunk_seconds: Optional[int] = None
+) -> Dict[str, List[str]]:
+    """Run merge groups concurrently under a CPU budget.
+
+    Groups are probed first. Stream-copy groups are I/O bound and run on
+    their own small pool alongside the encodes; groups needing any
+    re-encoding share cpu_budget threads, largest first, as does a
+    stream-copy group that falls back to re-encoding. ffmpeg progress is
+    not printed, since concurrent groups would overwrite each other's lines.
+    """
+    results: Dict[str, List[str]] = {'successful': [], 'failed': []}
+    results_lock = threading.Lock()
+
+    if not reencode:
+        print(f"Probing {len(groups)} merge groups...")
+        with ThreadPoolExecutor(max_workers=jobs + copy_jobs) as executor:
+            plans = list(executor.map(lambda g: plan_merge(g['inputs']), groups))
+        for group, plan in zip(groups, plans):
+            group['plan'] = plan
+
+    is_copy = [bool(g.get('plan')) and g['plan']['mode'] == 'copy' for g in groups]
+    copies = [g for g, copy in zip(groups, is_copy) if copy]
+    encodes = [g for g, copy in zip(groups, is_copy) if not copy]
+    encodes.sort(key=lambda g: sum(f.stat().st_size for f in g['inputs']), reverse=True)
+
+    budget = CpuBudget(cpu_budget, len(encodes), jobs)
+    print(f"{len(copies)} stream-copy and {len(encodes)} encode jobs, "
+          f"{jobs} concurrent encodes sharing {budget.total} threads\n")
+
+    def run(group: Dict[str, Any], encode: bool) -> None:
+        threads = budget.acquire() if encode else None
+        try:
+            kind = f"encode, {threads} threads" if encode else 'stream copy'
+            print(f"[START] {group['name']} ({kind})")
+            merged = merge_videos(
+                group['inputs'], group['output'], reencode, threads, group.get('plan'),
+                chunk_seconds, incremental=False, cpu_budget=budget, show_progress=False
+            )
+        finally:
+            if encode:
+                budget.release(threads)
+
+        status = 'DONE' if merged else 'FAILED'
+        print(f"[{status}] {group['name']}")
+        with results_lock:
+            results['successful' if merged else 'failed'].append(group['name'])
+
+    with ThreadPoolExecutor(max_workers=jobs) as encode_pool, \
+            ThreadPoolExecutor(max_workers=copy_jobs) as copy_pool:
+        futures = [encode_pool.submit(run, g, True) for g in encodes]
+        futures += [copy_pool.submit(run, g, False) for g in copies]
+        for future in futures:
+            future.result()
+
+    return results
+
+
+def _manifest_groups(
+    manifest_path: Path,
+    output_dir: Path,
+    settings: Dict[str, Any],
+    incremental: bool,
+    skipped: List[str],
+    filters: Optional[Dict[str, List[Any]]] = None
+) -> Iterator[Dict[str, Any]]:
+    """Yield the merge groups of a manifest that need merging.
+
+    Groups with missing parts are reported and left out; groups whose
+    output is up to date are appended to skipped.
+    """
+    downloads_dir = output_dir / 'downloads'
+    merged_dir = output_dir / 'merged'
+
+    for entry in iter_manifest(manifest_path, filters):
+        if not entry.get('merge_sources'):
+            continue  # Skip single videos
+
+        # Find the downloaded parts
+        input_files = _find_parts(entry, downloads_dir)
+
+        if len(input_files) != len(entry['merge_sources']):
+            print(f"[WARN] Missing parts for {entry['filename']}")
+            print(f"  Expected {len(entry['merge_sources'])}, found {len(input_files)}")
+            continue
+
+        output_path = merged_dir / f"{entry['filename']}.mp4"
+        if incremental and is_merge_up_to_date(input_files, output_path, settings):
+            print(f"[SKIP] Up to date: {entry['filename']}")
+            skipped.append(entry['filename'])
+            continue
+
+        yield {
+            'name': entry['filename'],
+            'title': entry['title'],
+            'inputs': input_files,
+            'output': output_path,
+        }
+
+
+def merge_from_manifest(
+    manifest_path: Path,
+    output_dir: Path,
+    reencode: bool = False,
+    jobs: int = 1,
+    copy_jobs: int = 1,
+    cpu_budget: Optional[int] = None,
+    chunk_seconds: Optional[int] = None,
+    incremental: bool = True,
+    filters: Optional[Dict[str, List[Any]]] = None
+) -> Dict[str, List[str]]:
+    """Merge all video groups from a manifest file.
+
+    Serial runs merge each group as soon as it is read from the manifest.
+    Parallel runs read every group first, since scheduling needs the full
+    set of encode jobs.
+
+    Args:
+        manifest_path: Path to manifest file (.json or .jsonl)
+        output_dir: Base output directory
+        reencode: If True, re-encode every input instead of only outliers
+        jobs: Merge groups that need encoding to run at once
+        copy_jobs: Stream-copy merge groups to run at once alongside them
+        cpu_budget: Total ffmpeg threads shared by concurrent encodes
+            (default: number of CPUs)
+        chunk_seconds: Segment length for chunked, resumable re-encodes
+            (None encodes each group in a single ffmpeg process)
+        incremental: Skip groups whose merged output is up to date
+        filters: Optional act/year/show filters
+
+    Returns:
+        Dict with 'successful', 'failed' and 'skipped' group filename lists
+    """
+    print(f"Processing manifest: {manifest_path.name}")
+    if filters:
+        print(f"Filter: {describe_filters(filters)}")
+    print()
+
+    settings = merge_settings(reencode, chunk_seconds)
+    skipped: List[str] = []
+    groups = _manifest_groups(manifest_path, output_dir, settings, incremental, skipped, filters)
+
+    if jobs > 1 or copy_jobs > 1:
+        groups = list(groups)
+        print(f"\n{len(groups)} groups to merge, {len(skipped)} up to date")
+        results = _merge_parallel(
+            groups, reencode, jobs, copy_jobs, cpu_budget or os.cpu_count() or 1,
+            chunk_seconds
+        )
+    else:
+        results = {'successful': [], 'failed': []}
+        for group in groups:
+            print(f"\n[MERGE] {group['title']}")
+            merged = merge_videos(
+                group['inputs'], group['output'], reencode,
+                chunk_seconds=chunk_seconds, incremental=False
+            )
+            results['successful' if merged else 'failed'].append(group['name'])
+        print(f"\n{len(results['successful']) + len(results['failed'])} groups merged, "
+              f"{len(skipped)} up to date")
+
+    results['skipped'] = skipped
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Merge video files using ffmpeg',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python merge.py video1.mp4 video2.mp4 video3.mp4 -o merged.mp4
+  python merge.py --manifest ../manifest.json
+  python merge.py video1.mp4 video2.mp4 -o output.mp4 --reencode
+  python merge.py --manifest ../manifest.json --jobs 3 --copy-jobs 2 --cpu-budget 16
+  python merge.py video1.mp4 video2.mp4 -o output.mp4 --reencode --chunked 90
+  python merge.py --manifest ../archive.jsonl --show "Callaway Gardens"
+        '''
+    )
+    parser.add_argument('files', nargs='*', help='Input video files to merge')
+    parser.add_argument('-m', '--manifest', help='Path to manifest file (.json or .jsonl)')
+    parser.add_argument('-o', '--output', help='Output file path')
+    parser.add_argument('--output-dir', default='./output',
+                        help='Output directory for manifest mode (default: ./output)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Merge groups needing encoding to run at once (default: 1)')
+    parser.add_argument('--copy-jobs', type=int, default=1,
+                        help='Stream-copy merge groups to run alongside them (default: 1)')
+    parser.add_argument('--cpu-budget', type=int,
+                        help='Total ffmpeg threads shared by concurrent encodes '
+                             '(default: number of CPUs)')
+    parser.add_argument('--chunked', nargs='?', type=int, const=DEFAULT_CHUNK_SECONDS,
+                        metavar='SECONDS',
+                        help='Re-encode in parallel keyframe-aligned segments of about '
+                             f'SECONDS (default {DEFAULT_CHUNK_SECONDS}); interrupted '
+                             'merges resume from finished segments')
+    parser.add_argument('--force', action='store_true',
+                        help='Merge even if the output is up to date')
+    parser.add_argument('--reencode', action='store_true',
+                        help='Re-encode every input (by default only parts that '
+                             'differ from the majority are re-encoded)')
+    add_filter_arguments(parser)
+    add_profile_argument(parser)
+
+    args = parser.parse_args()
+    profiling.start(args.profile)
+
+    if args.manifest:
+        merge_from_manifest(
+            Path(args.manifest),
+            Path(args.output_dir),
+            args.reencode,
+            jobs=args.jobs,
+            copy_jobs=args.copy_jobs,
+            cpu_budget=args.cpu_budget,
+            chunk_seconds=args.chunked,
+            incremental=not args.force,
+            filters=filters_from_args(args)
+        )
+    elif args.files and args.output:
+        input_files = [Path(f) for f in args.files]
+        merge_videos(
+            input_files, Path(args.output), args.reencode,
+            chunk_seconds=args.chunked, incremental=not args.force
+        )
+    else:
+        parser.print_help()
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
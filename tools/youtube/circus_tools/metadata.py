@@ -0,0 +1,170 @@
+"""Standard descriptions, tags and URLs for Circus Archives uploads.
+
+Shared by the YouTube tools and the upload queue processor so every upload
+carries the same [CIRCUS_ARCHIVE_META] block.
+"""
+
+import re
+from typing import Any, Dict, Optional
+
+META_BLOCK = re.compile(r'\[CIRCUS_ARCHIVE_META\](.*?)\[/CIRCUS_ARCHIVE_META\]', re.DOTALL)
+META_LIST_FIELDS = {'performers', 'source_ids'}
+
+
+def generate_description(
+    act: str,
+    year: Optional[int],
+    show: Optional[str] = None,
+    performers: Optional[list] = None,
+    source_ids: Optional[list] = None,
+    notes: Optional[str] = None
+) -> str:
+    """Generate a standardized video description with embedded metadata.
+
+    Args:
+        act: Act type (e.g., "Juggling", "Russian Bar")
+        year: Performance year
+        show: Show name (e.g., "Home Show", "Callaway Gardens")
+        performers: List of performer names
+        source_ids: Original YouTube video IDs (for migrated videos)
+        notes: Additional notes
+
+    Returns:
+        Formatted description string
+    """
+    lines = ["FSU Flying High Circus"]
+
+    if act and year:
+        lines[0] = f"FSU Flying High Circus - {act} {year}"
+    elif act:
+        lines[0] = f"FSU Flying High Circus - {act}"
+
+    lines.append("")
+
+    if show:
+        lines.append(f"Show: {show}")
+    if performers:
+        lines.append(f"Performers: {', '.join(performers)}")
+    if notes:
+        lines.append("")
+        lines.append(notes)
+
+    # Add machine-readable metadata block
+    lines.append("")
+    lines.append("---")
+    lines.append("[CIRCUS_ARCHIVE_META]")
+
+    meta = {}
+    if act:
+        meta['act'] = act
+    if year:
+        meta['year'] = year
+    if show:
+        meta['show'] = show
+    if performers:
+        meta['performers'] = performers
+    if source_ids:
+        meta['source_ids'] = source_ids
+
+    for key, value in meta.items():
+        if isinstance(value, list):
+            lines.append(f"{key}={','.join(str(v) for v in value)}")
+        else:
+            lines.append(f"{key}={value}")
+
+    lines.append("[/CIRCUS_ARCHIVE_META]")
+
+    return "\n".join(lines)
+
+
+def parse_archive_meta(description: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Read back the [CIRCUS_ARCHIVE_META] block written by generate_description.
+
+    Args:
+        description: Video description
+
+    Returns:
+        Dict with any of act, year (int), show, performers and source_ids
+        (lists), or None if the description has no block
+    """
+    match = META_BLOCK.search(description or '')
+    if not match:
+        return None
+
+    meta: Dict[str, Any] = {}
+    for line in match.group(1).splitlines():
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            continue
+        if key in META_LIST_FIELDS:
+            meta[key] = [item.strip() for item in value.split(',') if item.strip()]
+        elif key == 'year':
+            meta[key] = int(value) if value.isdigit() else None
+        else:
+            meta[key] = value
+    return meta
+
+
+def build_title(acts: list, year: Optional[int], show: Optional[str] = None) -> str:
+    """Build the standard title: "<acts> - FSU Flying High Circus <show> <year>".
+
+    Args:
+        acts: Act names ("Performance" if empty)
+        year: Performance year
+        show: Show name (e.g., "Home Show", "Callaway Gardens")
+
+    Returns:
+        Title string
+    """
+    act_part = ' & '.join(acts) if acts else 'Performance'
+    show_name = 'Callaway' if show and 'Callaway' in show else 'Home Show'
+    return f"{act_part} - FSU Flying High Circus {show_name} {year}"
+
+
+def build_tags(act: str, year: Optional[int], show: Optional[str] = None) -> list:
+    """Build standard tags for a circus video.
+
+    Args:
+        act: Act type
+        year: Performance year
+        show: Show name
+
+    Returns:
+        List of tags
+    """
+    tags = [
+        "FSU",
+        "Florida State University",
+        "Flying High Circus",
+        "circus",
+        "college circus",
+    ]
+
+    if act:
+        tags.append(act.lower())
+        # Add variations
+        if act == "Quartet Adagio":
+            tags.extend(["quartet", "adagio", "partner acrobatics"])
+        elif act == "Russian Bar":
+            tags.extend(["russian bar", "acrobatics"])
+        elif act == "Teeterboard":
+            tags.extend(["teeter board", "teeterboard", "acrobatics"])
+        elif act == "Juggling":
+            tags.extend(["juggling", "juggler"])
+        elif "Trapeze" in act:
+            tags.extend(["trapeze", "aerial", "flying trapeze"])
+
+    if year:
+        tags.append(str(year))
+
+    if show:
+        if "Callaway" in show:
+            tags.extend(["Callaway Gardens", "summer show"])
+        elif "Home" in show:
+            tags.append("home show")
+
+    return tags
+
+
+def youtube_url(video_id: str) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}"
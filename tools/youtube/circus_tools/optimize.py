@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""Prepare video files for upload: faststart remux and bandwidth-aware transcode."""
+
+import argparse
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from circus_tools import profiling
+from circus_tools.merge import probe_video, run_ffmpeg
+from circus_tools.profiling import add_profile_argument, profiled
+
+# Quality ceiling for transcodes. YouTube re-encodes everything, so bitrate
+# above its recommended upload rate (8 Mbps for 1080p SDR) is wasted uplink.
+DEFAULT_SETTINGS = {
+    'max_height': 1080,
+    'max_video_kbps': 8000,
+    'audio_kbps': 192,
+    'crf': 20,
+    'preset': 'veryfast',
+}
+
+# Assumed uplink and encode speed until real measurements are available
+DEFAULT_UPLINK_MBPS = 20.0
+DEFAULT_ENCODE_SPEED = 1.0  # seconds of video encoded per wall-clock second
+
+# Files within this factor of the ceiling bitrate are not worth transcoding
+BITRATE_TOLERANCE = 1.1
+
+
+class ThroughputEstimate:
+    """Running estimate of a rate, seeded with a default.
+
+    Each measurement is blended in with an exponential moving average so a
+    single slow or fast sample doesn't swing decisions.
+    """
+
+    def __init__(self, initial: float, weight: float = 0.5):
+        self.value = initial
+        self.samples = 0
+        self._weight = weight
+
+    def record(self, amount: float, seconds: float) -> None:
+        if amount <= 0 or seconds <= 0:
+            return
+        rate = amount / seconds
+        self.value = rate if self.samples == 0 else (
+            self._weight * rate + (1 - self._weight) * self.value
+        )
+        self.samples += 1
+
+
+class UploadOptimizer:
+    """Decides per file whether to remux or transcode before upload.
+
+    Args:
+        settings: Overrides for DEFAULT_SETTINGS
+        uplink_mbps: Initial uplink estimate; refined by record_upload()
+        encode_speed: Initial encode speed estimate (realtime factor);
+            refined after every transcode
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Dict[str, Any]] = None,
+        uplink_mbps: float = DEFAULT_UPLINK_MBPS,
+        encode_speed: float = DEFAULT_ENCODE_SPEED
+    ):
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.uplink = ThroughputEstimate(uplink_mbps * 1_000_000 / 8)  # bytes/s
+        self.encode_speed = ThroughputEstimate(encode_speed)
+
+    def record_upload(self, size_bytes: int, seconds: float) -> None:
+        """Feed a finished upload's size and duration into the uplink estimate."""
+        self.uplink.record(size_bytes, seconds)
+
+    def plan(self, probe: Dict[str, Any], size_bytes: int) -> Dict[str, Any]:
+        """Choose 'remux' or 'transcode' for a probed file.
+
+        Returns:
+            Dict with 'action', 'reason' and the estimates behind it
+        """
+        streams = probe.get('streams', [])
+        video = next((st for st in streams if st.get('codec_type') == 'video'), {})
+        duration = float(probe.get('format', {}).get('duration') or 0)
+        height = video.get('height') or 0
+
+        if not duration:
+            return {'action': 'remux', 'reason': 'unknown duration'}
+
+        ceiling_bps = (self.settings['max_video_kbps'] + self.settings['audio_kbps']) * 1000
+        bitrate_bps = size_bytes * 8 / duration
+        over_height = height > self.settings['max_height']
+
+        if not over_height and bitrate_bps <= ceiling_bps * BITRATE_TOLERANCE:
+            return {
+                'action': 'remux',
+                'reason': f"{bitrate_bps / 1e6:.1f} Mbps is within the quality ceiling",
+            }
+
+        estimated_size = min(size_bytes, ceiling_bps / 8 * duration)
+        upload_saving = (size_bytes - estimated_size) / self.uplink.value
+        encode_time = duration / self.encode_speed.value
+
+        plan = {
+            'estimated_size': int(estimated_size),
+            'upload_saving': upload_saving,
+            'encode_time': encode_time,
+        }
+        if upload_saving <= encode_time:
+            plan.update(
+                action='remux',
+                reason=f"transcode (~{encode_time:.0f}s) would save only "
+                       f"~{upload_saving:.0f}s of upload"
+            )
+        else:
+            plan.update(
+                action='transcode',
+                reason=f"saves ~{upload_saving:.0f}s of upload for ~{encode_time:.0f}s "
+                       f"of encoding ({bitrate_bps / 1e6:.1f} Mbps, {height}p)"
+            )
+        return plan
+
+    @profiled('optimize')
+    def optimize(self, input_path: Path, work_dir: Path) -> Dict[str, Any]:
+        """Produce the file to upload.
+
+        The file is always remuxed losslessly with the moov atom at the
+        front; it is transcoded to the quality ceiling only when the
+        estimated upload-time saving outweighs the encode time. Any failure
+        falls back to the original file.
+
+        Args:
+            input_path: File as received
+            work_dir: Directory for the optimised copy (caller cleans up)
+
+        Returns:
+            Dict with 'path' (file to upload), 'action' ('original',
+            'remux' or 'transcode'), 'reason', 'size_before', 'size_after'
+        """
+        size_before = input_path.stat().st_size
+        result = {
+            'path': input_path,
+            'action': 'original',
+            'reason': None,
+            'size_before': size_before,
+            'size_after': size_before,
+        }
+
+        try:
+            probe = probe_video(input_path)
+        except OSError as e:
+            print(f"[WARN] Cannot run ffprobe ({e}), uploading original file")
+            result['reason'] = 'ffmpeg not available'
+            return result
+        if probe is None:
+            result['reason'] = 'ffprobe failed'
+            return result
+
+        plan = self.plan(probe, size_before)
+        duration = float(probe.get('format', {}).get('duration') or 0) or None
+        output_path = work_dir / f"{input_path.stem}.optimized.mp4"
+
+        print(f"[OPTIMIZE] {input_path.name}: {plan['action']} - {plan['reason']}")
+
+        if plan['action'] == 'transcode':
+            started = time.monotonic()
+            if run_ffmpeg(self._transcode_cmd(input_path, output_path, probe), 'transcoding', duration):
+                if duration:
+                    self.encode_speed.record(duration, time.monotonic() - started)
+                return self._finish(result, output_path, 'transcode', plan['reason'])
+            print("[WARN] Transcode failed, falling back to remux")
+
+        if run_ffmpeg(self._remux_cmd(input_path, output_path), 'remuxing', duration):
+            return self._finish(result, output_path, 'remux', plan['reason'])
+
+        print("[WARN] Remux failed, uploading original file")
+        output_path.unlink(missing_ok=True)
+        result['reason'] = 'remux failed'
+        return result
+
+    @staticmethod
+    def _finish(result: Dict[str, Any], output_path: Path, action: str, reason: str) -> Dict[str, Any]:
+        result.update(
+            path=output_path,
+            action=action,
+            reason=reason,
+            size_after=output_path.stat().st_size
+        )
+        saved = 1 - result['size_after'] / max(1, result['size_before'])
+        print(f"[OPTIMIZE] {result['size_before'] / 1024**2:.1f} MiB -> "
+              f"{result['size_after'] / 1024**2:.1f} MiB ({saved:.0%} smaller)")
+        return result
+
+    @staticmethod
+    def _remux_cmd(input_path: Path, output_path: Path) -> list:
+        return [
+            'ffmpeg',
+            '-i', str(input_path),
+            '-map', '0:v:0',
+            '-map', '0:a:0?',
+            '-map_metadata', '0',
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            '-y',
+            str(output_path)
+        ]
+
+    def _transcode_cmd(self, input_path: Path, output_path: Path, probe: Dict[str, Any]) -> list:
+        s = self.settings
+        audio = next(
+            (st for st in probe.get('streams', []) if st.get('codec_type') == 'audio'), None
+        )
+        audio_args = []
+        if audio:
+            audio_args = ['-c:a', 'aac', '-b:a', f"{s['audio_kbps']}k"]
+
+        return [
+            'ffmpeg',
+            '-i', str(input_path),
+            '-map', '0:v:0',
+            '-map', '0:a:0?',
+            '-map_metadata', '0',
+            '-vf', f"scale=-2:'min(ih,{s['max_height']})'",
+            '-c:v', 'libx264',
+            '-preset', s['preset'],
+            '-crf', str(s['crf']),
+            '-maxrate', f"{s['max_video_kbps']}k",
+            '-bufsize', f"{s['max_video_kbps'] * 2}k",
+            '-pix_fmt', 'yuv420p',
+            *audio_args,
+            '-movflags', '+faststart',
+            '-y',
+            str(output_path)
+        ]
+
+
+def optimizer_from_env() -> UploadOptimizer:
+    """Build an optimizer configured from environment variables.
+
+    OPTIMIZE_MAX_HEIGHT, OPTIMIZE_MAX_VIDEO_KBPS and UPLINK_MBPS override
+    the defaults (used by the queue processor).
+    """
+    settings = {}
+    if os.environ.get('OPTIMIZE_MAX_HEIGHT'):
+        settings['max_height'] = int(os.environ['OPTIMIZE_MAX_HEIGHT'])
+    if os.environ.get('OPTIMIZE_MAX_VIDEO_KBPS'):
+        settings['max_video_kbps'] = int(os.environ['OPTIMIZE_MAX_VIDEO_KBPS'])
+    uplink = float(os.environ.get('UPLINK_MBPS', DEFAULT_UPLINK_MBPS))
+    return UploadOptimizer(settings, uplink_mbps=uplink)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Prepare a video file for upload',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python optimize.py phone_video.mov
+  python optimize.py phone_video.mov -o ./optimized --uplink-mbps 10
+  python optimize.py show.mp4 --max-height 720 --max-video-kbps 5000
+        '''
+    )
+    parser.add_argument('file', help='Video file to optimise')
+    parser.add_argument('-o', '--output-dir', default='.',
+                        help='Directory for the optimised file (default: current)')
+    parser.add_argument('--uplink-mbps', type=float, default=DEFAULT_UPLINK_MBPS,
+                        help=f'Uplink speed estimate (default: {DEFAULT_UPLINK_MBPS})')
+    parser.add_argument('--max-height', type=int, default=DEFAULT_SETTINGS['max_height'],
+                        help=f"Transcode height ceiling (default: {DEFAULT_SETTINGS['max_height']})")
+    parser.add_argument('--max-video-kbps', type=int, default=DEFAULT_SETTINGS['max_video_kbps'],
+                        help='Transcode video bitrate ceiling '
+                             f"(default: {DEFAULT_SETTINGS['max_video_kbps']})")
+    add_profile_argument(parser)
+
+    args = parser.parse_args()
+    profiling.start(args.profile)
+
+    input_path = Path(args.file)
+    if not input_path.exists():
+        print(f"Error: File not found: {input_path}")
+        return 1
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    optimizer = UploadOptimizer(
+        {'max_height': args.max_height, 'max_video_kbps': args.max_video_kbps},
+        uplink_mbps=args.uplink_mbps
+    )
+    result = optimizer.optimize(input_path, output_dir)
+    print(f"Output: {result['path']}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
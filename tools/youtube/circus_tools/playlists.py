@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""Keep act, year and show playlists in step with the archive database.
+
+Desired membership is computed from videos and video_acts: one playlist per
+act, per year and per show, each holding every archived video that belongs
+to it (oldest first). Managed playlists are recognised by the
+[CIRCUS_ARCHIVE_PLAYLIST key=...] line in their description, so renaming a
+playlist on YouTube doesn't orphan it.
+
+Current membership is read 50 items per playlists.list/playlistItems.list
+call (ETag-cached), and only the difference is written: playlists.insert
+for missing playlists, playlistItems.insert for missing videos and
+playlistItems.delete for videos that no longer belong or appear twice.
+Every write costs 50 quota units. The plan is recomputed from the live
+playlists on each run, so a run stopped by the daily budget or YouTube's
+quota is simply continued by the next one.
+"""
+
+import argparse
+import re
+from pathlib import Path
+from typing import Any, Dict, List
+
+from googleapiclient.errors import HttpError
+
+from circus_tools import profiling
+from circus_tools.channels import QuotaBudget
+from circus_tools.db import SHOW_NAMES, fetch_archive_videos, get_db_connection
+from circus_tools.profiling import add_profile_argument, profiled
+from circus_tools.upload import load_channel_pool
+from circus_tools.youtube_api import (
+    MANAGE_SCOPES, MAX_RETRIES, QUOTA_REASONS, ETagCache, error_reason, iter_playlist_items,
+    iter_playlists
+)
+
+GROUPS = ['act', 'year', 'show']
+PLAYLIST_MARKER = re.compile(r'\[CIRCUS_ARCHIVE_PLAYLIST key=([^\]]+)\]')
+
+# Quota units per call, and the default share of the daily 10,000 to spend
+LIST_COST = 1
+WRITE_COST = 50
+DEFAULT_BUDGET = 2000
+
+
+def playlist_keys(row: Dict[str, Any], groups: List[str]) -> List[str]:
+    """Keys of the playlists a video belongs to ("act:Juggling", "year:2017", "show:HOME")."""
+    keys = []
+    if 'act' in groups:
+        keys.extend(f"act:{act}" for act in row['acts'])
+    if 'year' in groups and row['year']:
+        keys.append(f"year:{row['year']}")
+    if 'show' in groups and row['show_type']:
+        keys.append(f"show:{row['show_type']}")
+    return keys
+
+
+def playlist_snippet(key: str) -> Dict[str, str]:
+    """Title and description (with the managed-playlist marker) for a playlist key."""
+    group, value = key.split(':', 1)
+    if group == 'act':
+        title = f"{value} - FSU Flying High Circus"
+        about = f"Every {value} performance in the FSU Flying High Circus archive."
+    elif group == 'year':
+        title = f"FSU Flying High Circus {value}"
+        about = f"Every act from the {value} FSU Flying High Circus shows."
+    else:
+        show = SHOW_NAMES.get(value, value)
+        title = f"FSU Flying High Circus - {show}"
+        about = f"Every {show} performance in the FSU Flying High Circus archive."
+    return {'title': title, 'description': f"{about}\n\n[CIRCUS_ARCHIVE_PLAYLIST key={key}]"}
+
+
+def desired_membership(rows: Dict[str, Dict[str, Any]], groups: List[str]) -> Dict[str, List[str]]:
+    """Map each playlist key to the youtube_ids it should hold, oldest first."""
+    members: Dict[str, List[str]] = {}
+    for row in sorted(rows.values(), key=lambda r: (r['year'] or 0, r['title'])):
+        for key in playlist_keys(row, groups):
+            members.setdefault(key, []).append(row['youtube_id'])
+    return members
+
+
+@profiled('list')
+def read_playlists(youtube, cache: ETagCache) -> Dict[str, Dict[str, Any]]:
+    """Read every managed playlist of the channel with its items.
+
+    Returns:
+        Dict of key -> {'id', 'title', 'items': [{'id', 'video_id'}]}
+    """
+    playlists = {}
+    for playlist in iter_playlists(youtube, cache):
+        match = PLAYLIST_MARKER.search(playlist['snippet'].get('description', ''))
+        if not match:
+            continue
+        items = [
+            {'id': item['id'], 'video_id': item['contentDetails']['videoId']}
+            for item in iter_playlist_items(youtube, playlist['id'], 'contentDetails', cache)
+        ]
+        playlists[match.group(1)] = {
+            'id': playlist['id'],
+            'title': playlist['snippet']['title'],
+            'items': items,
+        }
+    return playlists
+
+
+def plan_sync(desired: Dict[str, List[str]], current: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """List the writes that turn the current playlists into the desired ones.
+
+    Playlists are created before videos are added to them; additions come
+    before removals, so a run cut short leaves playlists complete rather
+    than trimmed. Playlists that end up empty are kept (their URLs may be
+    shared).
+    """
+    creates, inserts, deletes = [], [], []
+    for key, videos in desired.items():
+        if key not in current:
+            creates.append({'action': 'create', 'key': key})
+        present = {item['video_id'] for item in current.get(key, {}).get('items', [])}
+        inserts.extend({'action': 'insert', 'key': key, 'video_id': video_id}
+                       for video_id in videos if video_id not in present)
+
+    for key, playlist in current.items():
+        wanted = set(desired.get(key, []))
+        seen = set()
+        for item in playlist['items']:
+            if item['video_id'] not in wanted or item['video_id'] in seen:
+                deletes.append({'action': 'delete', 'key': key, 'video_id': item['video_id'],
+                                'item_id': item['id']})
+            seen.add(item['video_id'])
+
+    return creates + inserts + deletes
+
+
+def _describe(write: Dict[str, Any]) -> str:
+    if write['action'] == 'create':
+        return f"create {playlist_snippet(write['key'])['title']!r}"
+    preposition = 'to' if write['action'] == 'insert' else 'from'
+    return f"{write['action']} {write['video_id']} {preposition} {write['key']}"
+
+
+def apply_write(youtube, write: Dict[str, Any], current: Dict[str, Dict[str, Any]], privacy: str) -> None:
+    """Send one playlists.insert, playlistItems.insert or playlistItems.delete."""
+    if write['action'] == 'create':
+        response = youtube.playlists().insert(
+            part='snippet,status',
+            body={'snippet': playlist_snippet(write['key']), 'status': {'privacyStatus': privacy}}
+        ).execute(num_retries=MAX_RETRIES)
+        current[write['key']] = {'id': response['id'], 'title': response['snippet']['title'], 'items': []}
+    elif write['action'] == 'insert':
+        youtube.playlistItems().insert(
+            part='snippet',
+            body={'snippet': {
+                'playlistId': current[write['key']]['id'],
+                'resourceId': {'kind': 'youtube#video', 'videoId': write['video_id']},
+            }}
+        ).execute(num_retries=MAX_RETRIES)
+    else:
+        youtube.playlistItems().delete(id=write['item_id']).execute(num_retries=MAX_RETRIES)
+
+
+@profiled('update')
+def sync_playlists(
+    youtube,
+    conn,
+    groups: List[str],
+    budget: QuotaBudget,
+    cache: ETagCache,
+    privacy: str = 'unlisted',
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """Bring the channel's managed playlists in line with the database.
+
+    Args:
+        youtube: Authenticated YouTube API service of the channel owning the playlists
+        conn: Database connection
+        groups: Playlist groups to sync ('act', 'year', 'show')
+        budget: Daily quota budget
+        cache: ETag cache for the list calls
+        privacy: Privacy status of newly created playlists
+        dry_run: Only report the writes
+
+    Returns:
+        Dict with done, failed and pending writes
+    """
+    desired = desired_membership(fetch_archive_videos(conn), groups)
+    current = read_playlists(youtube, cache)
+    budget.charge((cache.hits + cache.misses) * LIST_COST)
+    current = {key: playlist for key, playlist in current.items() if key.split(':', 1)[0] in groups}
+
+    plan = plan_sync(desired, current)
+    counts = {action: sum(1 for w in plan if w['action'] == action) for action in ('create', 'insert', 'delete')}
+    print(f"[PLAN] {len(desired)} playlists wanted, {len(current)} found: "
+          f"{counts['create']} to create, {counts['insert']} videos to add, {counts['delete']} to remove")
+
+    results = {'done': [], 'failed': [], 'pending': []}
+    for number, write in enumerate(plan):
+        if dry_run:
+            print(f"[PLAN] {_describe(write)}")
+            results['pending'].append(write)
+            continue
+
+        if write['action'] == 'insert' and write['key'] not in current:
+            print(f"[SKIP] {_describe(write)}: playlist was not created")
+            results['failed'].append(write)
+            continue
+
+        if not budget.spend(WRITE_COST):
+            print("[STOP] Today's quota budget is spent")
+            results['pending'].extend(plan[number:])
+            break
+
+        try:
+            apply_write(youtube, write, current, privacy)
+        except HttpError as e:
+            reason = error_reason(e)
+            if reason in QUOTA_REASONS:
+                print("[STOP] YouTube reports the API quota is spent")
+                budget.exhaust()
+                results['pending'].extend(plan[number:])
+                break
+            print(f"[ERROR] {_describe(write)}: HTTP {e.resp.status} {reason or ''}")
+            results['failed'].append(write)
+            continue
+
+        print(f"[OK] {_describe(write)}")
+        results['done'].append(write)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Sync act, year and show playlists with the archive database',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Show the playlist writes that would be made
+  python playlists.py --dry-run
+
+  # Sync up to the default daily budget; rerun tomorrow to continue
+  python playlists.py
+
+  # Only act playlists, created public, on the "archive" channel
+  python playlists.py --groups act --privacy public --channel archive
+
+Needs DATABASE_PUBLIC_URL and a token that can manage the channel (see Credentials).
+        '''
+    )
+    parser.add_argument('--channel', metavar='NAME',
+                        help='Channel that owns the playlists (default: the first saved channel)')
+    parser.add_argument('--groups', default=','.join(GROUPS),
+                        help=f'Comma-separated playlist groups to sync (default: {",".join(GROUPS)})')
+    parser.add_argument('--privacy', default='unlisted', choices=['public', 'unlisted', 'private'],
+                        help='Privacy of newly created playlists (default: unlisted)')
+    parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET,
+                        help=f'API units to spend per day (default: {DEFAULT_BUDGET}; '
+                             f'each write costs {WRITE_COST})')
+    parser.add_argument('--dry-run', action='store_true', help='Only list the writes that would be made')
+    parser.add_argument('--cache-dir', default='./output/cache',
+                        help='Directory for ETag caches and the daily quota record (default: ./output/cache)')
+    add_profile_argument(parser)
+
+    args = parser.parse_args()
+    profiling.start(args.profile)
+
+    groups = [group.strip() for group in args.groups.split(',') if group.strip()]
+    if not groups or set(groups) - set(GROUPS):
+        parser.error(f"--groups must be chosen from {', '.join(GROUPS)}")
+
+    try:
+        pool = load_channel_pool([args.channel] if args.channel else None, scopes=MANAGE_SCOPES)
+        conn = get_db_connection()
+    except (RuntimeError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    channel = pool.channels[0]
+    cache_dir = Path(args.cache_dir)
+    cache = ETagCache(cache_dir / f"playlists-{channel['name']}.json")
+    budget = QuotaBudget(cache_dir / 'playlist-quota.json', args.budget)
+    print(f"Channel: {channel['name']}")
+    print(f"Quota used today: {budget.used}/{budget.limit} units")
+
+    try:
+        results = sync_playlists(pool.service(channel), conn, groups, budget, cache,
+                                 args.privacy, args.dry_run)
+    finally:
+        cache.save()
+        budget.save()
+        conn.close()
+
+    print(f"\n{'='*60}")
+    print("PLAYLIST SYNC SUMMARY")
+    print(f"{'='*60}")
+    print(f"Done: {len(results['done'])}")
+    print(f"Failed: {len(results['failed'])}")
+    print(f"Pending: {len(results['pending'])}")
+    print(f"Quota used today: {budget.used}/{budget.limit} units")
+    if results['pending'] and not args.dry_run:
+        print("\nRerun tomorrow (or raise --budget) to finish the sync.")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
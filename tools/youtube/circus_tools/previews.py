@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Generate poster frames and hover-preview sprite sheets for videos.
+
+Browse pages can render these small self-hosted images instead of pulling
+thumbnails and players from YouTube:
+
+    <name>.poster.webp    one representative frame (ffmpeg's thumbnail filter
+                          picks it from a short window past the intro)
+    <name>.sprite.webp    SPRITE_COLUMNS x SPRITE_ROWS tiles spaced evenly
+                          through the video, for scrub-on-hover previews
+    <name>.previews.json  sprite layout (tile size, grid, seconds per tile)
+
+Images are WebP when ffmpeg has libwebp, JPEG otherwise. Sprites of long
+videos decode keyframes only, so even a full show is read in seconds.
+"""
+
+import argparse
+import json
+import subprocess
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from circus_tools import profiling
+from circus_tools.manifest import add_filter_arguments, describe_filters, filters_from_args, iter_manifest
+from circus_tools.merge import find_video_file, probe_video, run_ffmpeg
+from circus_tools.profiling import add_profile_argument, profiled
+
+# Poster: searched for in a window starting this far into the video (past
+# titles and fades), scaled to at most POSTER_HEIGHT
+POSTER_START_FRACTION = 0.15
+POSTER_WINDOW_SECONDS = 30
+POSTER_HEIGHT = 720
+POSTER_QUALITY = 80
+
+# Sprite: a fixed 16:9 tile grid (other aspect ratios are letterboxed) so
+# the front end can slice it without knowing the source size
+SPRITE_COLUMNS = 5
+SPRITE_ROWS = 5
+TILE_WIDTH = 160
+TILE_HEIGHT = 90
+SPRITE_QUALITY = 70
+
+# Decode only keyframes when tiles are at least this many seconds apart;
+# typical GOPs are far shorter, so each tile still gets its own frame.
+# Shorter videos are decoded in full (cheap at their length).
+KEYFRAME_TILE_SECONDS = 20
+
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.mkv', '.webm', '.avi', '.m4v'}
+
+
+@lru_cache(maxsize=None)
+def image_format() -> Dict[str, str]:
+    """Pick the image encoder: WebP if this ffmpeg build has libwebp, else JPEG."""
+    result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'], capture_output=True, text=True)
+    if ' libwebp ' in result.stdout:
+        return {'encoder': 'libwebp', 'extension': '.webp', 'content_type': 'image/webp'}
+    print("[WARN] ffmpeg has no libwebp encoder; writing JPEG previews")
+    return {'encoder': 'mjpeg', 'extension': '.jpg', 'content_type': 'image/jpeg'}
+
+
+def _image_args(quality: int) -> List[str]:
+    fmt = image_format()
+    if fmt['encoder'] == 'libwebp':
+        return ['-c:v', 'libwebp', '-quality', str(quality), '-compression_level', '6']
+    # mjpeg's scale runs 2 (best) to 31; map 0-100 quality onto it
+    return ['-c:v', 'mjpeg', '-q:v', str(max(2, round(31 - quality * 0.29))), '-update', '1']
+
+
+def extract_poster(video_path: Path, output_path: Path, duration: float) -> bool:
+    """Write the most representative frame of a window past the intro."""
+    start = duration * POSTER_START_FRACTION
+    window = max(1.0, min(POSTER_WINDOW_SECONDS, duration - start))
+    # One frame a second keeps the thumbnail filter's frame buffer small
+    frames = max(1, int(window))
+    cmd = [
+        'ffmpeg',
+        '-ss', f"{start:.2f}",
+        '-t', f"{window:.2f}",
+        '-i', str(video_path),
+        '-vf', f"fps=1,scale=-2:'min(ih,{POSTER_HEIGHT})',thumbnail={frames}",
+        '-frames:v', '1',
+        '-an',
+        *_image_args(POSTER_QUALITY),
+        '-y',
+        str(output_path)
+    ]
+    return run_ffmpeg(cmd, 'extracting poster', show_progress=False)
+
+
+def build_sprite(video_path: Path, output_path: Path, duration: float) -> bool:
+    """Write a tiled sprite of frames spaced evenly through the video."""
+    tiles = SPRITE_COLUMNS * SPRITE_ROWS
+    keyframes_only = duration / tiles >= KEYFRAME_TILE_SECONDS
+    video_filter = ','.join([
+        f"fps={tiles}/{duration:.3f}:eof_action=pass",
+        f"scale={TILE_WIDTH}:{TILE_HEIGHT}:force_original_aspect_ratio=decrease",
+        f"pad={TILE_WIDTH}:{TILE_HEIGHT}:(ow-iw)/2:(oh-ih)/2",
+        f"tile={SPRITE_COLUMNS}x{SPRITE_ROWS}",
+    ])
+    cmd = [
+        'ffmpeg',
+        *(['-skip_frame', 'nokey'] if keyframes_only else []),
+        '-i', str(video_path),
+        '-vf', video_filter,
+        '-frames:v', '1',
+        '-an',
+        *_image_args(SPRITE_QUALITY),
+        '-y',
+        str(output_path)
+    ]
+    return run_ffmpeg(cmd, 'building preview sprite', duration, show_progress=False)
+
+
+def _is_up_to_date(record_path: Path, video_path: Path) -> bool:
+    if not record_path.exists():
+        return False
+    record = json.loads(record_path.read_text())
+    outputs = [record_path.parent / record['poster'], record_path.parent / record['sprite']]
+    source_mtime = video_path.stat().st_mtime
+    return all(path.exists() and path.stat().st_mtime >= source_mtime for path in outputs)
+
+
+@profiled('previews')
+def generate_previews(
+    video_path: Path,
+    output_dir: Path,
+    name: Optional[str] = None,
+    force: bool = False
+) -> Optional[Dict[str, Any]]:
+    """Generate the poster and sprite sheet for one video.
+
+    Args:
+        video_path: Source video
+        output_dir: Directory for the images and layout record
+        name: Output file stem (default: the video's stem)
+        force: Regenerate even if the outputs are newer than the video
+
+    Returns:
+        Layout record with 'poster' and 'sprite' file names, 'content_type',
+        'columns', 'rows', 'tile_width', 'tile_height' and 'interval'
+        (seconds per tile), or None if generation failed
+    """
+    name = name or video_path.stem
+    record_path = output_dir / f"{name}.previews.json"
+    if not force and _is_up_to_date(record_path, video_path):
+        print(f"[SKIP] Previews up to date: {name}")
+        return json.loads(record_path.read_text())
+
+    probe = probe_video(video_path)
+    duration = float((probe or {}).get('format', {}).get('duration') or 0)
+    if not duration:
+        print(f"[ERROR] Cannot read the duration of {video_path.name}")
+        return None
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fmt = image_format()
+    poster = output_dir / f"{name}.poster{fmt['extension']}"
+    sprite = output_dir / f"{name}.sprite{fmt['extension']}"
+
+    if not extract_poster(video_path, poster, duration) or not build_sprite(video_path, sprite, duration):
+        return None
+
+    record = {
+        'poster': poster.name,
+        'sprite': sprite.name,
+        'content_type': fmt['content_type'],
+        'columns': SPRITE_COLUMNS,
+        'rows': SPRITE_ROWS,
+        'tile_width': TILE_WIDTH,
+        'tile_height': TILE_HEIGHT,
+        'interval': round(duration / (SPRITE_COLUMNS * SPRITE_ROWS), 3),
+    }
+    record_path.write_text(json.dumps(record, indent=2))
+    size_kib = (poster.stat().st_size + sprite.stat().st_size) / 1024
+    print(f"[OK] Previews for {name}: {poster.name}, {sprite.name} ({size_kib:.0f} KiB)")
+    return record
+
+
+def _video_files(paths: List[Path]) -> List[Path]:
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(f for f in path.iterdir() if f.suffix.lower() in VIDEO_EXTENSIONS))
+        else:
+            files.append(path)
+    return files
+
+
+def previews_from_manifest(
+    manifest_path: Path,
+    output_dir: Path,
+    filters: Optional[Dict[str, List[Any]]] = None,
+    force: bool = False
+) -> Dict[str, Any]:
+    """Generate previews for every downloaded or merged video in a manifest.
+
+    Merged videos are used for multi-part entries, downloads otherwise.
+
+    Returns:
+        Dict with successful, failed and skipped entries
+    """
+    results = {'successful': [], 'failed': [], 'skipped': []}
+    preview_dir = output_dir / 'previews'
+
+    print(f"\nProcessing manifest: {manifest_path.name}")
+    if filters:
+        print(f"Filter: {describe_filters(filters)}")
+
+    for entry in iter_manifest(manifest_path, filters):
+        filename = entry['filename']
+        source_dir = output_dir / ('merged' if entry.get('merge_sources') else 'downloads')
+        video_path = find_video_file(source_dir, filename)
+        if video_path is None:
+            print(f"[SKIP] File not found: {filename}")
+            results['skipped'].append({'title': entry['title'], 'reason': 'file not found'})
+            continue
+
+        record = generate_previews(video_path, preview_dir, filename, force)
+        if record:
+            results['successful'].append({'title': entry['title'], **record})
+        else:
+            results['failed'].append({'title': entry['title']})
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate poster frames and hover-preview sprites',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Previews for every downloaded/merged video in a manifest
+  python previews.py --manifest manifest.json --output-dir ./output
+
+  # Previews for loose files (written next to them unless -o is given)
+  python previews.py show_2017.mp4 ./recordings -o ./previews
+
+  # Regenerate 2017 previews
+  python previews.py --manifest archive.jsonl --output-dir ./output --year 2017 --force
+        '''
+    )
+    parser.add_argument('files', nargs='*', help='Video files or directories')
+    parser.add_argument('--manifest', help='Manifest file (.json or .jsonl)')
+    parser.add_argument('-o', '--output-dir',
+                        help='With --manifest: base output directory (previews go in previews/); '
+                             'otherwise: directory for the images (default: next to each video)')
+    parser.add_argument('--force', action='store_true', help='Regenerate up-to-date previews')
+    add_filter_arguments(parser)
+    add_profile_argument(parser)
+
+    args = parser.parse_args()
+    profiling.start(args.profile)
+
+    if bool(args.manifest) == bool(args.files):
+        parser.error('give either video files or --manifest')
+
+    if args.manifest:
+        results = previews_from_manifest(
+            Path(args.manifest),
+            Path(args.output_dir or './output'),
+            filters_from_args(args),
+            args.force
+        )
+    else:
+        results = {'successful': [], 'failed': [], 'skipped': []}
+        for video_path in _video_files([Path(f) for f in args.files]):
+            if not video_path.exists():
+                print(f"[SKIP] File not found: {video_path}")
+                results['skipped'].append({'title': video_path.name, 'reason': 'file not found'})
+                continue
+            output_dir = Path(args.output_dir) if args.output_dir else video_path.parent
+            record = generate_previews(video_path, output_dir, force=args.force)
+            key = 'successful' if record else 'failed'
+            results[key].append({'title': video_path.name, **(record or {})})
+
+    print(f"\n{'='*60}")
+    print("PREVIEWS SUMMARY")
+    print(f"{'='*60}")
+    print(f"Generated: {len(results['successful'])}")
+    print(f"Failed: {len(results['failed'])}")
+    print(f"Skipped: {len(results['skipped'])}")
+
+    return 1 if results['failed'] else 0
+
+
+if __name__ == '__main__':
+    exit(main())
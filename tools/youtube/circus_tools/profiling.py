@@ -0,0 +1,251 @@
+"""Opt-in per-stage CPU and memory profiling (--profile).
+
+Code marks its stages with `with stage('upload'):`. Unless profiling has
+been enabled this costs nothing. When enabled, each stage gets its own
+cProfile profile and tracemalloc measurements, accumulated over every time
+the stage runs, and at exit the reports are saved for each stage:
+
+    <stage>.prof     pstats dump (snakeviz, pstats, gprof2dot)
+    <stage>.txt      top functions by cumulative time, plus memory growth
+    <stage>.folded   collapsed stacks for flamegraph.pl / speedscope
+
+along with summary.txt covering all stages.
+
+A nested stage pauses its parent's profile, so each stage's report covers
+only its own work. cProfile can only follow one thread, so stages entered
+from worker threads (e.g. download --jobs) record wall time only.
+"""
+
+import argparse
+import atexit
+import contextlib
+import cProfile
+import functools
+import io
+import linecache
+import pstats
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_ARTIFACTS_DIR = 'profile'
+
+REPORT_FUNCTIONS = 40       # functions listed per stage report
+REPORT_ALLOCATIONS = 15     # allocation sites listed per stage report
+FOLDED_MAX_DEPTH = 64       # flamegraph stack depth limit
+TRACEMALLOC_FRAMES = 10
+
+
+class StageProfiler:
+    """Collects cProfile and tracemalloc data per named stage."""
+
+    def __init__(self, artifacts_dir: Path):
+        self.artifacts_dir = artifacts_dir
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._stack: List[Dict[str, Any]] = []
+        self._main_thread = threading.main_thread()
+        self._lock = threading.Lock()
+
+    def _stats(self, name: str) -> Dict[str, Any]:
+        if name not in self.stages:
+            self.stages[name] = {
+                'calls': 0,
+                'wall': 0.0,
+                'profile': cProfile.Profile(),
+                'peak': 0,
+                'growth': {},
+                'threaded_calls': 0,
+            }
+        return self.stages[name]
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if threading.current_thread() is not self._main_thread:
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                with self._lock:
+                    stats = self._stats(name)
+                    stats['calls'] += 1
+                    stats['threaded_calls'] += 1
+                    stats['wall'] += time.perf_counter() - started
+            return
+
+        stats = self._stats(name)
+        parent = self._stack[-1] if self._stack else None
+        if parent:
+            parent['stats']['profile'].disable()
+
+        frame = {'stats': stats, 'child_peak': 0}
+        self._stack.append(frame)
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        stats['profile'].enable()
+        try:
+            yield
+        finally:
+            stats['profile'].disable()
+            elapsed = time.perf_counter() - started
+            peak = max(tracemalloc.get_traced_memory()[1], frame['child_peak'])
+            after = tracemalloc.take_snapshot()
+            self._stack.pop()
+
+            stats['calls'] += 1
+            stats['wall'] += elapsed
+            stats['peak'] = max(stats['peak'], peak)
+            for diff in after.compare_to(before, 'lineno'):
+                if diff.size_diff:
+                    frame_info = diff.traceback[0]
+                    key = (frame_info.filename, frame_info.lineno)
+                    stats['growth'][key] = stats['growth'].get(key, 0) + diff.size_diff
+
+            if parent:
+                parent['child_peak'] = max(parent['child_peak'], peak)
+                parent['stats']['profile'].enable()
+
+    def write_reports(self) -> None:
+        self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+
+        summary = [f"{'stage':<16} {'calls':>6} {'wall s':>9} {'profiled':>9} {'peak MiB':>9}"]
+        for name, stats in self.stages.items():
+            profile_stats = _load_stats(stats['profile'])
+            profiled_time = profile_stats.total_tt if profile_stats else 0.0
+            summary.append(
+                f"{name:<16} {stats['calls']:>6} {stats['wall']:>9.2f} {profiled_time:>9.2f} "
+                f"{stats['peak'] / 1024**2:>9.1f}"
+            )
+            if stats['threaded_calls']:
+                summary.append(f"  ({stats['threaded_calls']} calls in worker threads: wall time only)")
+
+            if profile_stats:
+                stats['profile'].dump_stats(str(self.artifacts_dir / f"{name}.prof"))
+                (self.artifacts_dir / f"{name}.folded").write_text(
+                    '\n'.join(folded_stacks(profile_stats)) + '\n'
+                )
+            (self.artifacts_dir / f"{name}.txt").write_text(
+                _stage_report(name, stats, profile_stats)
+            )
+
+        (self.artifacts_dir / 'summary.txt').write_text('\n'.join(summary) + '\n')
+
+        print(f"\n{'='*60}")
+        print("PROFILE SUMMARY")
+        print(f"{'='*60}")
+        print('\n'.join(summary))
+        print(f"\nReports written to {self.artifacts_dir}/")
+
+
+def _load_stats(profile: cProfile.Profile) -> Optional[pstats.Stats]:
+    try:
+        profile_stats = pstats.Stats(profile, stream=io.StringIO())
+    except TypeError:
+        return None  # stage never ran any profiled code
+    return profile_stats if profile_stats.stats else None
+
+
+def _stage_report(name: str, stats: Dict[str, Any], profile_stats: Optional[pstats.Stats]) -> str:
+    out = io.StringIO()
+    out.write(f"Stage: {name}\n")
+    out.write(f"Calls: {stats['calls']}, wall time: {stats['wall']:.2f}s, "
+              f"peak traced memory: {stats['peak'] / 1024**2:.1f} MiB\n\n")
+
+    if profile_stats:
+        profile_stats.stream = out
+        profile_stats.sort_stats('cumulative').print_stats(REPORT_FUNCTIONS)
+
+    growth = sorted(stats['growth'].items(), key=lambda item: abs(item[1]), reverse=True)
+    out.write("Memory growth by allocation site (summed over calls):\n")
+    for (filename, lineno), size in growth[:REPORT_ALLOCATIONS]:
+        source = linecache.getline(filename, lineno).strip()
+        out.write(f"  {size / 1024:>+12.1f} KiB  {filename}:{lineno}  {source}\n")
+    if not growth:
+        out.write("  (none)\n")
+    return out.getvalue()
+
+
+def _label(func: Tuple[str, int, str]) -> str:
+    filename, lineno, name = func
+    if filename == '~':
+        return name  # built-in
+    return f"{name} ({Path(filename).name}:{lineno})"
+
+
+def folded_stacks(profile_stats: pstats.Stats) -> List[str]:
+    """Convert pstats data into collapsed stacks ("a;b;c <microseconds>").
+
+    cProfile records caller/callee pairs rather than whole stacks, so each
+    path's time is apportioned from the per-edge timings: a callee reached
+    through a caller gets that caller's share of the callee's time.
+    """
+    raw = profile_stats.stats
+    children: Dict[Any, List[Tuple[Any, float, float]]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, (_, _, edge_tt, edge_ct) in callers.items():
+            children.setdefault(caller, []).append((func, edge_tt, edge_ct))
+
+    totals: Dict[str, float] = {}
+
+    def walk(func, path: List[str], on_path: set, tt: float, ct: float) -> None:
+        path = path + [_label(func)]
+        key = ';'.join(path)
+        totals[key] = totals.get(key, 0.0) + tt
+        if len(path) >= FOLDED_MAX_DEPTH:
+            return
+
+        func_ct = raw[func][3]
+        scale = ct / func_ct if func_ct else 0.0
+        for callee, edge_tt, edge_ct in children.get(func, []):
+            if callee in on_path or edge_ct * scale < 1e-6:
+                continue
+            walk(callee, path, on_path | {callee}, edge_tt * scale, edge_ct * scale)
+
+    # Skip the profiler's own enter/exit frames
+    own_files = {__file__, contextlib.__file__}
+    roots = [func for func, entry in raw.items() if not entry[4] and func[0] not in own_files]
+    for func in roots:
+        _, _, tt, ct, _ = raw[func]
+        walk(func, [], {func}, tt, ct)
+
+    return [f"{key} {round(value * 1e6)}" for key, value in totals.items() if value >= 1e-6]
+
+
+_profiler: Optional[StageProfiler] = None
+
+
+def stage(name: str):
+    """Context manager marking a profiled stage (no-op unless enabled)."""
+    if _profiler is None:
+        return contextlib.nullcontext()
+    return _profiler.stage(name)
+
+
+def profiled(name: str) -> Callable:
+    """Decorator running a whole function as a profiled stage."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start(artifacts_dir: Optional[str]) -> None:
+    """Enable profiling if artifacts_dir is set; reports are written at exit."""
+    global _profiler
+    if not artifacts_dir or _profiler is not None:
+        return
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+    _profiler = StageProfiler(Path(artifacts_dir))
+    atexit.register(_profiler.write_reports)
+    print(f"[INFO] Profiling enabled, reports go to {artifacts_dir}/")
+
+
+def add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_ARTIFACTS_DIR, metavar='DIR',
+                        help='Profile each stage (cProfile + tracemalloc) and write reports '
+                             f'and flamegraph stacks to DIR (default: ./{DEFAULT_ARTIFACTS_DIR})')
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""Bring already-uploaded videos' titles, descriptions and tags up to date.
+
+The desired snippet of every archived video is rendered from the database
+with the same builders the uploads use (build_title, generate_description,
+build_tags). Current snippets are fetched 50 per videos.list call, and
+videos.update (50 quota units each) is sent only for videos whose metadata
+really differs, in priority order: wrong titles first, then descriptions,
+then tags, most-viewed first within each. Titles edited by hand on YouTube
+are kept unless --retitle is given.
+
+API units spent are tracked per day in the cache directory. When the day's
+budget runs out the run stops; rerunning the next day carries on with
+whatever still differs.
+"""
+
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from googleapiclient.errors import HttpError
+
+from circus_tools import profiling
+from circus_tools.channels import QuotaBudget
+from circus_tools.db import SHOW_NAMES, fetch_archive_videos, get_db_connection
+from circus_tools.metadata import build_tags, build_title, generate_description, parse_archive_meta
+from circus_tools.profiling import add_profile_argument, profiled
+from circus_tools.upload import load_channel_pool
+from circus_tools.youtube_api import (
+    MANAGE_SCOPES, MAX_RETRIES, QUOTA_REASONS, VIDEOS_LIST_BATCH, error_reason, list_videos
+)
+
+FIELDS = ['title', 'description', 'tags']
+
+# Quota units per call, and the default share of the daily 10,000 to spend
+# (uploads cost 1,600 each, so leave them room)
+LIST_COST = 1
+UPDATE_COST = 50
+DEFAULT_BUDGET = 2000
+
+# Snippet fields YouTube sets itself; they can't be sent back in an update
+READ_ONLY_SNIPPET_FIELDS = ['publishedAt', 'channelId', 'channelTitle', 'thumbnails',
+                            'liveBroadcastContent', 'localized']
+
+
+def render_snippet(row: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Render the title, description and tags a video should have.
+
+    Source IDs aren't in the database, so they're kept from the current
+    description's meta block.
+    """
+    show = SHOW_NAMES.get(row['show_type'])
+    act = row['acts'][0] if row['acts'] else None
+    meta = parse_archive_meta(current.get('description')) or {}
+    return {
+        'title': build_title(row['acts'], row['year'], show),
+        'description': generate_description(
+            act=act,
+            year=row['year'],
+            show=show,
+            performers=row['performers'] or None,
+            source_ids=meta.get('source_ids'),
+            notes=row['description']
+        ),
+        'tags': build_tags(act or '', row['year'], show),
+    }
+
+
+def is_generated_title(snippet: Dict[str, Any], row: Dict[str, Any]) -> bool:
+    """Whether a video's current title is one build_title produced.
+
+    The description's meta block records the act, year and show the title
+    was last built from (the first act only, so the database's act list is
+    tried as well). Any other title was edited by hand.
+    """
+    meta = parse_archive_meta(snippet.get('description'))
+    if not meta:
+        return False
+    candidates = {build_title(acts, meta.get('year'), meta.get('show'))
+                  for acts in ([meta['act']] if meta.get('act') else [], row['acts'])}
+    return snippet.get('title') in candidates
+
+
+def diff_snippet(current: Dict[str, Any], desired: Dict[str, Any], fields: List[str]) -> List[str]:
+    """Fields whose current value differs from the desired one."""
+    return [field for field in fields
+            if (current.get(field) or ([] if field == 'tags' else '')) != desired[field]]
+
+
+def priority(changed: List[str], video: Dict[str, Any]) -> tuple:
+    views = int(video.get('statistics', {}).get('viewCount', 0))
+    return (min(FIELDS.index(field) for field in changed), -views)
+
+
+@profiled('list')
+def plan_updates(pool, rows: Dict[str, Dict[str, Any]], fields: List[str],
+                 budget: Optional[QuotaBudget], retitle: bool = False) -> List[Dict[str, Any]]:
+    """Find every owned video whose metadata differs, in priority order.
+
+    Each channel is asked about the videos earlier channels didn't own;
+    only videos whose snippet.channelId is the asking channel can be updated
+    by it. Without a budget (dry runs) the list calls aren't charged.
+    """
+    unowned = set(rows)
+    plan = []
+    kept_titles = 0
+    for channel in pool.channels:
+        if not unowned:
+            break
+        youtube = pool.service(channel)
+        calls = 1 + -(-len(unowned) // VIDEOS_LIST_BATCH)
+        if budget and not budget.spend(calls * LIST_COST):
+            print(f"[STOP] Not enough quota left to read {channel['name']}'s videos")
+            break
+
+        mine = youtube.channels().list(part='id', mine=True).execute(num_retries=MAX_RETRIES)
+        channel_id = mine['items'][0]['id']
+        videos = list_videos(youtube, unowned, 'snippet,statistics',
+                             'items(id,snippet,statistics/viewCount)')
+
+        for youtube_id, video in videos.items():
+            if video['snippet'].get('channelId') != channel_id:
+                continue
+            unowned.discard(youtube_id)
+            desired = render_snippet(rows[youtube_id], video['snippet'])
+            changed = diff_snippet(video['snippet'], desired, fields)
+            if 'title' in changed and not retitle and not is_generated_title(
+                video['snippet'], rows[youtube_id]
+            ):
+                changed.remove('title')
+                kept_titles += 1
+            if changed:
+                plan.append({
+                    'youtube_id': youtube_id,
+                    'title': rows[youtube_id]['title'],
+                    'channel': channel,
+                    'snippet': video['snippet'],
+                    'desired': desired,
+                    'changed': changed,
+                    'priority': priority(changed, video),
+                })
+
+    if kept_titles:
+        print(f"[INFO] Kept {kept_titles} titles edited on YouTube (--retitle to overwrite them)")
+    plan.sort(key=lambda update: update['priority'])
+    return plan
+
+
+def _summary(update: Dict[str, Any]) -> Dict[str, Any]:
+    return {'youtube_id': update['youtube_id'], 'title': update['title'], 'changed': update['changed']}
+
+
+def apply_update(pool, update: Dict[str, Any]) -> None:
+    """Send one videos.update with the changed fields merged into the current snippet."""
+    snippet = {key: value for key, value in update['snippet'].items()
+               if key not in READ_ONLY_SNIPPET_FIELDS}
+    for field in update['changed']:
+        snippet[field] = update['desired'][field]
+
+    pool.service(update['channel']).videos().update(
+        part='snippet',
+        body={'id': update['youtube_id'], 'snippet': snippet}
+    ).execute(num_retries=MAX_RETRIES)
+
+
+@profiled('update')
+def update_metadata(
+    pool,
+    conn,
+    fields: List[str],
+    budget: QuotaBudget,
+    dry_run: bool = False,
+    limit: Optional[int] = None,
+    retitle: bool = False
+) -> Dict[str, Any]:
+    """Update every archived video whose metadata differs from the database.
+
+    Args:
+        pool: ChannelPool of the channels whose videos may be updated
+        conn: Database connection
+        fields: Snippet fields to bring up to date
+        budget: Daily quota budget (not charged on a dry run)
+        dry_run: Only report what would change
+        limit: Maximum number of updates this run
+        retitle: Also overwrite titles that were edited by hand
+
+    Returns:
+        Dict with updated, failed and pending updates
+    """
+    rows = fetch_archive_videos(conn)
+    plan = plan_updates(pool, rows, fields, None if dry_run else budget, retitle)
+    print(f"[PLAN] {len(plan)} of {len(rows)} videos need updating")
+
+    results = {'updated': [], 'failed': [], 'pending': []}
+    for number, update in enumerate(plan):
+        if dry_run:
+            print(f"[PLAN] {update['title']} ({update['youtube_id']}): {', '.join(update['changed'])}")
+            results['pending'].append(_summary(update))
+            continue
+
+        if (limit is not None and number >= limit) or not budget.spend(UPDATE_COST):
+            results['pending'].extend(_summary(rest) for rest in plan[number:])
+            break
+
+        try:
+            apply_update(pool, update)
+        except HttpError as e:
+            reason = error_reason(e)
+            if reason in QUOTA_REASONS:
+                print("[STOP] YouTube reports the API quota is spent")
+                budget.exhaust()
+                results['pending'].extend(_summary(rest) for rest in plan[number:])
+                break
+            print(f"[ERROR] {update['title']}: HTTP {e.resp.status} {reason or ''}")
+            results['failed'].append(_summary(update))
+            continue
+
+        print(f"[OK] {update['title']}: {', '.join(update['changed'])}")
+        results['updated'].append(_summary(update))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Update uploaded videos whose metadata differs from the database',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Show what would change
+  python update_metadata.py --dry-run
+
+  # Update up to the default daily budget; rerun tomorrow to continue
+  python update_metadata.py
+
+  # Only fix descriptions, spending at most 5000 units today
+  python update_metadata.py --fields description --budget 5000
+
+  # Also rebuild titles that were edited by hand on YouTube
+  python update_metadata.py --fields title --retitle
+
+Needs DATABASE_PUBLIC_URL and a token that can manage videos (see Credentials).
+        '''
+    )
+    parser.add_argument('--channel', action='append', metavar='NAME',
+                        help='Channel whose videos to update (repeatable; default: every saved channel)')
+    parser.add_argument('--fields', default=','.join(FIELDS),
+                        help=f'Comma-separated fields to update (default: {",".join(FIELDS)})')
+    parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET,
+                        help=f'API units to spend per day (default: {DEFAULT_BUDGET}; '
+                             f'each update costs {UPDATE_COST})')
+    parser.add_argument('--limit', type=int, help='Maximum number of videos to update this run')
+    parser.add_argument('--retitle', action='store_true',
+                        help='Also rebuild titles that were edited by hand on YouTube')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only list the videos that would change (spends no budget)')
+    parser.add_argument('--cache-dir', default='./output/cache',
+                        help='Directory for the daily quota record (default: ./output/cache)')
+    add_profile_argument(parser)
+
+    args = parser.parse_args()
+    profiling.start(args.profile)
+
+    fields = [field.strip() for field in args.fields.split(',') if field.strip()]
+    unknown = set(fields) - set(FIELDS)
+    if unknown or not fields:
+        parser.error(f"--fields must be chosen from {', '.join(FIELDS)}")
+    fields.sort(key=FIELDS.index)
+
+    try:
+        pool = load_channel_pool(args.channel, scopes=MANAGE_SCOPES)
+        conn = get_db_connection()
+    except (RuntimeError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    budget = QuotaBudget(Path(args.cache_dir) / 'metadata-quota.json', args.budget)
+    print(f"Quota used today: {budget.used}/{budget.limit} units")
+
+    try:
+        results = update_metadata(pool, conn, fields, budget, args.dry_run, args.limit, args.retitle)
+    finally:
+        if not args.dry_run:
+            budget.save()
+        conn.close()
+
+    print(f"\n{'='*60}")
+    print("METADATA UPDATE SUMMARY")
+    print(f"{'='*60}")
+    print(f"Updated: {len(results['updated'])}")
+    print(f"Failed: {len(results['failed'])}")
+    print(f"Pending: {len(results['pending'])}")
+    print(f"Quota used today: {budget.used}/{budget.limit} units")
+    if results['pending'] and not args.dry_run:
+        print("\nRerun tomorrow (or raise --budget) to update the rest.")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
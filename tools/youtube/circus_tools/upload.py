@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""Upload a video to YouTube using the Data API v3."""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from google.auth.transport.requests import Request
+
+from circus_tools import profiling
+from circus_tools.channels import ChannelPool, FileUploadCounter, NoChannelCapacity, upload_with_pool
+from circus_tools.manifest import describe_filters, iter_manifest
+from circus_tools.metadata import build_tags, generate_description, youtube_url
+from circus_tools.optimize import DEFAULT_UPLINK_MBPS, UploadOptimizer
+from circus_tools.profiling import add_profile_argument, profiled
+from circus_tools.youtube_api import CONSENT_SCOPES, SCOPES, build_service, upload_video
+
+# Path constants (CIRCUS_TOOLS_CREDENTIALS overrides for installed copies)
+CREDENTIALS_DIR = Path(
+    os.environ.get('CIRCUS_TOOLS_CREDENTIALS', Path(__file__).parent.parent / 'credentials')
+)
+CLIENT_SECRETS_FILE = CREDENTIALS_DIR / 'client_secrets.json'
+TOKEN_FILE = CREDENTIALS_DIR / 'token.json'
+
+# Extra channels: one token per channel, plus today's per-channel upload counts
+CHANNELS_DIR = CREDENTIALS_DIR / 'channels'
+UPLOAD_COUNTS_FILE = CREDENTIALS_DIR / 'upload_counts.json'
+DEFAULT_CHANNEL = 'default'
+
+
+@profiled('oauth')
+def get_authenticated_service(token_file: Path = TOKEN_FILE, scopes: List[str] = SCOPES):
+    """Authenticate and return a YouTube API service object.
+
+    A browser sign-in asks for every scope the tools use (CONSENT_SCOPES),
+    so one consent covers uploads, audits and metadata updates.
+
+    Args:
+        token_file: Saved token for the channel (created by browser sign-in)
+        scopes: Access the caller needs; a saved token without it signs in again
+
+    Returns:
+        YouTube API service object
+    """
+    creds = None
+
+    # Load existing token if available, unless it was issued for less access
+    if token_file.exists():
+        granted = json.loads(token_file.read_text()).get('scopes') or SCOPES
+        if set(scopes) <= set(granted):
+            creds = Credentials.from_authorized_user_file(str(token_file), granted)
+        else:
+            print(f"Saved token {token_file.name} lacks {', '.join(sorted(set(scopes) - set(granted)))}")
+
+    # Refresh or get new credentials if needed
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            print("Refreshing access token...")
+            creds.refresh(Request())
+        else:
+            if not CLIENT_SECRETS_FILE.exists():
+                raise FileNotFoundError(
+                    f"Client secrets file not found: {CLIENT_SECRETS_FILE}\n"
+                    "Download it from Google Cloud Console and place it in credentials/"
+                )
+
+            print("Opening browser for authentication...")
+            flow = InstalledAppFlow.from_client_secrets_file(
+                str(CLIENT_SECRETS_FILE), CONSENT_SCOPES
+            )
+            creds = flow.run_local_server(port=0)
+
+        # Save credentials for next run
+        token_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(token_file, 'w') as token:
+            token.write(creds.to_json())
+        print(f"Credentials saved to {token_file}")
+
+    return build_service(creds)
+
+
+def channel_token_file(name: str) -> Path:
+    return TOKEN_FILE if name == DEFAULT_CHANNEL else CHANNELS_DIR / f"{name}.json"
+
+
+def load_channel_pool(
+    names: Optional[List[str]] = None,
+    daily_limit: Optional[int] = None,
+    scopes: List[str] = SCOPES
+) -> ChannelPool:
+    """Build a pool from the saved channel tokens.
+
+    The pool holds credentials/token.json (channel "default") and every
+    credentials/channels/<name>.json. Naming channels restricts the pool to
+    them; a named channel without a token signs in through the browser on
+    first use.
+
+    Args:
+        names: Channels to use (default: every saved channel)
+        daily_limit: Uploads per channel per day (default: until YouTube refuses)
+        scopes: Access the command needs (default: uploading)
+
+    Returns:
+        ChannelPool with per-channel counts in UPLOAD_COUNTS_FILE
+    """
+    if not names:
+        names = [path.stem for path in sorted(CHANNELS_DIR.glob('*.json'))]
+        if TOKEN_FILE.exists() or not names:
+            names.insert(0, DEFAULT_CHANNEL)
+
+    channels = [
+        {'name': name, 'daily_limit': daily_limit, 'token_file': channel_token_file(name)}
+        for name in names
+    ]
+    return ChannelPool(
+        channels,
+        FileUploadCounter(UPLOAD_COUNTS_FILE),
+        lambda channel: get_authenticated_service(channel['token_file'], scopes)
+    )
+
+
+def upload_optimized(
+    pool: ChannelPool,
+    file_path: str,
+    title: str,
+    optimizer: Optional[UploadOptimizer] = None,
+    **kwargs
+) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Upload a video through the pool, optionally running the optimise stage first.
+
+    The file is optimised once, before the first channel is tried, so
+    failing over to another channel (quota spent, credentials refused)
+    re-sends the optimised copy instead of remuxing or transcoding it
+    again. The copy lives in a temporary directory until the upload ends.
+    The accepted upload's measured throughput refines the optimizer's
+    uplink estimate for the next file.
+
+    Args:
+        pool: Channels to upload to
+        file_path: Path to the video file
+        title: Video title
+        optimizer: UploadOptimizer, or None to upload the file as-is
+        **kwargs: Passed through to upload_video
+
+    Returns:
+        (video ID or None, channel used)
+
+    Raises:
+        NoChannelCapacity: No channel could take the upload
+    """
+    if optimizer is None or not Path(file_path).exists():
+        return upload_with_pool(pool, lambda youtube: upload_video(youtube, file_path, title, **kwargs))
+
+    work_dir = tempfile.mkdtemp(prefix='circus-optimize-')
+    try:
+        optimized = optimizer.optimize(Path(file_path), Path(work_dir))
+        upload_path = str(optimized['path'])
+
+        attempt = {}
+
+        def upload(youtube) -> Optional[str]:
+            attempt['started'] = time.monotonic()
+            return upload_video(youtube, upload_path, title, **kwargs)
+
+        video_id, channel = upload_with_pool(pool, upload)
+        if video_id:
+            optimizer.record_upload(optimized['size_after'], time.monotonic() - attempt['started'])
+        return video_id, channel
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def upload_from_manifest(
+    manifest_path: Path,
+    output_dir: Path,
+    privacy: str = 'unlisted',
+    optimizer: Optional[UploadOptimizer] = None,
+    filters: Optional[Dict[str, List[Any]]] = None,
+    pool: Optional[ChannelPool] = None
+) -> Dict[str, Any]:
+    """Upload all videos from a manifest file.
+
+    Each video goes to the channel in the pool with the most daily budget
+    left. The run stops early once every channel is at its limit.
+
+    Args:
+        manifest_path: Path to manifest file (.json or .jsonl)
+        output_dir: Base directory containing merged/downloaded videos
+        privacy: Privacy status for uploads
+        optimizer: Optional pre-upload optimise stage
+        filters: Optional act/year/show filters
+        pool: Channels to upload to (default: every saved channel)
+
+    Returns:
+        Dict with upload results
+    """
+    pool = pool or load_channel_pool()
+
+    results = {
+        'successful': [],
+        'failed': [],
+        'skipped': []
+    }
+
+    downloads_dir = output_dir / 'downloads'
+    merged_dir = output_dir / 'merged'
+
+    print(f"\nProcessing manifest: {manifest_path.name}")
+    if filters:
+        print(f"Filter: {describe_filters(filters)}")
+    print()
+
+    for entry in iter_manifest(manifest_path, filters):
+        title = entry['title']
+        filename = entry['filename']
+        act = entry.get('act')
+        year = entry.get('year')
+        show = entry.get('show')
+
+        # Determine video file location
+        if entry.get('merge_sources'):
+            video_path = merged_dir / f"{filename}.mp4"
+            source_ids = entry['merge_sources']
+        else:
+            video_path = downloads_dir / f"{filename}.mp4"
+            source_ids = [entry.get('source_id')]
+
+        if not video_path.exists():
+            print(f"[SKIP] File not found: {video_path}")
+            results['skipped'].append({'title': title, 'reason': 'file not found'})
+            continue
+
+        # Generate description and tags
+        description = generate_description(
+            act=act,
+            year=year,
+            show=show,
+            source_ids=source_ids
+        )
+        tags = build_tags(act, year, show)
+
+        print(f"\n{'='*60}")
+        print(f"Uploading: {title}")
+        print(f"File: {video_path.name}")
+
+        try:
+            video_id, channel = upload_optimized(
+                pool,
+                str(video_path),
+                title,
+                optimizer,
+                description=description,
+                privacy=privacy,
+                tags=tags
+            )
+        except NoChannelCapacity as e:
+            print(f"[STOP] {e}; remaining videos are left for another day")
+            results['skipped'].append({'title': title, 'reason': 'daily limit'})
+            break
+
+        if video_id:
+            results['successful'].append({
+                'title': title,
+                'video_id': video_id,
+                'url': youtube_url(video_id),
+                'channel': channel['name']
+            })
+        else:
+            results['failed'].append({'title': title})
+
+    # Print summary
+    print(f"\n{'='*60}")
+    print("UPLOAD SUMMARY")
+    print(f"{'='*60}")
+    print(f"Successful: {len(results['successful'])}")
+    print(f"Failed: {len(results['failed'])}")
+    print(f"Skipped: {len(results['skipped'])}")
+    print("Uploads today per channel:")
+    for line in pool.describe():
+        print(f"  {line}")
+
+    if results['successful']:
+        print("\nUploaded videos:")
+        for item in results['successful']:
+            print(f"  - {item['title']} [{item['channel']}]")
+            print(f"    {item['url']}")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Upload a video to YouTube',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Single video upload
+  python upload.py video.mp4 "My Video Title"
+  python upload.py video.mp4 "Title" -d "Description here" -p public
+  python upload.py video.mp4 "Title" -t "circus,fsu,performance"
+
+  # Upload from manifest
+  python upload.py --manifest ../manifest.json
+  python upload.py --manifest ../manifest.json -p public
+  python upload.py --manifest ../archive.jsonl --act Juggling --year 2017
+
+  # Circus video with auto-generated metadata
+  python upload.py video.mp4 "Juggling 2018" --act Juggling --year 2018 --show "Home Show"
+
+  # Shrink high-bitrate phone recordings before uploading
+  python upload.py --manifest ../manifest.json --optimize --uplink-mbps 10
+
+  # Spread uploads over two channels, 6 per channel per day
+  python upload.py --manifest ../manifest.json --channel main --channel overflow --daily-limit 6
+        '''
+    )
+    parser.add_argument('file', nargs='?', help='Path to the video file')
+    parser.add_argument('title', nargs='?', help='Video title')
+    parser.add_argument('-m', '--manifest', help='Path to manifest file (.json or .jsonl)')
+    parser.add_argument('-d', '--description', default='', help='Video description')
+    parser.add_argument('-p', '--privacy', default='unlisted',
+                        choices=['public', 'unlisted', 'private'],
+                        help='Privacy status (default: unlisted)')
+    parser.add_argument('-t', '--tags', default='',
+                        help='Comma-separated tags')
+    parser.add_argument('-c', '--category', default='22',
+                        help='Category ID (default: 22 = People & Blogs)')
+    parser.add_argument('--output-dir', default='./output',
+                        help='Output directory for manifest mode (default: ./output)')
+    parser.add_argument('--optimize', action='store_true',
+                        help='Remux for faststart before upload, and transcode when it '
+                             'saves more upload time than it costs')
+    parser.add_argument('--uplink-mbps', type=float, default=DEFAULT_UPLINK_MBPS,
+                        help='Initial uplink estimate for --optimize, refined by measured '
+                             f'uploads (default: {DEFAULT_UPLINK_MBPS})')
+    parser.add_argument('--channel', action='append', metavar='NAME',
+                        help='Upload through this channel (repeatable; default: every saved '
+                             'channel). A new name signs in through the browser and is saved '
+                             'as credentials/channels/NAME.json')
+    parser.add_argument('--daily-limit', type=int,
+                        help='Uploads per channel per day (default: until YouTube refuses)')
+
+    # Circus-specific options (filters in manifest mode)
+    parser.add_argument('--act', help='Act type (e.g., Juggling, Russian Bar)')
+    parser.add_argument('--year', type=int, help='Performance year')
+    parser.add_argument('--show', help='Show name (e.g., Home Show, Callaway Gardens)')
+    parser.add_argument('--performers', help='Comma-separated list of performer names')
+    parser.add_argument('--notes', help='Additional notes/description from uploader')
+
+    add_profile_argument(parser)
+
+    args = parser.parse_args()
+    profiling.start(args.profile)
+
+    optimizer = UploadOptimizer(uplink_mbps=args.uplink_mbps) if args.optimize else None
+    pool = load_channel_pool(args.channel, args.daily_limit)
+
+    try:
+        if args.manifest:
+            upload_from_manifest(
+                Path(args.manifest),
+                Path(args.output_dir),
+                privacy=args.privacy,
+                optimizer=optimizer,
+                pool=pool,
+                filters={
+                    field: [value]
+                    for field, value in (('act', args.act), ('year', args.year), ('show', args.show))
+                    if value is not None
+                }
+            )
+        elif args.file and args.title:
+            # Determine description
+            if args.act:
+                # Parse performers if provided
+                performers = None
+                if args.performers:
+                    performers = [p.strip() for p in args.performers.split(',') if p.strip()]
+
+                description = generate_description(
+                    act=args.act,
+                    year=args.year,
+                    show=args.show,
+                    performers=performers,
+                    notes=args.notes
+                )
+                tags = build_tags(args.act, args.year, args.show)
+            else:
+                description = args.description
+                tags = [t.strip() for t in args.tags.split(',') if t.strip()] if args.tags else []
+
+            upload_optimized(
+                pool,
+                args.file,
+                args.title,
+                optimizer,
+                description=description,
+                category_id=args.category,
+                privacy=args.privacy,
+                tags=tags
+            )
+        else:
+            parser.print_help()
+            return 1
+
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        return 1
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
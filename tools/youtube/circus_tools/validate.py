@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""Pre-flight validation of a manifest and the files it expects."""
+
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from circus_tools.manifest import add_filter_arguments, filters_from_args, iter_manifest
+from circus_tools.merge import find_video_file, probe_video, stream_profile
+
+# Which files each pipeline stage needs before it can run
+STAGES = ['download', 'merge', 'upload']
+
+KNOWN_FIELDS = {'title', 'filename', 'source_id', 'merge_sources', 'act', 'year', 'show', 'notes'}
+VIDEO_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+FILENAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+def _issue(level: str, entry: str, message: str) -> Dict[str, str]:
+    return {'level': level, 'entry': entry, 'message': message}
+
+
+def validate_entry(index: int, entry: Any) -> List[Dict[str, str]]:
+    """Check one manifest entry against the manifest schema."""
+    label = f"videos[{index}]"
+    if not isinstance(entry, dict):
+        return [_issue('error', label, 'entry is not an object')]
+
+    issues = []
+    label = entry.get('filename') or label
+
+    for field in ('title', 'filename'):
+        if not isinstance(entry.get(field), str) or not entry.get(field):
+            issues.append(_issue('error', label, f"'{field}' must be a non-empty string"))
+
+    filename = entry.get('filename')
+    if isinstance(filename, str) and filename and not FILENAME_PATTERN.match(filename):
+        issues.append(_issue('error', label, f"'filename' has unsafe characters: {filename!r}"))
+
+    has_source = 'source_id' in entry and entry['source_id'] is not None
+    has_merge = 'merge_sources' in entry and entry['merge_sources'] is not None
+    if has_source == has_merge:
+        issues.append(_issue('error', label, "needs exactly one of 'source_id' or 'merge_sources'"))
+    elif has_source:
+        if not isinstance(entry['source_id'], str) or not VIDEO_ID_PATTERN.match(entry['source_id']):
+            issues.append(_issue('error', label, f"invalid source_id {entry['source_id']!r}"))
+    else:
+        sources = entry['merge_sources']
+        if not isinstance(sources, list) or len(sources) < 2:
+            issues.append(_issue('error', label, "'merge_sources' must list at least two IDs"))
+        else:
+            for source_id in sources:
+                if not isinstance(source_id, str) or not VIDEO_ID_PATTERN.match(source_id):
+                    issues.append(_issue('error', label, f"invalid merge source {source_id!r}"))
+
+    year = entry.get('year')
+    if year is not None and (not isinstance(year, int) or not 1900 <= year <= 2100):
+        issues.append(_issue('error', label, f"'year' must be an integer year or null, got {year!r}"))
+    for field in ('act', 'show', 'notes'):
+        if entry.get(field) is not None and not isinstance(entry[field], str):
+            issues.append(_issue('error', label, f"'{field}' must be a string or null"))
+    if not entry.get('act'):
+        issues.append(_issue('warning', label, "no 'act' (description and tags will be generic)"))
+
+    unknown = sorted(set(entry) - KNOWN_FIELDS)
+    if unknown:
+        issues.append(_issue('warning', label, f"unknown fields: {', '.join(unknown)}"))
+
+    return issues
+
+
+def validate_schema(entries: Iterable[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Check every entry, and uniqueness across entries."""
+    issues = []
+    seen_filenames: Dict[str, int] = {}
+    seen_sources: Dict[str, str] = {}
+
+    for index, entry in enumerate(entries):
+        issues.extend(validate_entry(index, entry))
+
+        filename = entry.get('filename')
+        if isinstance(filename, str):
+            if filename in seen_filenames:
+                issues.append(_issue(
+                    'error', filename,
+                    f"duplicate filename (also videos[{seen_filenames[filename]}])"
+                ))
+            seen_filenames.setdefault(filename, index)
+
+        sources = entry.get('merge_sources') or [entry.get('source_id')]
+        for source_id in sources if isinstance(sources, list) else []:
+            if not isinstance(source_id, str):
+                continue
+            if source_id in seen_sources and seen_sources[source_id] != filename:
+                issues.append(_issue('warning', filename or f"videos[{index}]",
+                                     f"source {source_id} is also used by {seen_sources[source_id]}"))
+            seen_sources.setdefault(source_id, filename)
+
+    return issues
+
+
+def expected_files(entry: Dict[str, Any], output_dir: Path, stage: str) -> List[Dict[str, Any]]:
+    """List the files a stage needs for one entry.
+
+    Returns:
+        Dicts with 'name' (expected base name) and 'path' (existing file,
+        or None if missing)
+    """
+    downloads_dir = output_dir / 'downloads'
+    merged_dir = output_dir / 'merged'
+    filename = entry['filename']
+
+    if stage == 'download':
+        return []
+
+    if entry.get('merge_sources'):
+        if stage == 'merge':
+            names = [f"{filename}_part{i}" for i in range(1, len(entry['merge_sources']) + 1)]
+            return [
+                {'name': f"downloads/{name}", 'path': find_video_file(downloads_dir, name)}
+                for name in names
+            ]
+        merged = merged_dir / f"{filename}.mp4"
+        return [{'name': f"merged/{filename}.mp4", 'path': merged if merged.exists() else None}]
+
+    return [{'name': f"downloads/{filename}", 'path': find_video_file(downloads_dir, filename)}]
+
+
+def check_probe(probe: Optional[Dict[str, Any]]) -> List[str]:
+    """Problems found in one file's ffprobe result."""
+    if probe is None:
+        return ['unreadable (ffprobe failed; file may be corrupt or incomplete)']
+
+    problems = []
+    profile = stream_profile(probe)
+    if not profile['vcodec']:
+        problems.append('no video stream')
+    if not profile['acodec']:
+        problems.append("no audio stream (a full re-encode merge maps [i:a] and will fail)")
+    if not profile['duration'] or profile['duration'] <= 0:
+        problems.append('zero or unknown duration')
+    return problems
+
+
+def validate_manifest(
+    manifest_path: Path,
+    output_dir: Path,
+    stage: str = 'merge',
+    jobs: Optional[int] = None,
+    filters: Optional[Dict[str, List[Any]]] = None
+) -> List[Dict[str, str]]:
+    """Validate a manifest and probe every file the given stage needs.
+
+    Args:
+        manifest_path: Path to manifest file (.json or .jsonl)
+        output_dir: Base output directory (downloads/ and merged/)
+        stage: Pipeline stage about to run (download, merge, upload)
+        jobs: ffprobe worker processes (default: number of CPUs)
+        filters: Optional act/year/show filters
+
+    Returns:
+        List of issues, each with 'level', 'entry' and 'message'
+    """
+    read_issues: List[Dict[str, str]] = []
+    try:
+        entries = list(iter_manifest(
+            manifest_path,
+            filters,
+            lambda location, message: read_issues.append(_issue('error', location, message))
+        ))
+    except (OSError, ValueError) as e:
+        return [_issue('error', 'manifest', f"cannot read {manifest_path}: {e}")]
+
+    issues = read_issues + validate_schema(entries)
+
+    # Only well-formed entries can be mapped to files
+    broken = {i['entry'] for i in issues if i['level'] == 'error'}
+    entries = [
+        e for e in entries
+        if isinstance(e.get('filename'), str) and e['filename'] not in broken
+    ]
+
+    to_probe = []
+    group_files: Dict[str, List[Path]] = {}
+    for entry in entries:
+        for expected in expected_files(entry, output_dir, stage):
+            if expected['path'] is None:
+                issues.append(_issue('error', entry['filename'], f"missing {expected['name']}"))
+            else:
+                to_probe.append((entry['filename'], expected['path']))
+                if stage == 'merge' and entry.get('merge_sources'):
+                    group_files.setdefault(entry['filename'], []).append(expected['path'])
+
+    if to_probe:
+        workers = jobs or os.cpu_count() or 1
+        print(f"Probing {len(to_probe)} files with {workers} processes...")
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                probes = list(executor.map(probe_video, [path for _, path in to_probe]))
+        except OSError as e:
+            issues.append(_issue('error', 'environment', f"cannot run ffprobe: {e}"))
+            return issues
+
+        profiles: Dict[Path, Dict[str, Any]] = {}
+        for (filename, path), probe in zip(to_probe, probes):
+            for problem in check_probe(probe):
+                issues.append(_issue('error', filename, f"{path.name}: {problem}"))
+            if probe is not None:
+                profiles[path] = stream_profile(probe)
+
+        # Mismatched parts still merge, but cost a normalising encode
+        for filename, parts in group_files.items():
+            shapes = {
+                (p['vcodec'], p['width'], p['height'], p['fps'])
+                for p in (profiles.get(part) for part in parts) if p
+            }
+            if len(shapes) > 1:
+                issues.append(_issue('warning', filename,
+                                     f"parts differ in codec/resolution/fps ({len(shapes)} variants); "
+                                     "merge will re-encode the outliers"))
+
+    return issues
+
+
+def print_report(issues: List[Dict[str, str]]) -> None:
+    errors = [i for i in issues if i['level'] == 'error']
+    warnings = [i for i in issues if i['level'] == 'warning']
+
+    print(f"\n{'='*60}")
+    print("VALIDATION SUMMARY")
+    print(f"{'='*60}")
+    print(f"Errors: {len(errors)}")
+    print(f"Warnings: {len(warnings)}")
+
+    for title, group in (('Errors', errors), ('Warnings', warnings)):
+        if not group:
+            continue
+        print(f"\n{title}:")
+        for issue in group:
+            print(f"  [{issue['entry']}] {issue['message']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Validate a manifest and its files before a long run',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python validate.py --manifest ../manifest.json
+  python validate.py --manifest ../manifest.json --stage upload --output-dir ./output
+  python validate.py --manifest ../manifest.json --stage download
+        '''
+    )
+    parser.add_argument('-m', '--manifest', required=True,
+                        help='Path to manifest file (.json or .jsonl)')
+    parser.add_argument('--output-dir', default='./output',
+                        help='Output directory (default: ./output)')
+    parser.add_argument('--stage', default='merge', choices=STAGES,
+                        help='Stage about to run; decides which files must exist (default: merge)')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='ffprobe worker processes (default: number of CPUs)')
+    add_filter_arguments(parser)
+
+    args = parser.parse_args()
+
+    issues = validate_manifest(
+        Path(args.manifest), Path(args.output_dir), args.stage, args.jobs,
+        filters_from_args(args)
+    )
+    print_report(issues)
+
+    return 1 if any(i['level'] == 'error' for i in issues) else 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,431 @@
+"""YouTube Data API helpers shared by the upload tools and the queue processor."""
+
+import http.client
+import json
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import httplib2
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload
+
+from circus_tools.metadata import youtube_url
+from circus_tools.profiling import profiled
+
+# OAuth 2.0 scopes. Uploading only needs youtube.upload, the scope existing
+# tokens were issued with, so that is all uploads refresh with. Reading our
+# own videos (processing status, audits) needs youtube.readonly and editing
+# them (metadata updates, playlists) youtube.force-ssl; only those commands
+# ask for them. A browser sign-in asks for CONSENT_SCOPES, so one token
+# covers every command.
+SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
+READ_SCOPES = ['https://www.googleapis.com/auth/youtube.readonly']
+MANAGE_SCOPES = ['https://www.googleapis.com/auth/youtube.force-ssl']
+CONSENT_SCOPES = SCOPES + READ_SCOPES + MANAGE_SCOPES
+
+# videos.list accepts up to 50 IDs per call, for one quota unit; list
+# endpoints return at most 50 results per page
+VIDEOS_LIST_BATCH = 50
+PAGE_SIZE = 50
+
+# Retry settings for resumable uploads
+MAX_RETRIES = 10
+RETRIABLE_STATUS_CODES = [500, 502, 503, 504]
+RETRIABLE_EXCEPTIONS = (httplib2.HttpLib2Error, IOError, http.client.NotConnected,
+                        http.client.IncompleteRead, http.client.ImproperConnectionState,
+                        http.client.CannotSendRequest, http.client.CannotSendHeader,
+                        http.client.ResponseNotReady, http.client.BadStatusLine)
+
+# Error reasons meaning the channel can't take more uploads today (mostly
+# 403s, but uploadLimitExceeded comes back as a 400)
+QUOTA_REASONS = {'quotaExceeded', 'uploadLimitExceeded', 'dailyLimitExceeded'}
+
+# Resumable upload chunk sizing. Chunks must be multiples of 256KB; each one
+# is read into memory before it is sent, so the ceiling bounds memory use.
+CHUNK_UNIT = 256 * 1024
+INITIAL_CHUNK_SIZE = 1024 * 1024
+MAX_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_MAX_MB', '64')) * 1024 * 1024
+TARGET_CHUNK_SECONDS = 8.0  # long enough that per-request overhead is small
+OVERHEAD_FRACTION = 0.05    # ...and at most this share of a chunk's time
+OVERHEAD_WINDOW = 16        # recent chunks used to estimate overhead
+
+
+class ChunkSizer:
+    """Picks the next resumable-upload chunk size from measured performance.
+
+    Every chunk costs a full HTTP round trip on top of its transfer time.
+    The sizer tracks throughput (smoothed) and per-request overhead (the
+    intercept of a least-squares fit of chunk time against chunk size over
+    recent chunks), and sizes chunks so each takes TARGET_CHUNK_SECONDS, or
+    longer when the overhead is high. Growth is at most 2x per chunk. An
+    error halves the size so the retried chunk is cheap to resend.
+    """
+
+    def __init__(self, initial: int = INITIAL_CHUNK_SIZE, maximum: int = MAX_CHUNK_SIZE):
+        self.maximum = max(_round_to_unit(maximum), CHUNK_UNIT)
+        self.size = min(_round_to_unit(initial), self.maximum)
+        self.throughput: Optional[float] = None  # bytes/s, smoothed
+        self.overhead = 0.0                      # seconds per request
+        self.errors = 0
+        self.stats: List[Dict[str, Any]] = []
+
+    def record(self, sent: int, seconds: float) -> None:
+        """Record a completed chunk and resize for the next one."""
+        seconds = max(seconds, 1e-3)
+        rate = sent / seconds
+        self.throughput = rate if self.throughput is None else 0.7 * self.throughput + 0.3 * rate
+
+        self.stats.append({
+            'chunk': len(self.stats) + 1,
+            'size': self.size,
+            'bytes': sent,
+            'seconds': seconds,
+            'throughput': rate,
+        })
+        self.overhead = _fit_overhead(self.stats[-OVERHEAD_WINDOW:], self.overhead)
+
+        target_seconds = max(TARGET_CHUNK_SECONDS, self.overhead / OVERHEAD_FRACTION)
+        wanted = _round_to_unit(self.throughput * target_seconds)
+        self.size = max(CHUNK_UNIT, min(wanted, self.size * 2, self.maximum))
+
+    def record_error(self) -> None:
+        """Shrink after a failed chunk so the retry resends less."""
+        self.errors += 1
+        self.size = max(CHUNK_UNIT, _round_to_unit(self.size // 2))
+
+    def describe_last(self) -> str:
+        last = self.stats[-1]
+        return (f"chunk {last['chunk']}: {last['bytes'] / 1024**2:.1f} MiB in {last['seconds']:.1f}s "
+                f"({last['throughput'] / 1024**2:.1f} MiB/s), next {self.size / 1024**2:.2f} MiB")
+
+    def summary(self) -> str:
+        if not self.stats:
+            return "No chunks sent"
+        sent = sum(chunk['bytes'] for chunk in self.stats)
+        seconds = sum(chunk['seconds'] for chunk in self.stats)
+        sizes = [chunk['size'] for chunk in self.stats]
+        return (f"{len(self.stats)} chunks ({min(sizes) / 1024**2:.2f}-{max(sizes) / 1024**2:.2f} MiB), "
+                f"{sent / 1024**2:.1f} MiB in {seconds:.1f}s ({sent / seconds / 1024**2:.1f} MiB/s), "
+                f"overhead {self.overhead:.2f}s/request, {self.errors} chunk errors")
+
+
+class QuotaExceeded(Exception):
+    """Raised when YouTube refuses an upload because the channel's quota is spent."""
+
+
+class UploadCancelled(Exception):
+    """Raised when an upload is stopped through its cancel event before the video exists."""
+
+
+def error_reason(error: HttpError) -> Optional[str]:
+    """The first error reason in an API error response (e.g. quotaExceeded)."""
+    try:
+        return json.loads(error.content)['error']['errors'][0]['reason']
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+
+def list_videos(
+    youtube,
+    video_ids: Iterable[str],
+    part: str,
+    fields: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Fetch videos by ID, VIDEOS_LIST_BATCH IDs per videos.list call.
+
+    Args:
+        youtube: Authenticated YouTube API service
+        video_ids: YouTube video IDs
+        part: Comma-separated resource parts
+        fields: Optional partial-response filter (fewer bytes, same quota)
+
+    Returns:
+        Dict of video ID -> video resource. IDs YouTube doesn't return
+        (deleted, or private to another channel) are absent.
+    """
+    video_ids = list(video_ids)
+    videos = {}
+    for start in range(0, len(video_ids), VIDEOS_LIST_BATCH):
+        batch = video_ids[start:start + VIDEOS_LIST_BATCH]
+        request = youtube.videos().list(
+            part=part, id=','.join(batch), maxResults=VIDEOS_LIST_BATCH, fields=fields
+        )
+        response = request.execute(num_retries=MAX_RETRIES)
+        for item in response.get('items', []):
+            videos[item['id']] = item
+    return videos
+
+
+class ETagCache:
+    """List responses saved with their ETags, for conditional re-fetching.
+
+    A repeat request sends If-None-Match; when YouTube answers 304 the
+    saved response is reused instead of being downloaded again.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries = json.loads(path.read_text()) if path.exists() else {}
+        self.hits = 0
+        self.misses = 0
+
+    def execute(self, request, key: str) -> Dict[str, Any]:
+        cached = self.entries.get(key)
+        if cached:
+            request.headers['If-None-Match'] = cached['etag']
+        try:
+            response = request.execute(num_retries=MAX_RETRIES)
+        except HttpError as e:
+            if cached and e.resp.status == 304:
+                self.hits += 1
+                return cached['response']
+            raise
+        self.misses += 1
+        if response.get('etag'):
+            self.entries[key] = {'etag': response['etag'], 'response': response}
+        return response
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.entries))
+
+
+def _execute(request, cache: Optional[ETagCache], key: str) -> Dict[str, Any]:
+    if cache is None:
+        return request.execute(num_retries=MAX_RETRIES)
+    return cache.execute(request, key)
+
+
+def uploads_playlist_id(youtube, cache: Optional[ETagCache] = None) -> str:
+    """ID of the authorised channel's uploads playlist."""
+    request = youtube.channels().list(part='contentDetails', mine=True)
+    response = _execute(request, cache, 'channels:mine')
+    return response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+
+
+def iter_playlists(youtube, cache: Optional[ETagCache] = None) -> Iterator[Dict[str, Any]]:
+    """Yield every playlist of the authorised channel, PAGE_SIZE per playlists.list call."""
+    page_token = None
+    while True:
+        request = youtube.playlists().list(
+            part='snippet,status', mine=True, maxResults=PAGE_SIZE, pageToken=page_token
+        )
+        response = _execute(request, cache, f"playlists:mine:{page_token or ''}")
+        yield from response.get('items', [])
+
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def iter_playlist_items(
+    youtube,
+    playlist_id: str,
+    part: str = 'snippet,contentDetails',
+    cache: Optional[ETagCache] = None
+) -> Iterator[Dict[str, Any]]:
+    """Yield every item of a playlist, PAGE_SIZE per playlistItems.list call.
+
+    Playlist item snippets carry the video's title and description, so a
+    whole channel can be read at one quota unit per 50 videos.
+    """
+    page_token = None
+    while True:
+        request = youtube.playlistItems().list(
+            part=part, playlistId=playlist_id, maxResults=PAGE_SIZE, pageToken=page_token
+        )
+        response = _execute(request, cache, f"playlistItems:{playlist_id}:{page_token or ''}")
+        yield from response.get('items', [])
+
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def parse_duration(duration: Optional[str]) -> Optional[int]:
+    """Convert an ISO 8601 duration (PT1H2M3S, P1DT2H) to seconds."""
+    match = re.fullmatch(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?', duration or '')
+    if not match:
+        return None
+    days, hours, minutes, seconds = (int(value or 0) for value in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def _round_to_unit(size: float) -> int:
+    return int(size) // CHUNK_UNIT * CHUNK_UNIT
+
+
+def _fit_overhead(chunks: List[Dict[str, Any]], previous: float) -> float:
+    """Estimate fixed per-request time from chunk (bytes, seconds) pairs."""
+    n = len(chunks)
+    mean_bytes = sum(c['bytes'] for c in chunks) / n
+    mean_seconds = sum(c['seconds'] for c in chunks) / n
+    variance = sum((c['bytes'] - mean_bytes) ** 2 for c in chunks)
+    if variance == 0:
+        return previous  # all chunks the same size: no new information
+    slope = sum((c['bytes'] - mean_bytes) * (c['seconds'] - mean_seconds) for c in chunks) / variance
+    return max(mean_seconds - slope * mean_bytes, 0.0)
+
+
+def build_service(credentials):
+    """Return a YouTube API service object for authorised credentials."""
+    return build('youtube', 'v3', credentials=credentials)
+
+
+@profiled('upload')
+def upload_video(
+    youtube,
+    file_path: str,
+    title: str,
+    description: str = '',
+    category_id: str = '22',  # 22 = People & Blogs
+    privacy: str = 'unlisted',
+    tags: Optional[list] = None,
+    cancel: Optional[threading.Event] = None
+) -> Optional[str]:
+    """Upload a video to YouTube.
+
+    Args:
+        youtube: Authenticated YouTube API service
+        file_path: Path to the video file
+        title: Video title
+        description: Video description
+        category_id: YouTube category ID (22 = People & Blogs)
+        privacy: Privacy status (public, unlisted, private)
+        tags: List of tags
+        cancel: Event checked before each chunk; once set the upload is
+            abandoned. YouTube only creates the video when the last chunk
+            arrives, so an abandoned session leaves nothing on the channel.
+
+    Returns:
+        Video ID if successful, None otherwise
+
+    Raises:
+        QuotaExceeded: The channel has no upload quota left today
+        UploadCancelled: cancel was set before the last chunk was sent
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        print(f"Error: File not found: {file_path}")
+        return None
+
+    body = {
+        'snippet': {
+            'title': title,
+            'description': description,
+            'tags': tags or [],
+            'categoryId': category_id
+        },
+        'status': {
+            'privacyStatus': privacy,
+            'selfDeclaredMadeForKids': False
+        }
+    }
+
+    # Create MediaFileUpload for resumable upload
+    sizer = ChunkSizer()
+    media = _chunked_media(file_path, sizer.size)
+
+    # Create the upload request
+    request = youtube.videos().insert(
+        part=','.join(body.keys()),
+        body=body,
+        media_body=media
+    )
+
+    print(f"\nUploading: {file_path.name}")
+    print(f"Title: {title}")
+    print(f"Privacy: {privacy}")
+    print("-" * 40)
+
+    response = None
+    retry = 0
+    uploaded = 0
+    recovering = False
+    total_size = file_path.stat().st_size
+
+    while response is None:
+        if cancel is not None and cancel.is_set():
+            print("\nUpload cancelled")
+            raise UploadCancelled(file_path.name)
+
+        # The chunk size is fixed per media object, so a resize swaps in a new
+        # one; the upload session and offset stay with the request
+        if request.resumable.chunksize() != sizer.size:
+            request.resumable = _chunked_media(file_path, sizer.size)
+        started = time.monotonic()
+        try:
+            status, response = request.next_chunk()
+            position = status.resumable_progress if status else total_size
+            # The call after an error only re-syncs the upload offset
+            if not recovering:
+                sizer.record(position - uploaded, time.monotonic() - started)
+            uploaded = position
+            recovering = False
+            if status and sizer.stats:
+                progress = int(status.progress() * 100)
+                print(f"\rProgress: {progress}% | {sizer.describe_last()}   ", end='', flush=True)
+
+        except HttpError as e:
+            if e.resp.status in RETRIABLE_STATUS_CODES:
+                sizer.record_error()
+                recovering = True
+                retry = handle_retry(retry, e)
+                if retry is None:
+                    return None
+            elif error_reason(e) in QUOTA_REASONS:
+                raise QuotaExceeded(error_reason(e)) from e
+            else:
+                print(f"\nHTTP error {e.resp.status}: {e.content}")
+                return None
+
+        except RETRIABLE_EXCEPTIONS as e:
+            sizer.record_error()
+            recovering = True
+            retry = handle_retry(retry, e)
+            if retry is None:
+                return None
+
+    print("\n")
+    print(f"Chunks: {sizer.summary()}")
+
+    if response:
+        video_id = response.get('id')
+        print(f"Upload successful!")
+        print(f"Video ID: {video_id}")
+        print(f"URL: {youtube_url(video_id)}")
+        return video_id
+
+    return None
+
+
+def _chunked_media(file_path: Path, chunksize: int) -> MediaFileUpload:
+    """Resumable media upload of a file, sent in chunks of the given size."""
+    return MediaFileUpload(str(file_path), chunksize=chunksize, resumable=True)
+
+
+def handle_retry(retry: int, error) -> Optional[int]:
+    """Handle retry logic for failed uploads.
+
+    Args:
+        retry: Current retry count
+        error: The error that occurred
+
+    Returns:
+        New retry count, or None if max retries exceeded
+    """
+    if retry >= MAX_RETRIES:
+        print(f"\nMax retries exceeded. Last error: {error}")
+        return None
+
+    retry += 1
+    sleep_seconds = random.random() * (2 ** retry)
+    print(f"\nRetry {retry}/{MAX_RETRIES} in {sleep_seconds:.1f}s... ({error})")
+    time.sleep(sleep_seconds)
+    return retry